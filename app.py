@@ -1,4 +1,5 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, send_from_directory
+from flask import Flask, render_template, request, jsonify, redirect, url_for, send_from_directory, Response, \
+    stream_with_context
 import cv2
 import numpy as np
 import tensorflow as tf
@@ -8,22 +9,65 @@ import json
 from datetime import datetime
 import time
 import logging
+import math
+from logging.handlers import QueueHandler, QueueListener
+import abc
+import atexit
 import base64
+import bisect
+import functools
+import hashlib
+import io
+import itertools
+import queue
+import random
+import shutil
+import sqlite3
+import subprocess
+import tarfile
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client
+from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
 # Add this import at the top with other imports
 from tensorflow.keras.layers import LSTM
-import matplotlib.pyplot as plt
-import matplotlib.cm as cm
+try:
+    import fcntl
+except ImportError:
+    # Windows: chunked uploads then rely on a single worker process
+    fcntl = None
+
+from inference_pool import INFERENCE_WORKERS, InferencePool, inference_address, inference_authkey
 
 # Set TensorFlow to be deterministic for consistent results
 os.environ['TF_DETERMINISTIC_OPS'] = '1'
 os.environ['TF_CUDNN_DETERMINISTIC'] = '1'
 tf.config.experimental.enable_op_determinism()
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, 
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                    handlers=[logging.FileHandler("app.log"), logging.StreamHandler()])
+# Configure logging. Records are handed to a queue and written by a background
+# listener thread, so request threads never block on file or terminal I/O.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+# Fraction of predictions whose full detail is logged (all of them at DEBUG)
+PREDICTION_DETAIL_SAMPLE_RATE = float(os.environ.get('PREDICTION_DETAIL_SAMPLE_RATE', '0.05'))
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_handlers = [logging.FileHandler("app.log"), logging.StreamHandler()]
+for handler in log_handlers:
+    handler.setFormatter(log_formatter)
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, *log_handlers)
+# The QueueHandler keeps the default message-only formatter; the listener's handlers add the prefix
+logging.getLogger().addHandler(QueueHandler(log_queue))
+logging.getLogger().setLevel(LOG_LEVEL)
+log_listener.start()
+atexit.register(log_listener.stop)
+# Threads do not survive fork(), so forked workers (gunicorn --preload) need their own listener
+os.register_at_fork(after_in_child=log_listener.start)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
@@ -38,6 +82,113 @@ app.config['VIDEO_UPLOAD_FOLDER'] = VIDEO_UPLOAD_FOLDER
 app.config['FRAMES_FOLDER'] = FRAMES_FOLDER
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp', 'bmp', 'tiff'}
 ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'wmv'}
+# /batch-detect: images per model call, decode threads, and limits per request
+BATCH_ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+BATCH_DETECT_BATCH_SIZE = 32
+BATCH_DETECT_DECODE_WORKERS = min(8, os.cpu_count() or 1)
+BATCH_DETECT_MAX_ITEMS = 10000
+BATCH_DETECT_MAX_ITEM_BYTES = 50 * 1024 * 1024
+# Number of video frames stacked into a single model call (16-64 works well on CPU)
+VIDEO_BATCH_SIZE = 32
+# Maximum number of decoded frames waiting for inference in the video pipeline
+VIDEO_PIPELINE_QUEUE_SIZE = 64
+# Frame sampling policy for video analysis: 'fps', 'budget', 'keyframes' or 'adaptive'
+VIDEO_SAMPLING_POLICY = 'fps'
+VIDEO_SAMPLE_FPS = 1.0
+VIDEO_FRAME_BUDGET = 60
+# 'adaptive' probes VIDEO_ADAPTIVE_PROBE_FPS frames a second and only scores one at a scene cut
+# (histogram distance), after enough motion since the last scored frame (mean grey-level change,
+# at most one per VIDEO_ADAPTIVE_MIN_GAP_SECONDS), or after VIDEO_ADAPTIVE_MAX_GAP_SECONDS regardless,
+# up to VIDEO_FRAME_BUDGET frames per video
+VIDEO_ADAPTIVE_PROBE_FPS = 4.0
+VIDEO_ADAPTIVE_MIN_GAP_SECONDS = 0.5
+VIDEO_ADAPTIVE_MAX_GAP_SECONDS = 5.0
+VIDEO_SCENE_CUT_THRESHOLD = 0.3
+VIDEO_MOTION_THRESHOLD = 12.0
+# Gaps (in frames) larger than this are crossed by seeking rather than grabbing
+VIDEO_SEEK_THRESHOLD = 120
+# Optional face localization ahead of classification (FACE_DETECTION=1 to enable).
+# The OpenCV DNN detector is used when its files are in model/, else a Haar cascade.
+FACE_DETECTION = os.environ.get('FACE_DETECTION', '0') == '1'
+FACE_DNN_PROTOTXT = os.path.join('model', 'deploy.prototxt')
+FACE_DNN_WEIGHTS = os.path.join('model', 'res10_300x300_ssd_iter_140000.caffemodel')
+FACE_MIN_CONFIDENCE = 0.6
+FACE_DETECTION_MAX_SIDE = 640
+FACE_CROP_MARGIN = 0.25
+FACE_MAX_FACES = 4
+# Sampled video frames between face re-detections (boxes carry over in between)
+FACE_REDETECT_INTERVAL = 5
+# Dynamic micro-batching of concurrent image model requests
+IMAGE_BATCH_MAX_SIZE = 16
+IMAGE_BATCH_MAX_WAIT_MS = 5
+# Sequential early exit for video verdicts (VIDEO_EARLY_EXIT=1 to enable): stop scoring
+# frames once a sequential probability ratio test on the running fake score is decided
+VIDEO_EARLY_EXIT = os.environ.get('VIDEO_EARLY_EXIT', '0') == '1'
+VIDEO_EARLY_EXIT_MIN_FRAMES = 8
+VIDEO_EARLY_EXIT_MAX_FRAMES = 300
+VIDEO_SPRT_DELTA = 0.2
+VIDEO_SPRT_ALPHA = 0.01
+VIDEO_SPRT_BETA = 0.01
+# Sampled video frames are kept on disk as JPEG thumbnails, one directory per analysis,
+# shared by all worker processes; analyses untouched for FRAME_STORE_TTL_SECONDS are deleted
+FRAME_STORE_DIR = os.path.join('cache', 'frames')
+FRAME_THUMBNAIL_MAX_SIDE = 320
+FRAME_THUMBNAIL_JPEG_QUALITY = 80
+FRAME_STORE_MAX_BYTES = 256 * 1024 * 1024
+FRAME_STORE_TTL_SECONDS = 3600
+FRAME_STORE_SWEEP_INTERVAL_SECONDS = 60
+# Uploaded media retention: 'keep' (store every upload), 'ttl' (delete stored uploads
+# after UPLOAD_RETENTION_SECONDS) or 'none' (don't store images; delete videos once analyzed)
+UPLOAD_RETENTION = os.environ.get('UPLOAD_RETENTION', 'keep').lower()
+if UPLOAD_RETENTION not in ('keep', 'ttl', 'none'):
+    UPLOAD_RETENTION = 'keep'
+UPLOAD_RETENTION_SECONDS = int(os.environ.get('UPLOAD_RETENTION_SECONDS', str(24 * 3600)))
+UPLOAD_SWEEP_INTERVAL_SECONDS = 600
+UPLOAD_WRITER_THREADS = 2
+# Chunked, resumable video uploads (/uploads/video): size cap, largest chunk accepted, and where
+# incomplete uploads are kept; uploads with no new chunk for VIDEO_UPLOAD_IDLE_SECONDS are abandoned.
+# Chunks may reach any worker, so the worker that owns an upload's job polls its files for progress
+VIDEO_UPLOAD_MAX_BYTES = int(os.environ.get('VIDEO_UPLOAD_MAX_BYTES', str(2 * 1024 ** 3)))
+VIDEO_UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024
+VIDEO_UPLOAD_PARTIAL_FOLDER = os.path.join('cache', 'uploads')
+VIDEO_UPLOAD_IDLE_SECONDS = int(os.environ.get('VIDEO_UPLOAD_IDLE_SECONDS', '900'))
+VIDEO_UPLOAD_POLL_SECONDS = 0.2
+# Analysis of a chunked upload starts once this much of a streamable container has arrived
+VIDEO_UPLOAD_STREAM_MIN_BYTES = 256 * 1024
+# Sampling policies that read frames in order, so they can decode a video that is still arriving
+STREAMING_SAMPLING_POLICIES = ('fps', 'adaptive')
+# Background job workers for asynchronous video analysis
+JOB_WORKERS = 2
+# Finished jobs are forgotten after this many seconds
+JOB_TTL_SECONDS = 3600
+# Job state is kept in SQLite so any gunicorn worker can report on any job. The worker running a job
+# refreshes its heartbeat; a job whose heartbeat is JOB_STALE_SECONDS old was orphaned by a worker exit
+JOB_DB = os.path.join('cache', 'jobs.db')
+JOB_HEARTBEAT_SECONDS = 5
+JOB_STALE_SECONDS = 30
+# Result cache keyed by content digest + model version
+RESULT_CACHE_DIR = os.path.join('cache', 'results')
+RESULT_CACHE_MEMORY_ENTRIES = 1024
+RESULT_CACHE_DISK_MAX_BYTES = 256 * 1024 * 1024
+RESULT_CACHE_TTL_SECONDS = 7 * 24 * 3600
+# Near-duplicate lookup (NEAR_DUPLICATE_DETECTION=1 to enable): uploads whose perceptual
+# hashes are within NEAR_DUPLICATE_MAX_DISTANCE bits of an earlier upload reuse its result
+NEAR_DUPLICATE_DETECTION = os.environ.get('NEAR_DUPLICATE_DETECTION', '0') == '1'
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.environ.get('NEAR_DUPLICATE_MAX_DISTANCE', '6'))
+NEAR_DUPLICATE_VIDEO_PROBES = 5
+NEAR_DUPLICATE_MAX_ENTRIES = 100000
+NEAR_DUPLICATE_INDEX_PATH = os.path.join('cache', 'near_duplicates.jsonl')
+# Grad-CAM overlays served by /explain, cached by content digest + model version
+EXPLAIN_CACHE_DIR = os.path.join('cache', 'explain')
+EXPLAIN_CACHE_MEMORY_ENTRIES = 128
+EXPLAIN_OVERLAY_MAX_SIDE = 640
+EXPLAIN_OVERLAY_ALPHA = 0.4
+EXPLAIN_MAX_FRAMES = 16
+# Append-only prediction log (SQLite in WAL mode)
+PREDICTION_LOG_DB = os.path.join('logs', 'predictions.db')
+PREDICTION_LOG_MAX_ROWS = 100000
+PREDICTION_LOG_BATCH_SIZE = 256
+PREDICTION_LOG_PRUNE_EVERY = 1000
 
 # Create necessary directories
 os.makedirs(IMAGE_UPLOAD_FOLDER, exist_ok=True)
@@ -45,10 +196,149 @@ os.makedirs(VIDEO_UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(FRAMES_FOLDER, exist_ok=True)
 os.makedirs('model', exist_ok=True)
 os.makedirs('logs', exist_ok=True)
+os.makedirs(VIDEO_UPLOAD_PARTIAL_FOLDER, exist_ok=True)
 
 # Model paths - Updated to match your actual model files
 IMAGE_MODEL_PATH = os.path.join('model', 'new_xception.h5')
 VIDEO_MODEL_PATH = os.path.join('model', 'deepfake_detection_model.h5')
+# Video model saved after the one-off time_major repair, so the rebuild only runs once
+VIDEO_MODEL_REPAIRED_PATH = os.path.join('model', 'deepfake_detection_model.repaired.h5')
+# When to load the models: 'background' (parallel threads at import, the default),
+# 'eager' (block at import, use with gunicorn --preload so workers share the weights)
+# or 'lazy' (on first request)
+MODEL_LOADING = os.environ.get('MODEL_LOADING', 'background').lower()
+# With INFERENCE_WORKERS > 0 (see inference_pool.py) the models run in a pool of inference
+# worker processes and web processes only send them batches through shared memory
+INFERENCE_CONNECT_TIMEOUT_SECONDS = 120
+INFERENCE_SEGMENT_MIN_BYTES = 4 * 1024 * 1024
+# Inference backend: 'keras' (the .h5 models), 'tflite-fp16', 'tflite-int8' or 'savedmodel'.
+# Converted models are produced by convert_models.py next to the .h5 files.
+INFERENCE_BACKENDS = ('keras', 'tflite-fp16', 'tflite-int8', 'savedmodel')
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras').lower()
+if INFERENCE_BACKEND not in INFERENCE_BACKENDS:
+    logger.warning(f"Unknown INFERENCE_BACKEND '{INFERENCE_BACKEND}', using 'keras'")
+    INFERENCE_BACKEND = 'keras'
+
+# Metrics
+
+class Metrics:
+    """
+    Minimal Prometheus-style registry: labelled counters, gauges and
+    histograms kept in process memory and rendered in the text exposition
+    format by /metrics. Recording is a dict update under one lock, cheap
+    enough for the per-request and per-batch hot paths. Like the job backend
+    and frame store it is local to each worker process.
+    """
+    DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.definitions = OrderedDict()
+        self.series = {}
+
+    def define(self, name, kind, help_text):
+        self.definitions[name] = (kind, help_text)
+        self.series[name] = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.series[name][key] = self.series[name].get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.series[name][tuple(sorted(labels.items()))] = value
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            counts = self.series[name].get(key)
+            if counts is None:
+                # One count per bucket plus +Inf, then the running sum
+                counts = self.series[name][key] = [0] * (len(self.DURATION_BUCKETS) + 1) + [0.0]
+            counts[bisect.bisect_left(self.DURATION_BUCKETS, value)] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, stage):
+        """Time a block as one observation of a pipeline stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('truthshield_stage_duration_seconds', time.perf_counter() - start, stage=stage)
+
+    def timed(self, stage):
+        """Decorator form of time() for wrapping a whole function"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.time(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _labels(key, extra=()):
+        pairs = list(key) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+        return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            for name, (kind, help_text) in self.definitions.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(self.series[name].items()):
+                    if kind != 'histogram':
+                        lines.append(f"{name}{self._labels(key)} {value}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(self.DURATION_BUCKETS + ('+Inf',), value[:-1]):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{self._labels(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{self._labels(key)} {value[-1]}")
+                    lines.append(f"{name}_count{self._labels(key)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+metrics.define('truthshield_stage_duration_seconds', 'histogram',
+               'Time spent per pipeline stage (upload_save, decode, frame_extraction, preprocess, '
+               'image_inference, video_inference, predict_image, video_evaluation, gradcam, log_write, '
+               'near_duplicate_lookup)')
+metrics.define('truthshield_predictions_total', 'counter',
+               'Images and videos scored, by kind and whether a real model or demo mode produced the result')
+metrics.define('truthshield_model_loads_total', 'counter', 'Model load attempts by model and outcome')
+metrics.define('truthshield_errors_total', 'counter', 'Errors logged, by the function that logged them')
+metrics.define('truthshield_http_requests_total', 'counter', 'Finished HTTP requests by endpoint and status code')
+metrics.define('truthshield_requests_in_flight', 'gauge', 'HTTP requests currently being handled')
+metrics.define('truthshield_process_resident_memory_bytes', 'gauge', 'Resident memory of this worker process')
+metrics.define('truthshield_frame_store_bytes', 'gauge', 'Disk used by sampled video frame thumbnails')
+metrics.define('truthshield_image_batcher_queue_depth', 'gauge', 'Image inputs waiting for the micro-batcher')
+metrics.define('truthshield_model_ready', 'gauge', 'Whether each model is loaded (1) or not (0)')
+
+class ErrorCounter(logging.Handler):
+    """Counts ERROR log records into truthshield_errors_total, labelled by the logging function"""
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+
+    def emit(self, record):
+        metrics.inc('truthshield_errors_total', source=record.funcName)
+
+logger.addHandler(ErrorCounter())
+
+def process_memory_bytes():
+    """Current resident set size from /proc, or None where that is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
 
 # Global variables to store the models
 image_model = None
@@ -62,8 +352,229 @@ class CustomLSTM(LSTM):
         kwargs.pop('time_major', None)
         super().__init__(*args, **kwargs)
 
+def converted_model_path(keras_path, backend=None):
+    """Location of the converted copy of a Keras .h5 model for an inference backend"""
+    backend = backend or INFERENCE_BACKEND
+    base = os.path.splitext(keras_path)[0]
+    if backend == 'savedmodel':
+        return f"{base}_savedmodel"
+    return f"{base}.{backend.split('-', 1)[1]}.tflite"
+
+class TFLiteModel:
+    """
+    Runs a converted .tflite model behind the same predict()/predict_on_batch()
+    interface as a Keras model. Resizing an interpreter's input reallocates
+    all of its tensors, so instead batches are zero-padded to the next power
+    of two and each of those sizes gets its own interpreter, allocated once.
+    Interpreters are not thread-safe, so calls are serialized with a lock.
+    """
+    def __init__(self, model_path, num_threads=None):
+        self.model_path = model_path
+        # Inference workers are pinned to a few cores; use those rather than every core on the machine
+        available_cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+        self.num_threads = num_threads or available_cores
+        self.interpreters = {}
+        self.lock = threading.Lock()
+        interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=self.num_threads)
+        interpreter.allocate_tensors()
+        self.input_index = interpreter.get_input_details()[0]['index']
+        self.output_index = interpreter.get_output_details()[0]['index']
+        self.interpreters[int(interpreter.get_input_details()[0]['shape'][0])] = interpreter
+
+    def _interpreter(self, batch_size):
+        interpreter = self.interpreters.get(batch_size)
+        if interpreter is None:
+            interpreter = tf.lite.Interpreter(model_path=self.model_path, num_threads=self.num_threads)
+            input_shape = interpreter.get_input_details()[0]['shape']
+            interpreter.resize_tensor_input(self.input_index, [batch_size, *input_shape[1:]])
+            interpreter.allocate_tensors()
+            self.interpreters[batch_size] = interpreter
+        return interpreter
+
+    def predict_on_batch(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        count = batch.shape[0]
+        padded_size = 1 << max(0, count - 1).bit_length()
+        if padded_size != count:
+            batch = np.concatenate([batch, np.zeros((padded_size - count,) + batch.shape[1:], dtype=np.float32)])
+        with self.lock:
+            interpreter = self._interpreter(padded_size)
+            interpreter.set_tensor(self.input_index, batch)
+            interpreter.invoke()
+            return np.array(interpreter.get_tensor(self.output_index)[:count])
+
+    def predict(self, batch, verbose=0):
+        return self.predict_on_batch(batch)
+
+class SavedModelRunner:
+    """Runs a tf.function-compiled SavedModel behind the Keras predict()/predict_on_batch() interface"""
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.serve = tf.saved_model.load(model_path).signatures['serving_default']
+
+    def predict_on_batch(self, batch):
+        outputs = self.serve(tf.convert_to_tensor(batch, dtype=tf.float32))
+        return next(iter(outputs.values())).numpy()
+
+    def predict(self, batch, verbose=0):
+        return self.predict_on_batch(batch)
+
+class InferenceClient:
+    """
+    Sends model calls to the inference worker pool (inference_pool.py).
+    Connections are pooled and reused by whichever thread needs one, each
+    with its own shared-memory segment that batches are copied into, so only
+    the segment's name, shape and dtype cross the socket. New connections go
+    to the workers in turn.
+    """
+    def __init__(self, workers=None):
+        self.workers = workers or INFERENCE_WORKERS
+        self.lock = threading.Lock()
+        self.reset()
+        atexit.register(self.close)
+
+    def reset(self):
+        # A forked child must not share its parent's connections
+        self.idle = queue.LifoQueue()
+        self.channels = []
+        self.next_worker = 0
+
+    def _connect(self):
+        with self.lock:
+            index = self.next_worker % self.workers
+            self.next_worker += 1
+        deadline = time.monotonic() + INFERENCE_CONNECT_TIMEOUT_SECONDS
+        while True:
+            try:
+                conn = Client(inference_address(index), authkey=inference_authkey())
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                # The pool may still be starting up
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.5)
+        channel = {'conn': conn, 'segment': None}
+        with self.lock:
+            self.channels.append(channel)
+        return channel
+
+    def _close(self, channel):
+        with self.lock:
+            if channel in self.channels:
+                self.channels.remove(channel)
+        try:
+            channel['conn'].close()
+        except OSError:
+            pass
+        if channel['segment'] is not None:
+            channel['segment'].close()
+            try:
+                channel['segment'].unlink()
+            except FileNotFoundError:
+                pass
+
+    def _call(self, message_for):
+        """Send message_for(channel) over an idle connection and return the worker's reply value"""
+        try:
+            channel = self.idle.get_nowait()
+        except queue.Empty:
+            channel = self._connect()
+        try:
+            channel['conn'].send(message_for(channel))
+            status, value = channel['conn'].recv()
+        except BaseException:
+            # A half-finished exchange leaves the connection unusable
+            self._close(channel)
+            raise
+        self.idle.put(channel)
+        if status == 'error':
+            raise RuntimeError(f"Inference worker error: {value}")
+        return value
+
+    def predict(self, kind, batch):
+        """Run the 'image' or 'video' model on a batch in a worker"""
+        batch = np.ascontiguousarray(batch)
+
+        def message(channel):
+            segment = channel['segment']
+            if segment is None or segment.size < batch.nbytes:
+                if segment is not None:
+                    segment.close()
+                    segment.unlink()
+                size = max(batch.nbytes, 2 * segment.size if segment is not None else INFERENCE_SEGMENT_MIN_BYTES)
+                channel['segment'] = segment = shared_memory.SharedMemory(create=True, size=size)
+            np.ndarray(batch.shape, dtype=batch.dtype, buffer=segment.buf)[...] = batch
+            return 'predict', kind, segment.name, batch.shape, batch.dtype.str
+        return self._call(message)
+
+    def status(self):
+        """Model status of a worker, e.g. {'image': 'ready', 'video': 'failed'}; waits for it to finish loading"""
+        return self._call(lambda channel: ('status',))
+
+    def close(self):
+        for channel in list(self.channels):
+            self._close(channel)
+
+
+class RemoteModel:
+    """The 'image' or 'video' model of the inference worker pool, behind the Keras predict interface"""
+    def __init__(self, kind):
+        self.kind = kind
+
+    def predict_on_batch(self, batch):
+        return inference_client.predict(self.kind, batch)
+
+    def predict(self, batch, verbose=0):
+        return self.predict_on_batch(batch)
+
+inference_client = InferenceClient() if INFERENCE_WORKERS > 0 else None
+if inference_client is not None:
+    os.register_at_fork(after_in_child=inference_client.reset)
+
+def load_remote_model(kind):
+    """A RemoteModel for kind if the inference workers have that model loaded, else None"""
+    try:
+        status = inference_client.status().get(kind)
+    except Exception as e:
+        logger.error(f"Inference workers unavailable for the {kind} model: {e}")
+        return None
+    if status != 'ready':
+        logger.error(f"Inference workers have no {kind} model ({status})")
+        return None
+    logger.info(f"Using the {kind} model of the inference worker pool ({INFERENCE_WORKERS} workers)")
+    return RemoteModel(kind)
+
+def load_converted_model(keras_path, input_size):
+    """
+    Load the converted model for the selected INFERENCE_BACKEND, or return None
+    to fall back to the Keras model (backend 'keras', or no converted file yet).
+    """
+    if INFERENCE_BACKEND == 'keras':
+        return None
+    path = converted_model_path(keras_path)
+    if not os.path.exists(path):
+        logger.warning(f"No {INFERENCE_BACKEND} model at {path}, falling back to Keras. "
+                       f"Run: python convert_models.py --backend {INFERENCE_BACKEND}")
+        return None
+    try:
+        model = SavedModelRunner(path) if INFERENCE_BACKEND == 'savedmodel' else TFLiteModel(path)
+        dummy_input = np.random.random((1, input_size[0], input_size[1], 3)).astype(np.float32)
+        test_prediction = model.predict(dummy_input, verbose=0)
+        logger.info(f"Loaded {INFERENCE_BACKEND} model from {path}. Output shape: {test_prediction.shape}")
+        return model
+    except Exception as e:
+        logger.error(f"Error loading {INFERENCE_BACKEND} model from {path}, falling back to Keras: {e}")
+        return None
+
 def load_image_model():
     global image_model
+    if INFERENCE_WORKERS > 0:
+        image_model = load_remote_model('image')
+        return image_model is not None
+    converted_model = load_converted_model(IMAGE_MODEL_PATH, (299, 299))
+    if converted_model is not None:
+        image_model = converted_model
+        return True
     if os.path.exists(IMAGE_MODEL_PATH):
         try:
             # Try loading with custom objects if needed
@@ -98,9 +609,41 @@ def load_image_model():
         logger.warning(f"Image model file not found at {IMAGE_MODEL_PATH}. Using demo mode.")
         return False
 
+def load_repaired_video_model():
+    """
+    Load the video model saved after a previous time_major repair, if it is
+    newer than the original .h5, so the config rebuild only ever runs once.
+    """
+    if not os.path.exists(VIDEO_MODEL_REPAIRED_PATH):
+        return None
+    if os.path.getmtime(VIDEO_MODEL_REPAIRED_PATH) < os.path.getmtime(VIDEO_MODEL_PATH):
+        logger.info("Repaired video model is older than the original, ignoring it")
+        return None
+    try:
+        model = tf.keras.models.load_model(VIDEO_MODEL_REPAIRED_PATH, compile=False)
+        dummy_input = np.random.random((1, 224, 224, 3)).astype(np.float32)
+        test_prediction = model.predict(dummy_input, verbose=0)
+        logger.info(f"Loaded repaired video model from {VIDEO_MODEL_REPAIRED_PATH}. "
+                    f"Output shape: {test_prediction.shape}")
+        return model
+    except Exception as e:
+        logger.error(f"Error loading repaired video model from {VIDEO_MODEL_REPAIRED_PATH}: {e}")
+        return None
+
 def load_video_model():
     global video_model
+    if INFERENCE_WORKERS > 0:
+        video_model = load_remote_model('video')
+        return video_model is not None
+    converted_model = load_converted_model(VIDEO_MODEL_PATH, (224, 224))
+    if converted_model is not None:
+        video_model = converted_model
+        return True
     if os.path.exists(VIDEO_MODEL_PATH):
+        repaired_model = load_repaired_video_model()
+        if repaired_model is not None:
+            video_model = repaired_model
+            return True
         try:
             logger.info(f"Attempting to load video model from {VIDEO_MODEL_PATH}")
             # Define custom objects to handle deprecated parameters
@@ -166,6 +709,14 @@ def load_video_model():
                     dummy_input = np.random.random((1, 224, 224, 3)).astype(np.float32)
                     test_prediction = video_model.predict(dummy_input, verbose=0)
                     logger.info(f"Rebuilt video model test successful. Output shape: {test_prediction.shape}")
+                    # Save the repaired model so later startups can skip the rebuild
+                    try:
+                        tmp_path = f"{VIDEO_MODEL_REPAIRED_PATH}.{uuid.uuid4().hex}.tmp.h5"
+                        video_model.save(tmp_path, include_optimizer=False)
+                        os.replace(tmp_path, VIDEO_MODEL_REPAIRED_PATH)
+                        logger.info(f"Saved repaired video model to {VIDEO_MODEL_REPAIRED_PATH}")
+                    except Exception as e4:
+                        logger.error(f"Could not save repaired video model: {e4}")
                     return True
                 except Exception as e3:
                     logger.error(f"All fallback methods failed: {e3}")
@@ -174,21 +725,64 @@ def load_video_model():
         logger.warning(f"Video model file not found at {VIDEO_MODEL_PATH}. Using demo mode.")
         return False
 
-# Try to load the models at startup
-logger.info("Loading models at startup...")
-image_model_loaded = load_image_model()
-video_model_loaded = load_video_model()
+image_model_loaded = False
+video_model_loaded = False
+model_status = {'image': 'not_loaded', 'video': 'not_loaded'}
+model_locks = {'image': threading.Lock(), 'video': threading.Lock()}
 
-# Log the final status
-if image_model_loaded:
-    logger.info("✅ IMAGE MODEL: Successfully loaded and ready for predictions")
-else:
-    logger.error("❌ IMAGE MODEL: Failed to load - will use demo mode")
+def ensure_model_loaded(kind):
+    """
+    Make sure the 'image' or 'video' model is loaded, loading it now if needed.
+    Concurrent callers wait for a single in-flight load instead of starting
+    their own, so requests arriving during startup block until the model is
+    ready rather than falling back to demo mode.
+    """
+    global image_model_loaded, video_model_loaded
+    loaded = image_model_loaded if kind == 'image' else video_model_loaded
+    if loaded:
+        return True
+    with model_locks[kind]:
+        loaded = image_model_loaded if kind == 'image' else video_model_loaded
+        if loaded:
+            return True
+        model_status[kind] = 'loading'
+        if kind == 'image':
+            loaded = image_model_loaded = load_image_model()
+        else:
+            loaded = video_model_loaded = load_video_model()
+        model_status[kind] = 'ready' if loaded else 'failed'
+        # Results cached from here on belong to the model just loaded
+        model_versions.pop(kind, None)
+        metrics.inc('truthshield_model_loads_total', model=kind, outcome='success' if loaded else 'failure')
+    # Log the final status
+    if loaded:
+        logger.info(f"✅ {kind.upper()} MODEL: Successfully loaded and ready for predictions")
+    else:
+        logger.error(f"❌ {kind.upper()} MODEL: Failed to load - will use demo mode")
+    return loaded
+
+def load_models(wait=True):
+    """Load both models in parallel threads, optionally waiting for them to finish"""
+    threads = [threading.Thread(target=ensure_model_loaded, args=(kind,), name=f'load-{kind}-model', daemon=True)
+               for kind in ('image', 'video')]
+    for thread in threads:
+        thread.start()
+    if wait:
+        for thread in threads:
+            thread.join()
 
-if video_model_loaded:
-    logger.info("✅ VIDEO MODEL: Successfully loaded and ready for predictions")
+def models_ready():
+    return all(status in ('ready', 'failed') for status in model_status.values())
+
+# Load the models according to MODEL_LOADING
+if MODEL_LOADING == 'eager':
+    logger.info("Loading models at startup...")
+    load_models(wait=True)
+elif MODEL_LOADING == 'background':
+    logger.info("Loading models in the background...")
+    load_models(wait=False)
 else:
-    logger.error("❌ VIDEO MODEL: Failed to load - will use demo mode")
+    logger.info("Models will be loaded on first use")
 
 def allowed_image_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_IMAGE_EXTENSIONS
@@ -196,6 +790,48 @@ def allowed_image_file(filename):
 def allowed_video_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_VIDEO_EXTENSIONS
 
+def is_async_request():
+    """True if the client asked for background processing (?async=1 or an 'async' form field)"""
+    value = request.args.get('async') or request.form.get('async') or ''
+    return value.lower() in ('1', 'true', 'yes')
+
+def is_stream_request():
+    """True if the client asked for results as server-sent events (?stream=1, a 'stream' form field or the Accept header)"""
+    value = request.args.get('stream') or request.form.get('stream') or ''
+    return value.lower() in ('1', 'true', 'yes') or 'text/event-stream' in request.headers.get('Accept', '')
+
+RGB_CONVERSIONS = {1: cv2.COLOR_GRAY2RGB, 3: cv2.COLOR_BGR2RGB, 4: cv2.COLOR_BGRA2RGB}
+
+def preprocess_into(image, out, scratch=None):
+    """
+    Fused resize, RGB conversion and [0, 1] normalization of one image,
+    written straight into out, a preallocated (H, W, 3) float32 array.
+    Resizing first means the color conversion only touches the small image;
+    both steps commute, so the result matches converting first. scratch is an
+    optional dict of reusable uint8 work buffers. Returns False for
+    unsupported input.
+    """
+    if image is None or image.ndim not in (2, 3):
+        return False
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    if channels not in RGB_CONVERSIONS:
+        return False
+    if image.dtype not in (np.uint8, np.uint16, np.float32):
+        image = image.astype(np.float32)
+    height, width = out.shape[:2]
+    scratch = {} if scratch is None else scratch
+    resized = cv2.resize(image, (width, height), dst=scratch.get(('resized', image.dtype.str, channels)))
+    scratch[('resized', image.dtype.str, channels)] = resized
+    rgb = cv2.cvtColor(resized, RGB_CONVERSIONS[channels], dst=scratch.get(('rgb', image.dtype.str)))
+    scratch[('rgb', image.dtype.str)] = rgb
+    # Ensure the image is float32 and normalized to [0, 1]
+    if rgb.max() > 1:
+        np.divide(rgb, np.float32(255.0), out=out, dtype=np.float32, casting='unsafe')
+    else:
+        out[...] = rgb
+    return True
+
+@metrics.timed('preprocess')
 def preprocess_image_for_model(image, target_size=(299, 299)):
     """
     Preprocess image for model prediction with proper normalization
@@ -204,108 +840,380 @@ def preprocess_image_for_model(image, target_size=(299, 299)):
         # Ensure image is in the right format
         if image is None:
             raise ValueError("Input image is None")
-        # Convert to RGB if needed
-        if len(image.shape) == 3:
-            if image.shape[2] == 4:  # RGBA
-                image = cv2.cvtColor(image, cv2.COLOR_BGRA2RGB)
-            elif image.shape[2] == 3:  # BGR
-                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        elif len(image.shape) == 2:  # Grayscale
-            image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
-        # Resize to target size
-        image = cv2.resize(image, target_size)
-        # Ensure the image is float32 and normalized to [0, 1]
-        image = image.astype(np.float32)
-        if image.max() > 1.0:
-            image = image / 255.0
-        # Add batch dimension
-        image = np.expand_dims(image, axis=0)
-        logger.info(f"Preprocessed image shape: {image.shape}, dtype: {image.dtype}, range: [{image.min():.3f}, {image.max():.3f}]")
-        return image
+        # Resize, convert to RGB and normalize into a new (1, H, W, 3) batch
+        processed = np.empty((1, target_size[1], target_size[0], 3), dtype=np.float32)
+        if not preprocess_into(image, processed[0]):
+            raise ValueError(f"Unsupported image shape {image.shape}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Preprocessed image shape: {processed.shape}, dtype: {processed.dtype}, "
+                         f"range: [{processed.min():.3f}, {processed.max():.3f}]")
+        return processed
     except Exception as e:
         logger.error(f"Error preprocessing image: {e}")
         return None
 
+class BatchPreprocessor:
+    """
+    Preprocesses lists of images of mixed sizes into one reusable, preallocated
+    (N, H, W, 3) float32 buffer, growing it only when a larger batch arrives.
+    The returned batch is a view of that buffer, so it is only valid until
+    the next preprocess() call; use one instance per thread (see
+    get_batch_preprocessor).
+    """
+    def __init__(self, target_size):
+        self.target_size = target_size
+        self.buffer = np.empty((0, target_size[1], target_size[0], 3), dtype=np.float32)
+        self.scratch = {}
+
+    @metrics.timed('preprocess')
+    def preprocess(self, images):
+        """
+        Returns (batch, positions): batch holds the successfully preprocessed
+        images in order and positions gives each row's index in images.
+        """
+        if len(images) > len(self.buffer):
+            self.buffer = np.empty((len(images),) + self.buffer.shape[1:], dtype=np.float32)
+        positions = []
+        for position, image in enumerate(images):
+            try:
+                if preprocess_into(image, self.buffer[len(positions)], self.scratch):
+                    positions.append(position)
+            except Exception as e:
+                logger.error(f"Error preprocessing image: {e}")
+        return self.buffer[:len(positions)], positions
+
+batch_preprocessors = threading.local()
+
+def get_batch_preprocessor(target_size):
+    """This thread's BatchPreprocessor for a target size"""
+    preprocessors = batch_preprocessors.__dict__.setdefault('by_size', {})
+    if target_size not in preprocessors:
+        preprocessors[target_size] = BatchPreprocessor(target_size)
+    return preprocessors[target_size]
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching scheduler for a model shared by request threads.
+    Each caller submits one preprocessed input; a scheduler thread gathers
+    concurrent submissions until max_batch_size inputs are waiting or the
+    oldest has waited max_wait_ms, runs a single model call on the stacked
+    batch and hands each caller back its own output row. Batching happens
+    across the threads of one process, so run gunicorn with --threads (or
+    gthread workers) to benefit.
+    """
+    BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+    WAIT_MS_BUCKETS = (1, 2, 5, 10, 25, 50, 100)
+
+    def __init__(self, predict_fn, max_batch_size=None, max_wait_ms=None, name='batcher'):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size or IMAGE_BATCH_MAX_SIZE))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else IMAGE_BATCH_MAX_WAIT_MS) / 1000.0
+        self.name = name
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.batches = 0
+        self.items = 0
+        self.batch_size_counts = {bucket: 0 for bucket in self.BATCH_SIZE_BUCKETS + (float('inf'),)}
+        self.wait_ms_counts = {bucket: 0 for bucket in self.WAIT_MS_BUCKETS + (float('inf'),)}
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.stack_buffer = None
+
+    def _ensure_started(self):
+        # Start lazily so the thread is created in the process that uses it (e.g. after a gunicorn fork)
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self.thread.start()
+
+    def submit(self, model_input):
+        """Queue a single preprocessed input (batch dimension of 1) and return a Future for its output row"""
+        self._ensure_started()
+        future = Future()
+        self.requests.put((model_input, future, time.perf_counter()))
+        return future
+
+    def predict(self, model_input, timeout=None):
+        """Blocking helper: submit an input and wait for its output row"""
+        return self.submit(model_input).result(timeout=timeout)
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued, and only wait for more until the oldest item's deadline
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self.requests.get(timeout=remaining))
+                else:
+                    batch.append(self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _record(self, batch, started):
+        with self.lock:
+            self.batches += 1
+            self.items += len(batch)
+            self.batch_size_counts[next(b for b in self.batch_size_counts if len(batch) <= b)] += 1
+            for _, _, submitted in batch:
+                wait_ms = (started - submitted) * 1000.0
+                self.wait_ms_counts[next(b for b in self.wait_ms_counts if wait_ms <= b)] += 1
+                self.wait_ms_total += wait_ms
+                self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def _stack(self, inputs):
+        # Stack into a buffer owned by the scheduler thread instead of allocating one per batch
+        rows = sum(model_input.shape[0] for model_input in inputs)
+        shape = inputs[0].shape[1:]
+        if (self.stack_buffer is None or self.stack_buffer.shape[1:] != shape
+                or self.stack_buffer.dtype != inputs[0].dtype or self.stack_buffer.shape[0] < rows):
+            self.stack_buffer = np.empty((max(rows, self.max_batch_size),) + shape, dtype=inputs[0].dtype)
+        return np.concatenate(inputs, axis=0, out=self.stack_buffer[:rows])
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            self._record(batch, started)
+            try:
+                outputs = np.asarray(self.predict_fn(self._stack([item[0] for item in batch])))
+                if outputs.shape[0] != len(batch):
+                    raise ValueError(f"Expected {len(batch)} predictions, got {outputs.shape[0]}")
+                for (_, future, _), output in zip(batch, outputs):
+                    future.set_result(output)
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def stats(self):
+        """Queue depth, batch-size histogram and wait-time metrics"""
+        def label(bucket):
+            return '+Inf' if bucket == float('inf') else str(bucket)
+        with self.lock:
+            return {
+                'queue_depth': self.requests.qsize(),
+                'batches': self.batches,
+                'items': self.items,
+                'mean_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+                'batch_size_histogram': {label(b): n for b, n in self.batch_size_counts.items()},
+                'wait_ms_histogram': {label(b): n for b, n in self.wait_ms_counts.items()},
+                'mean_wait_ms': round(self.wait_ms_total / self.items, 3) if self.items else 0.0,
+                'max_wait_ms': round(self.wait_ms_max, 3)
+            }
+
+
+def predict_image_batch(batch):
+    """One image model call on a stacked batch of preprocessed inputs"""
+    with metrics.time('image_inference'):
+        return image_model.predict_on_batch(batch)
+
+image_batcher = MicroBatcher(predict_image_batch, name='image-batcher')
+
+# Face detection
+
+class FaceDetector:
+    """
+    CPU-friendly face localizer. Uses OpenCV's DNN res10 SSD face detector when
+    its model files are present in model/, otherwise the Haar cascade bundled
+    with OpenCV. detect() returns (x, y, w, h) boxes in original image
+    coordinates, largest first.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.net = None
+        self.cascade = None
+        if os.path.exists(FACE_DNN_PROTOTXT) and os.path.exists(FACE_DNN_WEIGHTS):
+            self.net = cv2.dnn.readNetFromCaffe(FACE_DNN_PROTOTXT, FACE_DNN_WEIGHTS)
+            logger.info("Face detection: using OpenCV DNN detector")
+        else:
+            self.cascade = cv2.CascadeClassifier(
+                os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml'))
+            logger.info("Face detection: DNN detector files not found, using Haar cascade")
+
+    def detect(self, image):
+        height, width = image.shape[:2]
+        with self.lock:
+            if self.net is not None:
+                blob = cv2.dnn.blobFromImage(cv2.resize(image, (300, 300)), 1.0, (300, 300), (104.0, 177.0, 123.0))
+                self.net.setInput(blob)
+                detections = self.net.forward()[0, 0]
+                boxes = []
+                for detection in detections:
+                    if detection[2] < FACE_MIN_CONFIDENCE:
+                        continue
+                    x1, y1, x2, y2 = (detection[3:7] * [width, height, width, height]).astype(int)
+                    boxes.append((x1, y1, x2 - x1, y2 - y1))
+            else:
+                # Detect on a downscaled grayscale copy; faces are found at a fraction of the cost
+                scale = min(1.0, FACE_DETECTION_MAX_SIDE / max(height, width))
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+                if scale < 1.0:
+                    gray = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+                found = self.cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(24, 24))
+                boxes = [tuple(int(v / scale) for v in box) for box in found]
+        boxes = [box for box in boxes if box[2] > 0 and box[3] > 0]
+        return sorted(boxes, key=lambda box: box[2] * box[3], reverse=True)[:FACE_MAX_FACES]
+
+
+class FaceTracker:
+    """
+    Carries face boxes over between sampled video frames so the detector only
+    runs every FACE_REDETECT_INTERVAL frames, or sooner when no face is tracked.
+    """
+    def __init__(self, detector):
+        self.detector = detector
+        self.boxes = []
+        self.frames_since_detection = 0
+
+    def faces(self, frame):
+        if not self.boxes or self.frames_since_detection >= FACE_REDETECT_INTERVAL:
+            self.boxes = self.detector.detect(frame)
+            self.frames_since_detection = 0
+        self.frames_since_detection += 1
+        return self.boxes
+
+
+face_detector = None
+face_detector_lock = threading.Lock()
+
+def get_face_detector():
+    """Return the shared face detector, or None when FACE_DETECTION is off"""
+    global face_detector
+    if not FACE_DETECTION:
+        return None
+    with face_detector_lock:
+        if face_detector is None:
+            face_detector = FaceDetector()
+    return face_detector
+
+def crop_faces(image, boxes, margin=None):
+    """Crop each face box out of an image, enlarged by a margin on every side"""
+    margin = FACE_CROP_MARGIN if margin is None else margin
+    height, width = image.shape[:2]
+    crops = []
+    for x, y, w, h in boxes:
+        pad_x, pad_y = int(w * margin), int(h * margin)
+        x1, y1 = max(0, x - pad_x), max(0, y - pad_y)
+        x2, y2 = min(width, x + w + pad_x), min(height, y + h + pad_y)
+        if x2 > x1 and y2 > y1:
+            crops.append(image[y1:y2, x1:x2])
+    return crops
+
+def classification_regions(image, faces=None):
+    """
+    The parts of an image to classify: one crop per detected face when face
+    detection found any, otherwise the whole image (as before face detection).
+    """
+    crops = crop_faces(image, faces) if faces else []
+    return crops or [image]
+
+def model_inputs_for_image(image, target_size, faces=None):
+    """
+    Preprocessed model inputs (each with a batch dimension of 1) for the
+    classification regions of an image. Returns an empty list if
+    preprocessing fails.
+    """
+    inputs = [preprocess_image_for_model(region, target_size=target_size)
+              for region in classification_regions(image, faces)]
+    return [model_input for model_input in inputs if model_input is not None]
+
+def log_prediction_detail(kind, **fields):
+    """
+    Log per-prediction detail as a single structured JSON line. Only a sampled
+    fraction (PREDICTION_DETAIL_SAMPLE_RATE) of predictions is logged, or all
+    of them when the log level is DEBUG.
+    """
+    if logger.isEnabledFor(logging.DEBUG) or random.random() < PREDICTION_DETAIL_SAMPLE_RATE:
+        logger.info(json.dumps({'event': 'prediction', 'kind': kind, **fields}, default=float))
+
+def image_fake_probability(raw_prediction):
+    """Extract the fake probability from a single row of image model output"""
+    raw_prediction = np.asarray(raw_prediction).reshape(-1)
+    # Multi-class output puts the fake class second; binary output has a single probability
+    return float(raw_prediction[1] if raw_prediction.shape[0] > 1 else raw_prediction[0])
+
+@metrics.timed('predict_image')
 def predict_image(image):
-    global image_model, image_model_loaded
-    
-    # Log whether we're using real model or demo mode
-    if image_model_loaded and image_model is not None:
-        logger.info("Using REAL deepfake detection model for prediction")
-        logger.info(f"Model type: {type(image_model).__name__}")
-        print("🔍 Using REAL deepfake detection model for prediction")
-    else:
-        logger.warning("WARNING: No real model loaded, will use demo mode!")
-        logger.info("Using DEMO mode for prediction (no real model loaded)")
-        print("⚠️  WARNING: Using DEMO mode (no real model loaded)")
-    
-    # If model is not loaded, try to load it again
-    if not image_model_loaded:
-        logger.info("Attempting to reload image model...")
-        image_model_loaded = load_image_model()
-        
-    if not image_model_loaded or image_model is None:
+    # Load the model on first use, or try to load it again if it failed before
+    if not ensure_model_loaded('image') or image_model is None:
         # If we don't have a real model, use a demo mode with simulated results
-        logger.warning("No image model loaded, using demo mode with simulated results")
+        logger.debug("No image model loaded, using demo mode with simulated results")
+        metrics.inc('truthshield_predictions_total', kind='image', mode='demo')
         return simulate_prediction(image)
     
+    metrics.inc('truthshield_predictions_total', kind='image', mode='real')
     try:
-        processed_image = preprocess_image_for_model(image)
-        if processed_image is None:
+        detector = get_face_detector()
+        faces = detector.detect(image) if detector is not None else []
+        model_inputs = model_inputs_for_image(image, (299, 299), faces)
+        if not model_inputs:
             return "Error", 0.0, "Failed to preprocess image"
-            
-        # Add a small delay to simulate processing time
-        time.sleep(0.5)
-        
-        logger.info("Running REAL model prediction...")
-        print("🤖 Running REAL model prediction...")
-        
-        # Get prediction from the model
-        raw_prediction = image_model.predict(processed_image, verbose=0)
-        logger.info(f"Raw prediction from REAL model: {raw_prediction}")
-        print(f"📊 Raw prediction: {raw_prediction}")
-        
-        # Handle different output formats
-        if len(raw_prediction.shape) > 1 and raw_prediction.shape[1] > 1:
-            # Multi-class output
-            fake_prob = raw_prediction[0][1] if raw_prediction.shape[1] > 1 else raw_prediction[0][0]
-        else:
-            # Binary output
-            fake_prob = raw_prediction[0][0]
         
-        # Determine result
-        result = "Fake" if fake_prob > 0.5 else "Real"
-        confidence = fake_prob * 100 if result == "Fake" else (1 - fake_prob) * 100
-        confidence = max(50.0, min(95.0, confidence))
-        
-        # Log the result prominently
-        logger.info("=" * 50)
-        logger.info(f"REAL MODEL PREDICTION RESULT: {result}")
-        logger.info(f"CONFIDENCE: {confidence:.1f}%")
-        logger.info(f"Fake probability: {fake_prob:.4f}")
-        logger.info(f"Real probability: {1-fake_prob:.4f}")
-        logger.info("=" * 50)
-        
-        # Also print to terminal immediately
-        print("=" * 50)
-        print(f"🎯 REAL MODEL PREDICTION RESULT: {result}")
-        print(f"📈 CONFIDENCE: {confidence:.1f}%")
-        print(f"🔴 Fake probability: {fake_prob:.4f}")
-        print(f"🟢 Real probability: {1-fake_prob:.4f}")
-        print("=" * 50)
-        
-        # Force flush the logging buffer
-        import sys
-        sys.stdout.flush()
-        
-        return result, confidence, f"Analysis completed with {confidence:.1f}% confidence"
+        # Get predictions from the model (one per face), batched with any concurrent requests
+        futures = [image_batcher.submit(model_input) for model_input in model_inputs]
+        # The image is as fake as its most fake-looking face
+        fake_prob = max(image_fake_probability(future.result()) for future in futures)
+        return image_verdict(fake_prob, len(faces))
         
     except Exception as e:
         error_msg = f"Error during prediction: {str(e)}"
         logger.error(error_msg)
-        print(f"❌ ERROR: {error_msg}")
         return "Error", 0.0, error_msg
 
+def image_verdict(fake_prob, num_faces=0):
+    """Turn an image's fake probability into predict_image's (result, confidence, message)"""
+    result = "Fake" if fake_prob > 0.5 else "Real"
+    confidence = fake_prob * 100 if result == "Fake" else (1 - fake_prob) * 100
+    confidence = max(50.0, min(95.0, confidence))
+    
+    log_prediction_detail('image', result=result, confidence=round(float(confidence), 1),
+                          fake_probability=round(float(fake_prob), 4), faces=num_faces)
+    
+    message = f"Analysis completed with {confidence:.1f}% confidence"
+    if num_faces:
+        message += f" across {num_faces} detected face{'s' if num_faces > 1 else ''}"
+    return result, confidence, message
+
+def predict_images(images):
+    """
+    Batch counterpart of predict_image for callers that already hold many
+    images: all images (or their faces) are preprocessed into one buffer and
+    scored with a single model call. Returns one (result, confidence, message)
+    per image.
+    """
+    if not ensure_model_loaded('image') or image_model is None:
+        logger.debug("No image model loaded, using demo mode with simulated results")
+        metrics.inc('truthshield_predictions_total', len(images), kind='image', mode='demo')
+        return [simulate_prediction(image) for image in images]
+    metrics.inc('truthshield_predictions_total', len(images), kind='image', mode='real')
+    try:
+        detector = get_face_detector()
+        regions = []
+        region_images = []
+        face_counts = []
+        for i, image in enumerate(images):
+            faces = detector.detect(image) if detector is not None else []
+            image_regions = classification_regions(image, faces)
+            regions.extend(image_regions)
+            region_images.extend([i] * len(image_regions))
+            face_counts.append(len(faces))
+        batch, positions = get_batch_preprocessor((299, 299)).preprocess(regions)
+        raw_predictions = np.asarray(predict_image_batch(batch)) if positions else []
+        fake_probs = {}
+        for raw_prediction, position in zip(raw_predictions, positions):
+            i = region_images[position]
+            fake_probs[i] = max(fake_probs.get(i, 0.0), image_fake_probability(raw_prediction))
+        return [image_verdict(fake_probs[i], face_counts[i]) if i in fake_probs
+                else ("Error", 0.0, "Failed to preprocess image") for i in range(len(images))]
+    except Exception as e:
+        error_msg = f"Error during prediction: {str(e)}"
+        logger.error(error_msg)
+        return [("Error", 0.0, error_msg)] * len(images)
+
 def simulate_prediction(image):
     """Simulate a prediction when no model is available"""
     try:
@@ -344,131 +1252,545 @@ def simulate_prediction(image):
         
         confidence = min(confidence, 95)
         
-        logger.info(f"Demo mode - Result: {result}, Confidence: {confidence:.1f}%")
+        logger.debug(f"Demo mode - Result: {result}, Confidence: {confidence:.1f}%")
         return result, confidence, "Demo mode: analysis based on image characteristics"
     except Exception as e:
         logger.error(f"Error in simulation: {e}")
         return "Real", 75.0, "Demo mode: fallback result"
 
-def frame_capture(video_path):
-    """Extract all frames from a video file"""
-    frames = []
-    frame_paths = []
-    # Clear previous frames
-    frames_dir = app.config['FRAMES_FOLDER']
-    if os.path.exists(frames_dir):
-        for f in os.listdir(frames_dir):
-            if f.endswith(('.jpg', '.jpeg', '.png')):
-                file_path = os.path.join(frames_dir, f)
+FrameRef = namedtuple('FrameRef', ['analysis_id', 'index'])
+
+class FrameStore:
+    """
+    Thumbnails of sampled video frames on disk, one directory per analysis
+    (the job id for background jobs) under FRAME_STORE_DIR, so any worker
+    process can serve or explain frames whichever one ran the analysis.
+    Frames are downscaled to FRAME_THUMBNAIL_MAX_SIDE and stored as raw
+    pixels; a frame is JPEG-encoded only when it is first requested, and
+    the JPEG then replaces the raw file. Whole analyses are deleted once
+    untouched for ttl seconds, or least recently used first once the store
+    exceeds max_bytes, so one upload never removes part of another upload's
+    frames.
+    """
+    def __init__(self, directory=None, max_bytes=None, ttl=None):
+        self.directory = directory or FRAME_STORE_DIR
+        self.max_bytes = max_bytes or FRAME_STORE_MAX_BYTES
+        self.ttl = ttl or FRAME_STORE_TTL_SECONDS
+        self.total_bytes = 0
+        self.analyses = 0
+        self.last_sweep = 0.0
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _analysis_dir(self, analysis_id):
+        # Analysis ids come from URLs; anything but a plain file name is refused
+        if not analysis_id or secure_filename(analysis_id) != analysis_id:
+            return None
+        return os.path.join(self.directory, analysis_id)
+
+    def _frame_path(self, analysis_id, index, ext):
+        directory = self._analysis_dir(analysis_id)
+        return os.path.join(directory, f"{int(index)}.{ext}") if directory else None
+
+    @staticmethod
+    def _write(path, data):
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def put(self, analysis_id, index, frame):
+        """Store a thumbnail of a frame and return its FrameRef"""
+        height, width = frame.shape[:2]
+        scale = FRAME_THUMBNAIL_MAX_SIDE / max(height, width)
+        if scale < 1.0:
+            frame = cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        directory = self._analysis_dir(analysis_id)
+        if directory is None:
+            raise ValueError(f"Invalid analysis id: {analysis_id!r}")
+        if not os.path.isdir(directory):
+            # First frame of this analysis: make room for it
+            os.makedirs(directory, exist_ok=True)
+            self.sweep(keep=analysis_id)
+        buffer = io.BytesIO()
+        np.save(buffer, np.ascontiguousarray(frame), allow_pickle=False)
+        self._write(self._frame_path(analysis_id, index, 'npy'), buffer.getvalue())
+        return FrameRef(analysis_id, index)
+
+    def has(self, frame_ref):
+        return any(path is not None and os.path.exists(path)
+                   for path in (self._frame_path(frame_ref.analysis_id, frame_ref.index, 'jpg'),
+                                self._frame_path(frame_ref.analysis_id, frame_ref.index, 'npy')))
+
+    def _load_raw(self, analysis_id, index):
+        try:
+            return np.load(self._frame_path(analysis_id, index, 'npy'), allow_pickle=False)
+        except (FileNotFoundError, ValueError):
+            # Not stored, or encoded meanwhile
+            return None
+
+    def get_jpeg(self, analysis_id, index):
+        """JPEG bytes of a stored frame (encoding it on the first request), or None if it is gone"""
+        path = self._frame_path(analysis_id, index, 'jpg')
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            frame = self._load_raw(analysis_id, index)
+            if frame is None:
+                # Another request may have encoded it between the two looks
                 try:
-                    os.remove(file_path)
-                    logger.info(f"Removed old frame: {file_path}")
-                except Exception as e:
-                    logger.error(f"Error removing old frame {file_path}: {e}")
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    return None
+            else:
+                success, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, FRAME_THUMBNAIL_JPEG_QUALITY])
+                if not success:
+                    return None
+                data = encoded.tobytes()
+                try:
+                    self._write(path, data)
+                    os.remove(self._frame_path(analysis_id, index, 'npy'))
+                except FileNotFoundError:
+                    # The analysis was swept meanwhile; the bytes are still good for this request
+                    pass
+        try:
+            # Frames still being looked at keep their analysis from expiring
+            os.utime(os.path.dirname(path))
+        except FileNotFoundError:
+            pass
+        return data
+
+    def get_frame(self, analysis_id, index):
+        """A stored frame as a BGR image, or None if it is gone"""
+        if self._frame_path(analysis_id, index, 'npy') is None:
+            return None
+        frame = self._load_raw(analysis_id, index)
+        if frame is not None:
+            return frame
+        data = self.get_jpeg(analysis_id, index)
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR) if data is not None else None
+
+    def discard(self, analysis_id):
+        """Delete all frames of one analysis"""
+        directory = self._analysis_dir(analysis_id)
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def sweep(self, keep=None, force=False):
+        """
+        Delete analyses untouched for ttl seconds, then the least recently used
+        ones while over max_bytes, never keep (at most every
+        FRAME_STORE_SWEEP_INTERVAL_SECONDS)
+        """
+        now = time.time()
+        with self.lock:
+            if not force and now - self.last_sweep < FRAME_STORE_SWEEP_INTERVAL_SECONDS:
+                return
+            self.last_sweep = now
+        analyses = []
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.is_dir():
+                    size = sum(frame.stat().st_size for frame in os.scandir(entry.path))
+                    # Adding a frame updates the directory's mtime, and so does get_jpeg
+                    analyses.append((entry.stat().st_mtime, entry.name, size))
+            except FileNotFoundError:
+                continue
+        analyses.sort()
+        total_bytes = sum(size for _, _, size in analyses)
+        cutoff = now - self.ttl
+        remaining = len(analyses)
+        for touched, analysis_id, size in analyses:
+            if analysis_id != keep and (touched < cutoff or total_bytes > self.max_bytes):
+                shutil.rmtree(os.path.join(self.directory, analysis_id), ignore_errors=True)
+                total_bytes -= size
+                remaining -= 1
+        self.total_bytes, self.analyses = total_bytes, remaining
+
+    def stats(self):
+        """Size of the store as of the last sweep"""
+        return {'analyses': self.analyses, 'bytes': self.total_bytes}
+
+
+frame_store = FrameStore()
+
+def frame_url(frame_ref):
+    """Web URL for a sampled frame: a FrameStore thumbnail, or a legacy file under static/frames"""
+    if isinstance(frame_ref, FrameRef):
+        return url_for('frame_thumbnail', analysis_id=frame_ref.analysis_id, frame_index=frame_ref.index)
+    return url_for('static', filename=f'frames/{os.path.basename(frame_ref)}') if frame_ref else ''
+
+def probe_keyframe_times(video_path):
+    """
+    Return the presentation times (seconds) of the video's keyframes using
+    ffprobe, or None if ffprobe is unavailable or fails.
+    """
+    command = [
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0', '-skip_frame', 'nokey',
+        '-show_entries', 'frame=best_effort_timestamp_time', '-of', 'csv=p=0', video_path
+    ]
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, timeout=60, check=True).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"Could not probe keyframes for {video_path}: {e}")
+        return None
+    times = []
+    for line in output.splitlines():
+        try:
+            times.append(float(line.strip().strip(',')))
+        except ValueError:
+            continue
+    return times
+
+def video_sample_indices(vid_obj, video_path=None, policy=None, sample_fps=None, frame_budget=None):
+    """
+    Work out which frame indices to decode for a sampling policy:
+      'fps'       - sample_fps frames per second of video (default one per second)
+      'budget'    - frame_budget frames spread evenly across the whole video
+      'keyframes' - only the video's keyframes (needs ffprobe, else falls back to 'fps')
+      'adaptive'  - VIDEO_ADAPTIVE_PROBE_FPS probe frames per second, to be filtered
+                    by select_changed_frames
+    Returns an ascending iterable of frame indices.
+    """
+    policy = policy or VIDEO_SAMPLING_POLICY
+    sample_fps = sample_fps or VIDEO_SAMPLE_FPS
+    frame_budget = frame_budget or VIDEO_FRAME_BUDGET
+    fps = vid_obj.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_count = int(vid_obj.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    if policy == 'budget':
+        if frame_count > 0:
+            return sorted(set(np.linspace(0, frame_count - 1, num=min(frame_budget, frame_count)).round().astype(int)))
+        logger.warning("Video frame count unknown, falling back to 'fps' sampling")
+    elif policy == 'keyframes':
+        keyframe_times = probe_keyframe_times(video_path) if video_path else None
+        if keyframe_times:
+            return sorted(set(int(round(t * fps)) for t in keyframe_times if t >= 0))
+        logger.warning("Keyframes unavailable, falling back to 'fps' sampling")
+    elif policy == 'adaptive':
+        sample_fps = VIDEO_ADAPTIVE_PROBE_FPS
+    elif policy != 'fps':
+        logger.warning(f"Unknown sampling policy '{policy}', using 'fps'")
+    step = max(1, int(round(fps / sample_fps)))
+    return itertools.count(0, step)
+
+def sample_video_frames(vid_obj, indices):
+    """
+    Yield (frame_index, frame) for each requested index of an opened capture.
+    Skipped frames are only grab()bed, never decoded into images, and long gaps
+    are crossed with a seek instead of grabbing every frame in between.
+    """
+    position = 0
+    for target in indices:
+        target = int(target)
+        if target < position:
+            continue
+        if target - position > VIDEO_SEEK_THRESHOLD:
+            vid_obj.set(cv2.CAP_PROP_POS_FRAMES, target)
+            position = target
+        while position < target:
+            if not vid_obj.grab():
+                return
+            position += 1
+        if not vid_obj.grab():
+            return
+        position += 1
+        success, img = vid_obj.retrieve()
+        if success:
+            yield target, img
+
+def select_changed_frames(frames, fps, frame_count=0, frame_budget=None):
+    """
+    Adaptive sampling over a stream of probed (frame_index, frame) pairs. A
+    frame is passed on at a scene cut (grey-level histogram jump since the
+    previous probe), after significant motion since the last frame passed on
+    (mean absolute difference of small greyscale thumbnails), or once
+    VIDEO_ADAPTIVE_MAX_GAP_SECONDS have gone by without either. At most
+    frame_budget frames are passed on, paced so that when the frame count is
+    known a burst of early cuts cannot use up the budget for the rest.
+    """
+    frame_budget = frame_budget or VIDEO_FRAME_BUDGET
+    min_gap = VIDEO_ADAPTIVE_MIN_GAP_SECONDS * fps
+    max_gap = VIDEO_ADAPTIVE_MAX_GAP_SECONDS * fps
+    # Token bucket: a burst allowance refilled at frame_budget per video length
+    burst = max(1.0, frame_budget / 10.0)
+    refill = frame_budget / frame_count if frame_count > 0 else float('inf')
+    tokens = burst
+    selected = 0
+    previous_index = previous_hist = last_thumb = last_index = None
+    for index, frame in frames:
+        if previous_index is not None:
+            tokens = min(burst, tokens + (index - previous_index) * refill)
+        previous_index = index
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        thumb = cv2.resize(gray, (64, 36), interpolation=cv2.INTER_AREA)
+        hist = cv2.calcHist([thumb], [0], None, [32], [0, 256])
+        scene_cut = previous_hist is not None and \
+            cv2.compareHist(previous_hist, hist, cv2.HISTCMP_BHATTACHARYYA) > VIDEO_SCENE_CUT_THRESHOLD
+        previous_hist = hist
+        if last_thumb is not None and not scene_cut:
+            gap = index - last_index
+            moved = gap >= min_gap and cv2.norm(thumb, last_thumb, cv2.NORM_L1) / thumb.size > VIDEO_MOTION_THRESHOLD
+            if not moved and gap < max_gap:
+                continue
+        if tokens < 1:
+            continue
+        tokens -= 1
+        selected += 1
+        last_thumb, last_index = thumb, index
+        yield index, frame
+        if selected >= frame_budget:
+            return
+
+def select_video_frames(vid_obj, video_path=None, policy=None, sample_fps=None, frame_budget=None):
+    """
+    Yield (frame_index, frame) for each frame a sampling policy picks from an
+    opened capture. The 'adaptive' policy probes frames at
+    VIDEO_ADAPTIVE_PROBE_FPS and keeps those select_changed_frames passes on.
+    """
+    policy = policy or VIDEO_SAMPLING_POLICY
+    frames = sample_video_frames(vid_obj, video_sample_indices(vid_obj, video_path, policy, sample_fps, frame_budget))
+    if policy != 'adaptive':
+        return frames
+    fps = vid_obj.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_count = int(vid_obj.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    return select_changed_frames(frames, fps, frame_count, frame_budget)
+
+def iter_video_frames(video_path, policy=None, sample_fps=None, frame_budget=None, analysis_id=None):
+    """
+    Decode a video and yield (frame, frame_ref) for each frame picked by the
+    sampling policy (see video_sample_indices and select_video_frames). Frames are produced one at a
+    time so callers never need to hold the whole video in memory; a thumbnail
+    copy of each is kept in the frame store under analysis_id.
+    """
+    analysis_id = analysis_id or uuid.uuid4().hex
+    vid_obj = cv2.VideoCapture(video_path)
     try:
-        vid_obj = cv2.VideoCapture(video_path)
         if not vid_obj.isOpened():
             logger.error(f"Could not open video file: {video_path}")
-            return frames, frame_paths
-        fps = vid_obj.get(cv2.CAP_PROP_FPS)
-        count = 0
-        success = True
-        while success:
-            success, img = vid_obj.read()
-            if not success:
-                break
-            # Save one frame per second
-            if int(count % fps) == 0:
-                frame_filename = f"frame_{uuid.uuid4().hex}_{count:06d}.jpg"
-                frame_path = os.path.join(frames_dir, frame_filename)
-                if cv2.imwrite(frame_path, img):
-                    frames.append(img)
-                    frame_paths.append(frame_path)
-                    logger.info(f"Saved frame {count}: {frame_path}")
-                else:
-                    logger.error(f"Failed to save frame: {frame_path}")
-            count += 1
+            return
+        frames = select_video_frames(vid_obj, video_path, policy, sample_fps, frame_budget)
+        # Only count time spent decoding here, not time the consumer holds each frame
+        extraction_time = 0.0
+        resumed = time.perf_counter()
+        for count, img in frames:
+            frame_ref = frame_store.put(analysis_id, count, img)
+            extraction_time += time.perf_counter() - resumed
+            yield img, frame_ref
+            resumed = time.perf_counter()
+        extraction_time += time.perf_counter() - resumed
+        metrics.observe('truthshield_stage_duration_seconds', extraction_time, stage='frame_extraction')
+    finally:
         vid_obj.release()
+
+def frame_capture(video_path, analysis_id=None):
+    """Extract the sampled frames from a video file"""
+    frames = []
+    frame_refs = []
+    try:
+        for img, frame_ref in iter_video_frames(video_path, analysis_id=analysis_id):
+            frames.append(img)
+            frame_refs.append(frame_ref)
         logger.info(f"Extracted {len(frames)} frames from video")
-        return frames, frame_paths
+        return frames, frame_refs
     except Exception as e:
         logger.error(f"Error during frame extraction: {e}")
         return [], []
 
-def evaluate_video_frames(frames, frame_paths):
-    """Analyze extracted video frames for deepfake detection"""
-    global video_model, video_model_loaded
-    if not video_model_loaded:
-        logger.info("Attempting to reload video model...")
-        video_model_loaded = load_video_model()
+def prefetch_frames(frame_iter, max_queue=None):
+    """
+    Run a frame iterator in a background decoder thread and yield its items
+    through a bounded queue. The decoder blocks once max_queue frames are
+    waiting, so memory stays flat however long the video is, while decode
+    overlaps with preprocessing and inference in the consuming thread.
+    Exceptions raised by the decoder are re-raised in the consumer.
+    """
+    max_queue = max(1, int(max_queue or VIDEO_PIPELINE_QUEUE_SIZE))
+    frame_queue = queue.Queue(maxsize=max_queue)
+    stop_event = threading.Event()
+    done = object()
+
+    def put(item):
+        # Block while the queue is full (backpressure) but give up if the consumer went away
+        while not stop_event.is_set():
+            try:
+                frame_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def decode():
+        try:
+            for item in frame_iter:
+                if not put(item):
+                    return
+        except Exception as e:
+            logger.error(f"Error during frame extraction: {e}")
+            put(e)
+        finally:
+            close = getattr(frame_iter, 'close', None)
+            if close is not None:
+                close()
+            put(done)
+
+    decoder = threading.Thread(target=decode, name='frame-decoder', daemon=True)
+    decoder.start()
+    try:
+        while True:
+            item = frame_queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop_event.set()
+        decoder.join(timeout=5)
+
+def video_fake_probability(raw_prediction):
+    """Extract the fake probability from a single row of video model output"""
+    raw_prediction = np.asarray(raw_prediction).reshape(-1)
+    if raw_prediction.shape[0] == 2:
+        return float(raw_prediction[1])
+    return float(raw_prediction[-1])
+
+@metrics.timed('video_inference')
+def predict_video_batch(batch_inputs):
+    """
+    Run the video model once over a stacked (N, H, W, 3) batch of preprocessed frames.
+    Returns one raw prediction row (or the Exception raised for it) per input, so
+    a single bad frame does not fail the rest of its batch.
+    """
+    try:
+        raw_predictions = np.asarray(video_model.predict_on_batch(batch_inputs))
+        if raw_predictions.ndim == 1:
+            raw_predictions = raw_predictions.reshape(-1, 1)
+        if raw_predictions.shape[0] != len(batch_inputs):
+            raise ValueError(f"Expected {len(batch_inputs)} predictions, got {raw_predictions.shape[0]}")
+        return list(raw_predictions)
+    except Exception as e:
+        logger.warning(f"Batched prediction failed ({e}), falling back to per-frame prediction")
+    outputs = []
+    for processed_frame in batch_inputs:
+        try:
+            outputs.append(video_model.predict(processed_frame[np.newaxis], verbose=0)[0])
+        except Exception as e:
+            outputs.append(e)
+    return outputs
+
+def score_video_batch(frames, frame_paths, start_index=0, face_tracker=None):
+    """
+    Preprocess and score a mini-batch of frames with a single video model call.
+    Returns (frame_results, total_fake_score) for the batch. Frames that fail
+    preprocessing are skipped and frames that fail inference get a neutral
+    "Error" result, exactly as when frames were scored one at a time. With a
+    face_tracker, each tracked face is scored and a frame is as fake as its
+    most fake-looking face.
+    """
     results = []
     total_fake_score = 0
-    num_frames = len(frames)
-    if num_frames == 0:
-        return [], "Error", 0
-    if not video_model_loaded or video_model is None:
-        logger.warning("No video model loaded, using demo mode for video analysis")
-        # Simulate results if no model is available
-        for i, (frame, path) in enumerate(zip(frames, frame_paths)):
-            result, confidence, _ = simulate_prediction(frame)
+    regions = []
+    region_frames = []
+    for offset, frame in enumerate(frames):
+        faces = face_tracker.faces(frame) if face_tracker is not None else []
+        frame_regions = classification_regions(frame, faces)
+        regions.extend(frame_regions)
+        region_frames.extend([offset] * len(frame_regions))
+    # Resize to (224, 224) for video model, all regions into one reusable batch buffer
+    batch_inputs, positions = get_batch_preprocessor((224, 224)).preprocess(regions)
+    rows_by_frame = {}
+    for row, position in enumerate(positions):
+        rows_by_frame.setdefault(region_frames[position], []).append(row)
+    for offset in range(len(frames)):
+        if offset not in rows_by_frame:
+            logger.error(f"Failed to preprocess frame {start_index + offset}")
+    if not positions:
+        return results, total_fake_score
+    raw_predictions = predict_video_batch(batch_inputs)
+    for offset, rows in sorted(rows_by_frame.items()):
+        i = start_index + offset
+        path = frame_paths[offset]
+        try:
+            raw_prediction = [raw_predictions[row] for row in rows]
+            for row in raw_prediction:
+                if isinstance(row, Exception):
+                    raise row
+            logger.debug(f"Frame {i} raw prediction: {raw_prediction}")
+            fake_prob = max(video_fake_probability(row) for row in raw_prediction)
+            result = "Fake" if fake_prob > 0.5 else "Real"
+            confidence = fake_prob * 100 if result == "Fake" else (1 - fake_prob) * 100
+            confidence = max(50.0, min(95.0, confidence))
+            logger.debug(f"Frame {i}: {result}, Confidence: {confidence:.1f}%")
             # Convert path to web-accessible URL
-            web_path = url_for('static', filename=f'frames/{os.path.basename(path)}')
+            web_path = frame_url(path)
             frame_result = {
                 'frame': f"frame{i}",
                 'path': web_path,
+                'ref': path if isinstance(path, FrameRef) else None,
                 'result': result,
-                'confidence': confidence
+                'confidence': confidence,
+                'fake_score': fake_prob
             }
             results.append(frame_result)
-            # For simulation, convert percentage to 0-1 scale for averaging
-            fake_score = confidence / 100 if result == "Fake" else (100 - confidence) / 100
-            total_fake_score += fake_score
-    else:
-        # Use actual model for prediction
-        for i, (frame, path) in enumerate(zip(frames, frame_paths)):
-            try:
-                # Resize to (224, 224) for video model
-                processed_frame = preprocess_image_for_model(frame, target_size=(224, 224))
-                if processed_frame is None:
-                    logger.error(f"Failed to preprocess frame {i}")
-                    continue
-                raw_prediction = video_model.predict(processed_frame, verbose=0)
-                logger.info(f"Frame {i} raw prediction: {raw_prediction}")
-                # Handle different output formats
-                if len(raw_prediction.shape) > 1 and raw_prediction.shape[1] > 1:
-                    if raw_prediction.shape[1] == 2:
-                        fake_prob = float(raw_prediction[0][1])
-                    else:
-                        fake_prob = float(raw_prediction[0][-1])
-                else:
-                    fake_prob = float(raw_prediction[0][0])
-                result = "Fake" if fake_prob > 0.5 else "Real"
-                confidence = fake_prob * 100 if result == "Fake" else (1 - fake_prob) * 100
-                confidence = max(50.0, min(95.0, confidence))
-                logger.info(f"Frame {i}: {result}, Confidence: {confidence:.1f}%")
-                # Convert path to web-accessible URL
-                web_path = url_for('static', filename=f'frames/{os.path.basename(path)}')
-                frame_result = {
-                    'frame': f"frame{i}",
-                    'path': web_path,
-                    'result': result,
-                    'confidence': confidence
-                }
-                results.append(frame_result)
-                # Use fake probability for overall calculation
-                total_fake_score += fake_prob
-            except Exception as e:
-                logger.error(f"Error processing frame {i}: {e}")
-                # Add a default result for failed frames
-                web_path = url_for('static', filename=f'frames/{os.path.basename(path)}') if path else ''
-                frame_result = {
-                    'frame': f"frame{i}",
-                    'path': web_path,
-                    'result': "Error",
-                    'confidence': 0.0
-                }
-                results.append(frame_result)
-                total_fake_score += 0.5  # Neutral score for failed frames
+            # Use fake probability for overall calculation
+            total_fake_score += fake_prob
+        except Exception as e:
+            logger.error(f"Error processing frame {i}: {e}")
+            # Add a default result for failed frames
+            web_path = frame_url(path)
+            frame_result = {
+                'frame': f"frame{i}",
+                'path': web_path,
+                'ref': path if isinstance(path, FrameRef) else None,
+                'result': "Error",
+                'confidence': 0.0,
+                'fake_score': 0.5
+            }
+            results.append(frame_result)
+            total_fake_score += 0.5  # Neutral score for failed frames
+    return results, total_fake_score
+
+def simulate_video_batch(frames, frame_paths, start_index=0):
+    """Simulate results for a mini-batch of frames when no video model is available"""
+    results = []
+    total_fake_score = 0
+    for offset, (frame, path) in enumerate(zip(frames, frame_paths)):
+        i = start_index + offset
+        result, confidence, _ = simulate_prediction(frame)
+        # Convert path to web-accessible URL
+        web_path = frame_url(path)
+        # For simulation, convert percentage to 0-1 scale for averaging
+        fake_score = confidence / 100 if result == "Fake" else (100 - confidence) / 100
+        frame_result = {
+            'frame': f"frame{i}",
+            'path': web_path,
+            'ref': path if isinstance(path, FrameRef) else None,
+            'result': result,
+            'confidence': confidence,
+            'fake_score': fake_score
+        }
+        results.append(frame_result)
+        total_fake_score += fake_score
+    return results, total_fake_score
+
+def iter_batches(items, batch_size):
+    """Group an iterable into lists of at most batch_size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def summarize_video_scores(total_fake_score, num_frames):
+    """Turn the summed per-frame fake scores into an overall (result, confidence)"""
     # Calculate average fake score
     avg_fake_score = total_fake_score / num_frames if num_frames > 0 else 0.5
     # Overall result based on average fake score
@@ -480,16 +1802,311 @@ def evaluate_video_frames(frames, frame_paths):
         overall_confidence = (1 - avg_fake_score) * 100
     # Ensure confidence is reasonable
     overall_confidence = max(50.0, min(95.0, overall_confidence))
+    return overall_result, overall_confidence
+
+class SequentialVerdict:
+    """
+    Sequential probability ratio test on per-frame fake scores. Each score p
+    is treated as soft evidence for H1 (mean fake score 0.5 + delta) against
+    H0 (0.5 - delta); once the log-likelihood ratio crosses the bound set by
+    the error rates alpha/beta, and at least min_frames have been seen, the
+    verdict is settled and no more frames need scoring. Analysis also stops
+    at max_frames regardless.
+    """
+    def __init__(self, min_frames=None, max_frames=None, delta=None, alpha=None, beta=None):
+        self.min_frames = VIDEO_EARLY_EXIT_MIN_FRAMES if min_frames is None else min_frames
+        self.max_frames = VIDEO_EARLY_EXIT_MAX_FRAMES if max_frames is None else max_frames
+        delta = VIDEO_SPRT_DELTA if delta is None else delta
+        alpha = VIDEO_SPRT_ALPHA if alpha is None else alpha
+        beta = VIDEO_SPRT_BETA if beta is None else beta
+        self.log_fake = math.log((0.5 + delta) / (0.5 - delta))
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+        self.llr = 0.0
+
+    def update(self, fake_scores):
+        for score in fake_scores:
+            # LLR of a Bernoulli observation with soft label p; symmetric hypotheses make this (2p - 1) * log-odds
+            self.llr += (2 * score - 1) * self.log_fake
+
+    def should_stop(self, frames_seen):
+        if frames_seen >= self.max_frames:
+            return True
+        return frames_seen >= self.min_frames and (self.llr >= self.upper or self.llr <= self.lower)
+
+@metrics.timed('video_evaluation')
+def evaluate_video_stream(frame_items, batch_size=None, on_batch=None, early_exit=None, summary=None):
+    """
+    Analyze a stream of (frame, frame_ref) pairs for deepfake detection.
+    Frames are consumed and scored one mini-batch at a time, so only the
+    current batch is ever held in memory. If given, on_batch(batch_results,
+    frames_seen) is called after each batch to report partial results.
+    With early_exit (default VIDEO_EARLY_EXIT) scoring stops as soon as a
+    SequentialVerdict settles the verdict. If a summary dict is passed it is
+    filled with frames_evaluated and stopped_early.
+    """
+    early_exit = VIDEO_EARLY_EXIT if early_exit is None else early_exit
+    sequential_verdict = SequentialVerdict() if early_exit else None
+    stopped_early = False
+    batch_size = max(1, int(batch_size or VIDEO_BATCH_SIZE))
+    use_model = ensure_model_loaded('video') and video_model is not None
+    if not use_model:
+        logger.warning("No video model loaded, using demo mode for video analysis")
+    metrics.inc('truthshield_predictions_total', kind='video', mode='real' if use_model else 'demo')
+    detector = get_face_detector() if use_model else None
+    face_tracker = FaceTracker(detector) if detector is not None else None
+    results = []
+    total_fake_score = 0
+    num_frames = 0
+    frame_items = iter(frame_items)
+    for batch in iter_batches(frame_items, batch_size):
+        batch_frames = [frame for frame, _ in batch]
+        batch_paths = [path for _, path in batch]
+        if use_model:
+            # Use actual model for prediction, one model call per mini-batch of frames
+            batch_results, batch_fake_score = score_video_batch(batch_frames, batch_paths, num_frames, face_tracker)
+        else:
+            # Simulate results if no model is available
+            batch_results, batch_fake_score = simulate_video_batch(batch_frames, batch_paths, num_frames)
+        settled = False
+        if sequential_verdict is not None:
+            # Test frame by frame, so the verdict can settle part-way through a batch
+            for i, res in enumerate(batch_results):
+                sequential_verdict.update([res['fake_score']])
+                if sequential_verdict.should_stop(num_frames + i + 1):
+                    settled = True
+                    if i + 1 < len(batch_results):
+                        stopped_early = True
+                        batch_results = batch_results[:i + 1]
+                        batch_fake_score = sum(res['fake_score'] for res in batch_results)
+                    break
+        results.extend(batch_results)
+        total_fake_score += batch_fake_score
+        num_frames += len(batch_results)
+        if on_batch is not None:
+            on_batch(batch_results, num_frames)
+        if settled:
+            # Only an early stop if the video had frames left to score
+            if not stopped_early:
+                stopped_early = next(frame_items, None) is not None
+            break
+    if stopped_early:
+        # Stop decoding the rest of the video
+        close = getattr(frame_items, 'close', None)
+        if close is not None:
+            close()
+        logger.info(f"Video verdict settled after {num_frames} frames, stopping early")
+    if summary is not None:
+        summary.update({'frames_evaluated': num_frames, 'stopped_early': stopped_early})
+    if num_frames == 0:
+        return [], "Error", 0
+    overall_result, overall_confidence = summarize_video_scores(total_fake_score, num_frames)
     logger.info(f"Video analysis complete - Result: {overall_result}, Confidence: {overall_confidence:.1f}%")
     return results, overall_result, overall_confidence
 
+def evaluate_video_frames(frames, frame_paths, batch_size=None):
+    """Analyze extracted video frames for deepfake detection"""
+    return evaluate_video_stream(zip(frames, frame_paths), batch_size)
+
+def analyze_video(video_path, batch_size=None, max_queue=None, on_batch=None, early_exit=None, summary=None,
+                  analysis_id=None):
+    """
+    Decode, preprocess and score a video as a streaming pipeline: a decoder
+    thread feeds a bounded frame queue while batches are scored as they fill.
+    Frame thumbnails are kept in the frame store under analysis_id.
+    """
+    frame_items = prefetch_frames(iter_video_frames(video_path, analysis_id=analysis_id), max_queue)
+    return evaluate_video_stream(frame_items, batch_size, on_batch=on_batch, early_exit=early_exit, summary=summary)
+
+def estimate_sampled_frame_count(video_path):
+    """
+    Estimate how many frames the sampling policy will pick from a video (0 if
+    unknown). For 'adaptive' this is an upper bound: the probes, or the budget.
+    """
+    vid_obj = cv2.VideoCapture(video_path)
+    try:
+        if not vid_obj.isOpened():
+            return 0
+        indices = video_sample_indices(vid_obj, video_path)
+        if isinstance(indices, list):
+            return len(indices)
+        frame_count = int(vid_obj.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        first, second = next(indices), next(indices)
+        step = second - first
+        estimate = -(-frame_count // step) if frame_count > 0 and step > 0 else 0
+        if VIDEO_SAMPLING_POLICY == 'adaptive':
+            estimate = min(estimate, VIDEO_FRAME_BUDGET) if estimate else VIDEO_FRAME_BUDGET
+        return estimate
+    finally:
+        vid_obj.release()
+
+def format_frame_results(frame_results):
+    """Format per-frame results the way the video endpoints return them"""
+    return [{'path': res['path'], 'result': res['result'], 'confidence': f"{res['confidence']:.1f}%"}
+            for res in frame_results]
+
+def video_response(frame_results, overall_result, overall_confidence, unique_filename, summary=None):
+    """Build the JSON-serializable result of a video analysis"""
+    summary = summary or {}
+    return {
+        'result': overall_result,
+        'confidence': f"{overall_confidence:.1f}%",
+        'video_url': url_for('static', filename=f'uploads/videos/{unique_filename}') if upload_store.keeps_uploads else None,
+        'frames': format_frame_results(frame_results),
+        'frames_evaluated': summary.get('frames_evaluated', len(frame_results)),
+        'stopped_early': summary.get('stopped_early', False),
+        'type': 'video'
+    }
+
+class PredictionLog:
+    """
+    Append-only prediction log stored in SQLite (WAL mode, so several gunicorn
+    workers can write at once). log() only enqueues the entry; a background
+    thread writes queued entries in batches and prunes the table to max_rows.
+    """
+    def __init__(self, db_path=None, max_rows=None, legacy_json_path=None):
+        self.db_path = db_path or PREDICTION_LOG_DB
+        self.max_rows = max_rows or PREDICTION_LOG_MAX_ROWS
+        self.pending = queue.Queue()
+        self.writes_since_prune = 0
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS predictions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    file_path TEXT,
+                    file_type TEXT,
+                    result TEXT,
+                    confidence REAL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_predictions_file_type ON predictions (file_type, id)')
+        if legacy_json_path:
+            self._import_legacy(legacy_json_path)
+        self.writer = None
+        self.writer_lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def _ensure_writer(self):
+        # Start lazily so the thread is created in the process that logs (e.g. after a gunicorn fork)
+        with self.writer_lock:
+            if self.writer is None or not self.writer.is_alive():
+                self.writer = threading.Thread(target=self._run, name='prediction-log-writer', daemon=True)
+                self.writer.start()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _import_legacy(self, json_path):
+        """
+        One-off migration of the old JSON array log. Every worker runs this at
+        import, so it happens under a file lock, and the rows go in with a
+        marker in the same transaction; the file is renamed afterwards.
+        """
+        if not os.path.exists(json_path):
+            return
+        try:
+            with open(f"{self.db_path}.lock", 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                # Another worker may have finished the import while this one waited for the lock
+                if not os.path.exists(json_path):
+                    return
+                with open(json_path, 'r') as f:
+                    entries = json.load(f)
+                migration = f"legacy_json:{os.path.abspath(json_path)}"
+                with self._connect() as conn:
+                    conn.execute('CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY)')
+                    # Already imported if an earlier run stopped before renaming the file
+                    imported = conn.execute('SELECT 1 FROM migrations WHERE name = ?', (migration,)).fetchone()
+                    if not imported:
+                        conn.executemany(
+                            'INSERT INTO predictions (timestamp, file_path, file_type, result, confidence) '
+                            'VALUES (?, ?, ?, ?, ?)',
+                            [(e['timestamp'], e['file_path'], e['file_type'], e['result'], e['confidence'])
+                             for e in entries]
+                        )
+                        conn.execute('INSERT INTO migrations (name) VALUES (?)', (migration,))
+                os.replace(json_path, f"{json_path}.migrated")
+            if not imported:
+                logger.info(f"Imported {len(entries)} predictions from {json_path}")
+        except Exception as e:
+            logger.error(f"Error importing legacy log file {json_path}: {e}")
+
+    def log(self, entry):
+        """Queue a prediction entry for writing"""
+        self._ensure_writer()
+        self.pending.put(entry)
+
+    @metrics.timed('log_write')
+    def _write(self, entries):
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT INTO predictions (timestamp, file_path, file_type, result, confidence) VALUES (?, ?, ?, ?, ?)',
+                [(e['timestamp'], e['file_path'], e['file_type'], e['result'], e['confidence']) for e in entries]
+            )
+            self.writes_since_prune += len(entries)
+            if self.writes_since_prune >= PREDICTION_LOG_PRUNE_EVERY:
+                conn.execute('DELETE FROM predictions WHERE id <= (SELECT MAX(id) FROM predictions) - ?',
+                             (self.max_rows,))
+                self.writes_since_prune = 0
+
+    def _drain(self, first=None):
+        entries = [] if first is None else [first]
+        while len(entries) < PREDICTION_LOG_BATCH_SIZE:
+            try:
+                entries.append(self.pending.get_nowait())
+            except queue.Empty:
+                break
+        if entries:
+            try:
+                self._write(entries)
+            except Exception as e:
+                logger.error(f"Error writing to prediction log: {e}")
+            finally:
+                for _ in entries:
+                    self.pending.task_done()
+
+    def _run(self):
+        while True:
+            self._drain(self.pending.get())
+
+    def flush(self, timeout=5):
+        """Wait (up to timeout seconds) for queued entries to be written"""
+        deadline = time.time() + timeout
+        while self.pending.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.01)
+
+    def recent(self, limit=50, file_type=None):
+        """Return the most recent entries, newest first, without reading the whole history"""
+        query = 'SELECT timestamp, file_path, file_type, result, confidence FROM predictions'
+        params = []
+        if file_type:
+            query += ' WHERE file_type = ?'
+            params.append(file_type)
+        query += ' ORDER BY id DESC LIMIT ?'
+        params.append(int(limit))
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [
+            {'timestamp': row[0], 'file_path': row[1], 'file_type': row[2], 'result': row[3], 'confidence': row[4]}
+            for row in rows
+        ]
+
+
+prediction_log = PredictionLog(legacy_json_path=os.path.join('logs', 'predictions.json'))
+
 def log_prediction(file_path, result, confidence, file_type="image"):
-    """Log prediction to a file for analytics"""
-    log_dir = 'logs'
-    os.makedirs(log_dir, exist_ok=True)
-    
-    log_file = os.path.join(log_dir, 'predictions.json')
-    
+    """Log prediction to the append-only prediction log for analytics"""
     log_entry = {
         'timestamp': datetime.now().isoformat(),
         'file_path': file_path,
@@ -497,33 +2114,1534 @@ def log_prediction(file_path, result, confidence, file_type="image"):
         'result': result,
         'confidence': float(confidence)
     }
-    
-    # Load existing logs
-    logs = []
-    if os.path.exists(log_file):
+    prediction_log.log(log_entry)
+    logger.debug(f"Logged prediction for {file_path}")
+
+# Result cache
+
+model_versions = {}
+
+def model_version(kind):
+    """
+    Identify the model that produced a result, so cached results are dropped
+    when it changes. Worked out once the model's load has settled: a failed
+    load is not retried on every cache lookup.
+    """
+    version = model_versions.get(kind)
+    if version is not None:
+        return version
+    if model_status[kind] != 'failed':
+        # Waits for a load still in progress
+        ensure_model_loaded(kind)
+    loaded = image_model_loaded if kind == 'image' else video_model_loaded
+    path = IMAGE_MODEL_PATH if kind == 'image' else VIDEO_MODEL_PATH
+    if not loaded:
+        version = 'demo'
+    else:
+        if INFERENCE_BACKEND != 'keras' and os.path.exists(converted_model_path(path)):
+            path = converted_model_path(path)
+        try:
+            stat = os.stat(path)
+            version = f"{INFERENCE_BACKEND}:{os.path.basename(path)}:{stat.st_size}:{int(stat.st_mtime)}"
+        except OSError:
+            version = f"{INFERENCE_BACKEND}:{os.path.basename(path)}"
+    model_versions[kind] = version
+    return version
+
+def analysis_version(kind):
+    """
+    The model version plus the settings that change a result besides the
+    model (face localization, and for videos frame sampling and early exit),
+    so results computed under other settings aren't reused
+    """
+    settings = [model_version(kind), f"faces={int(FACE_DETECTION)}:{FACE_CROP_MARGIN}:{FACE_MAX_FACES}"]
+    if kind == 'video':
+        settings.append(f"sampling={VIDEO_SAMPLING_POLICY}:{VIDEO_SAMPLE_FPS}:{VIDEO_FRAME_BUDGET}")
+        if VIDEO_SAMPLING_POLICY == 'adaptive':
+            settings.append(f"adaptive={VIDEO_ADAPTIVE_PROBE_FPS}:{VIDEO_ADAPTIVE_MIN_GAP_SECONDS}:"
+                            f"{VIDEO_ADAPTIVE_MAX_GAP_SECONDS}:{VIDEO_SCENE_CUT_THRESHOLD}:{VIDEO_MOTION_THRESHOLD}")
+        settings.append(f"early_exit={VIDEO_EARLY_EXIT_MIN_FRAMES}:{VIDEO_EARLY_EXIT_MAX_FRAMES}:{VIDEO_SPRT_DELTA}:"
+                        f"{VIDEO_SPRT_ALPHA}:{VIDEO_SPRT_BETA}" if VIDEO_EARLY_EXIT else "early_exit=0")
+    return ','.join(settings)
+
+def content_digest(data=None, path=None, chunk_size=1 << 20):
+    """SHA-256 hex digest of uploaded bytes, or of a file read in chunks"""
+    digest = hashlib.sha256()
+    if data is not None:
+        digest.update(data)
+    else:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def result_cache_key(kind, digest):
+    """Cache key for a media digest under the currently loaded model and analysis settings"""
+    return hashlib.sha256(f"{kind}:{analysis_version(kind)}:{digest}".encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of analysis results keyed by content digest: an in-memory
+    LRU of max_entries results in front of a directory of JSON files capped
+    at max_disk_bytes. Entries in both tiers expire after ttl seconds.
+    """
+    def __init__(self, max_entries=None, disk_dir=None, max_disk_bytes=None, ttl=None):
+        self.max_entries = max_entries or RESULT_CACHE_MEMORY_ENTRIES
+        self.disk_dir = disk_dir if disk_dir is not None else RESULT_CACHE_DIR
+        self.max_disk_bytes = max_disk_bytes or RESULT_CACHE_DISK_MAX_BYTES
+        self.ttl = ttl or RESULT_CACHE_TTL_SECONDS
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self.memory.move_to_end(key)
+                    self.counters['memory_hits'] += 1
+                    return value
+                del self.memory[key]
+        if self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                if os.path.getmtime(path) + self.ttl > now:
+                    with open(path, 'r') as f:
+                        value = json.load(f)
+                    self._remember(key, value, os.path.getmtime(path) + self.ttl)
+                    self._count('disk_hits')
+                    return value
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Error reading result cache entry {path}: {e}")
+        self._count('misses')
+        return None
+
+    def _remember(self, key, value, expires_at):
+        with self.lock:
+            self.memory[key] = (expires_at, value)
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def set(self, key, value):
+        """Store a JSON-serializable value in both tiers"""
+        self._remember(key, value, time.time() + self.ttl)
+        self._count('stores')
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
         try:
-            with open(log_file, 'r') as f:
-                logs = json.load(f)
+            with open(tmp_path, 'w') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+            self._evict_disk()
         except Exception as e:
-            logger.error(f"Error reading log file: {e}")
-            logs = []
-    
-    # Add new log
-    logs.append(log_entry)
-    
-    # Keep only last 1000 entries
-    if len(logs) > 1000:
-        logs = logs[-1000:]
-    
-    # Save logs
+            logger.error(f"Error writing result cache entry {path}: {e}")
+
+    def _evict_disk(self):
+        # Drop expired files, then the oldest ones until the directory fits the size cap
+        cutoff = time.time() - self.ttl
+        entries = []
+        total_bytes = 0
+        for entry in os.scandir(self.disk_dir):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime < cutoff:
+                self._remove(entry.path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_bytes += stat.st_size
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_disk_bytes:
+                break
+            self._remove(path)
+            total_bytes -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            self._count('evictions')
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        """Hit/miss counters and current size, as reported by /health"""
+        with self.lock:
+            stats = dict(self.counters)
+            stats['memory_entries'] = len(self.memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+result_cache = ResultCache()
+
+# Near-duplicate index
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+def image_fingerprint(image):
+    """
+    64-bit perceptual hashes (pHash, dHash) of a BGR or grayscale image. Both
+    survive re-encoding, resizing and mild recolouring, unlike a content digest.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    # pHash: sign of the lowest 8x8 DCT frequencies against their median (DC term excluded)
+    low = cv2.dct(cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32))[:8, :8].reshape(-1)
+    phash = int.from_bytes(np.packbits(low > np.median(low[1:])).tobytes(), 'big')
+    # dHash: horizontal brightness gradients of a 9x8 thumbnail
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    dhash = int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), 'big')
+    return phash, dhash
+
+def video_fingerprint(video_path, probes=None):
+    """
+    Perceptual hashes of frames at NEAR_DUPLICATE_VIDEO_PROBES fixed fractions
+    of a video's length, so a re-encoded, resized or re-timed copy probes the
+    same moments. Returns None if the video can't be probed.
+    """
+    probes = probes or NEAR_DUPLICATE_VIDEO_PROBES
+    vid_obj = cv2.VideoCapture(video_path)
+    try:
+        frame_count = int(vid_obj.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        if not vid_obj.isOpened() or frame_count <= 0:
+            return None
+        fingerprint = []
+        for probe in range(probes):
+            vid_obj.set(cv2.CAP_PROP_POS_FRAMES, int(frame_count * (probe + 0.5) / probes))
+            success, frame = vid_obj.read()
+            if not success:
+                return None
+            fingerprint.append(image_fingerprint(frame))
+        return fingerprint
+    finally:
+        vid_obj.release()
+
+
+class MultiIndexHash:
+    """
+    Multi-index hashing of 64-bit hashes for hamming-radius queries. Each hash
+    is split into radius + 1 chunks with an exact-match table per chunk: by
+    the pigeonhole principle a hash within radius bits of the query agrees
+    with it on at least one whole chunk, so only those candidates are compared.
+    """
+    def __init__(self, radius):
+        self.radius = radius
+        bounds = np.linspace(0, 64, min(radius + 1, 64) + 1).astype(int)
+        self.chunks = [(int(start), (1 << int(end - start)) - 1) for start, end in zip(bounds[:-1], bounds[1:])]
+        self.tables = [{} for _ in self.chunks]
+
+    def add(self, value, payload):
+        for table, (shift, mask) in zip(self.tables, self.chunks):
+            table.setdefault((value >> shift) & mask, []).append((value, payload))
+
+    def search(self, value):
+        """(payload, distance) for every stored hash within radius of value"""
+        seen = set()
+        matches = []
+        for table, (shift, mask) in zip(self.tables, self.chunks):
+            for stored, payload in table.get((value >> shift) & mask, ()):
+                if payload in seen:
+                    continue
+                seen.add(payload)
+                distance = hamming_distance(value, stored)
+                if distance <= self.radius:
+                    matches.append((payload, distance))
+        return matches
+
+
+class NearDuplicateIndex:
+    """
+    Perceptual-hash index of earlier analyses. A fingerprint is a list of
+    (pHash, dHash) pairs: one for an image, one per probe frame for a video.
+    Each entry points at the result cache key of its analysis and is indexed
+    by the pHash of every probe in a per-kind MultiIndexHash. A query matches an
+    entry when every probe is within max_distance bits on both hashes. The
+    entries are appended to a JSON-lines file shared by all gunicorn workers:
+    each worker reads the lines the others appended before every lookup, and
+    the oldest are dropped past max_entries under a file lock.
+    """
+    def __init__(self, path=None, max_entries=None, max_distance=None):
+        self.path = path if path is not None else NEAR_DUPLICATE_INDEX_PATH
+        self.max_entries = max_entries or NEAR_DUPLICATE_MAX_ENTRIES
+        self.max_distance = NEAR_DUPLICATE_MAX_DISTANCE if max_distance is None else max_distance
+        self.lock = threading.Lock()
+        self.counters = {'lookups': 0, 'matches': 0, 'adds': 0}
+        self._reset()
+        with self.lock:
+            self._refresh()
+
+    def _reset(self):
+        self.entries = OrderedDict()
+        self.tables = {}
+        self.next_id = 0
+        # Identity of the index file read so far, and how far into it
+        self.file_id = None
+        self.offset = 0
+
+    @contextmanager
+    def _file_lock(self):
+        # Serializes appends and rewrites across workers; a separate file, since trimming replaces the index file
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Read the lines appended since the last look, or the whole file again after another worker rewrote it"""
+        if not self.path:
+            return
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            stat = os.fstat(f.fileno())
+            if (stat.st_dev, stat.st_ino) != self.file_id or stat.st_size < self.offset:
+                self._reset()
+                self.file_id = (stat.st_dev, stat.st_ino)
+            if stat.st_size == self.offset:
+                return
+            f.seek(self.offset)
+            data = f.read()
+        # A line still being written is read on the next look
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash
+            entry['fingerprint'] = [tuple(pair) for pair in entry['fingerprint']]
+            self._insert(entry)
+        self.offset += end
+
+    def _insert(self, entry):
+        entry_id = self.next_id
+        self.next_id += 1
+        self.entries[entry_id] = entry
+        table = self.tables.setdefault(entry['kind'], MultiIndexHash(self.max_distance))
+        for position, (phash, _) in enumerate(entry['fingerprint']):
+            table.add(phash, (entry_id, position))
+
+    def _trim(self):
+        # Drop the oldest tenth and rebuild the tables, rather than deleting from them one by one. With a file,
+        # this runs under the file lock and starts from what is on disk, so other workers' entries are kept
+        if self.path:
+            self._reset()
+            self._refresh()
+        keep = list(self.entries.values())[-(self.max_entries * 9 // 10):]
+        self._reset()
+        for entry in keep:
+            self._insert(entry)
+        if self.path:
+            tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.writelines(json.dumps(entry) + '\n' for entry in keep)
+            os.replace(tmp_path, self.path)
+            stat = os.stat(self.path)
+            self.file_id, self.offset = (stat.st_dev, stat.st_ino), stat.st_size
+
+    def add(self, kind, fingerprint, cache_key, model):
+        entry = {'kind': kind, 'fingerprint': [tuple(pair) for pair in fingerprint], 'key': cache_key,
+                 'model': model}
+        with self.lock:
+            self.counters['adds'] += 1
+            if not self.path:
+                self._insert(entry)
+                if len(self.entries) > self.max_entries:
+                    self._trim()
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with self._file_lock():
+                    with open(self.path, 'a') as f:
+                        f.write(json.dumps(entry) + '\n')
+                    # Picks up the new entry along with whatever other workers appended
+                    self._refresh()
+                    if len(self.entries) > self.max_entries:
+                        self._trim()
+            except Exception as e:
+                logger.error(f"Error writing near-duplicate index {self.path}: {e}")
+
+    def lookup(self, kind, fingerprint, model):
+        """Best match for fingerprint as (cache_key, similarity in [0, 1]), or None"""
+        with self.lock:
+            self.counters['lookups'] += 1
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.error(f"Error reading near-duplicate index {self.path}: {e}")
+            table = self.tables.get(kind)
+            if table is None:
+                return None
+            candidates = None
+            for position, (phash, _) in enumerate(fingerprint):
+                found = {entry_id for (entry_id, entry_position), _ in table.search(phash)
+                         if entry_position == position}
+                candidates = found if candidates is None else candidates & found
+                if not candidates:
+                    return None
+            best = None
+            for entry_id in candidates:
+                entry = self.entries[entry_id]
+                if entry['model'] != model or len(entry['fingerprint']) != len(fingerprint):
+                    continue
+                distances = [(hamming_distance(p, q), hamming_distance(d, e))
+                             for (p, d), (q, e) in zip(fingerprint, entry['fingerprint'])]
+                if any(dhash_distance > self.max_distance for _, dhash_distance in distances):
+                    continue
+                similarity = 1.0 - sum(p + d for p, d in distances) / (128.0 * len(distances))
+                if best is None or similarity > best[1]:
+                    best = (entry['key'], similarity)
+            if best is not None:
+                self.counters['matches'] += 1
+            return best
+
+    def stats(self):
+        """Entry and lookup counters, as reported by /health"""
+        with self.lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self.entries)
+        return stats
+
+
+near_duplicate_index = NearDuplicateIndex()
+
+def near_duplicate_result(kind, fingerprint):
+    """
+    The cached result of an earlier, perceptually near-identical upload, as
+    (result, similarity), or (None, None) when there is none.
+    """
+    if not NEAR_DUPLICATE_DETECTION or not fingerprint:
+        return None, None
+    with metrics.time('near_duplicate_lookup'):
+        match = near_duplicate_index.lookup(kind, fingerprint, analysis_version(kind))
+    if match is None:
+        return None, None
+    cache_key, similarity = match
+    cached = result_cache.get(cache_key)
+    if cached is None:
+        return None, None
+    logger.info(f"Near-duplicate {kind} upload (similarity {similarity:.3f}), reusing the earlier result")
+    return cached, round(similarity, 4)
+
+def remember_fingerprint(kind, fingerprint, cache_key):
+    """Index a freshly analyzed upload so later near-duplicates reuse its result"""
+    if NEAR_DUPLICATE_DETECTION and fingerprint:
+        near_duplicate_index.add(kind, fingerprint, cache_key, analysis_version(kind))
+
+# Upload storage
+
+class UploadStore:
+    """
+    Keeps uploaded media on disk according to UPLOAD_RETENTION: 'keep' stores
+    every upload, 'ttl' deletes stored uploads after ttl seconds, and 'none'
+    never stores images and removes videos once they have been analyzed.
+    Images are decoded from memory, so they are written by background threads
+    after the response is on its way, byte for byte as uploaded. Videos are
+    saved up front because OpenCV decodes them from a file.
+    """
+    def __init__(self, retention=None, ttl=None):
+        self.retention = retention or UPLOAD_RETENTION
+        self.ttl = ttl or UPLOAD_RETENTION_SECONDS
+        self.executor = ThreadPoolExecutor(max_workers=UPLOAD_WRITER_THREADS, thread_name_prefix='upload-writer')
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.last_sweep = 0.0
+
+    @property
+    def keeps_uploads(self):
+        return self.retention != 'none'
+
+    def save_async(self, folder, filename, data):
+        """Queue the uploaded bytes for writing; returns the file path, or None when uploads are not kept"""
+        if not self.keeps_uploads:
+            return None
+        path = os.path.join(folder, filename)
+        with self.lock:
+            self.pending[path] = self.executor.submit(self._write, path, data)
+        return path
+
+    def _write(self, path, data):
+        try:
+            with metrics.time('upload_save'):
+                tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error saving upload {path}: {e}")
+        finally:
+            with self.lock:
+                self.pending.pop(path, None)
+        self.sweep()
+
+    def wait(self, path, timeout=5):
+        """Block until a queued write of path has finished, so it can be served right after the response"""
+        with self.lock:
+            future = self.pending.get(path)
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+
+    def analyzed(self, path):
+        """Called once a stored video has been analyzed; removes it when uploads are not kept"""
+        if not self.keeps_uploads and path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def sweep(self, force=False):
+        """Under the 'ttl' policy, delete stored uploads older than ttl (at most every UPLOAD_SWEEP_INTERVAL_SECONDS)"""
+        now = time.time()
+        with self.lock:
+            if self.retention != 'ttl' or (not force and now - self.last_sweep < UPLOAD_SWEEP_INTERVAL_SECONDS):
+                return
+            self.last_sweep = now
+            pending = set(self.pending)
+        cutoff = now - self.ttl
+        for folder in (app.config['IMAGE_UPLOAD_FOLDER'], app.config['VIDEO_UPLOAD_FOLDER']):
+            for entry in os.scandir(folder):
+                try:
+                    if entry.is_file() and entry.path not in pending and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+
+
+upload_store = UploadStore()
+
+# Background jobs
+
+class JobBackend(abc.ABC):
+    """
+    Interface for running analysis jobs outside the request handler.
+    A backend stores job state and executes submitted work; the SQLite
+    backend below shares the state between gunicorn workers on one host and
+    runs the work in the worker that submitted it, other backends (e.g. a
+    Redis queue shared by several hosts) can implement the same methods.
+    """
+    @abc.abstractmethod
+    def create(self, kind, **fields):
+        """Register a new queued job and return its id"""
+
+    @abc.abstractmethod
+    def submit(self, job_id, fn, *args, **kwargs):
+        """Schedule fn(*args, **kwargs) to run for an existing job"""
+
+    @abc.abstractmethod
+    def get(self, job_id):
+        """Return a snapshot of a job's state, or None if it is unknown"""
+
+    @abc.abstractmethod
+    def update(self, job_id, **fields):
+        """Update fields of a job's state"""
+
+    @abc.abstractmethod
+    def append_frames(self, job_id, frames):
+        """Append partial per-frame results to a job"""
+
+    @abc.abstractmethod
+    def stale(self, job):
+        """Whether an unfinished job's snapshot shows that the worker running it has gone away"""
+
+    @abc.abstractmethod
+    def claim(self, job_id):
+        """Take over a stale job for this worker; False if it isn't stale or another worker got it first"""
+
+
+class SQLiteJobBackend(JobBackend):
+    """
+    Job backend keeping job state in a SQLite database (WAL mode) that every
+    gunicorn worker reads, and running the work on a thread pool in the
+    worker that submitted it. That worker refreshes the heartbeat of the
+    unfinished jobs it owns, so a job whose worker exited shows up as stale.
+    """
+    def __init__(self, db_path=None, max_workers=None, ttl=None):
+        self.db_path = db_path or JOB_DB
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or JOB_WORKERS, thread_name_prefix='job-worker')
+        self.ttl = ttl or JOB_TTL_SECONDS
+        self.heartbeat = None
+        self.heartbeat_lock = threading.Lock()
+        self.owner_pid = None
+        self.owner_id = None
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    owner TEXT,
+                    heartbeat_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    data TEXT NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS job_frames (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    frames TEXT NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_job_frames_job_id ON job_frames (job_id, id)')
+
+    @contextmanager
+    def _connect(self, immediate=False):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                if immediate:
+                    # Take the write lock up front, so read-modify-write updates from several workers serialize
+                    conn.execute('BEGIN IMMEDIATE')
+                yield conn
+        finally:
+            conn.close()
+
+    def _owner(self):
+        # Identifies this process; recomputed after a gunicorn fork
+        if self.owner_pid != os.getpid():
+            self.owner_pid = os.getpid()
+            self.owner_id = f"{self.owner_pid}-{uuid.uuid4().hex[:8]}"
+        return self.owner_id
+
+    def _ensure_heartbeat(self):
+        # Start lazily so the thread is created in the process that runs the jobs
+        with self.heartbeat_lock:
+            if self.heartbeat is None or not self.heartbeat.is_alive() or self.owner_pid != os.getpid():
+                self._owner()
+                self.heartbeat = threading.Thread(target=self._beat, name='job-heartbeat', daemon=True)
+                self.heartbeat.start()
+
+    def _beat(self):
+        while True:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                with self._connect() as conn:
+                    conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status IN ('queued', 'running')",
+                                 (time.time(), self._owner()))
+            except Exception as e:
+                logger.error(f"Error refreshing job heartbeats: {e}")
+
+    def _prune(self, conn):
+        # Forget finished jobs once they are older than the TTL, and orphaned ones once they have been stale as long
+        cutoff = time.time() - self.ttl
+        conn.execute("DELETE FROM jobs WHERE updated_at < ? AND (status IN ('done', 'error') OR heartbeat_at < ?)",
+                     (cutoff, cutoff))
+        conn.execute('DELETE FROM job_frames WHERE job_id NOT IN (SELECT id FROM jobs)')
+
+    def create(self, kind, **fields):
+        self._ensure_heartbeat()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        job = {
+            'id': job_id,
+            'kind': kind,
+            'status': 'queued',
+            'progress': 0.0,
+            'frames_processed': 0,
+            'frames_expected': 0,
+            'result': None,
+            'error': None,
+            'created_at': now,
+            'updated_at': now
+        }
+        job.update(fields)
+        frames = job.pop('frames', None)
+        with self._connect() as conn:
+            self._prune(conn)
+            conn.execute(
+                'INSERT INTO jobs (id, status, owner, heartbeat_at, updated_at, data) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, job['status'], self._owner(), now, now, json.dumps(job))
+            )
+            if frames:
+                conn.execute('INSERT INTO job_frames (job_id, frames) VALUES (?, ?)', (job_id, json.dumps(frames)))
+        return job_id
+
+    def submit(self, job_id, fn, *args, **kwargs):
+        self.executor.submit(fn, *args, **kwargs)
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute('SELECT data, owner, heartbeat_at FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return None
+            batches = conn.execute('SELECT frames FROM job_frames WHERE job_id = ? ORDER BY id', (job_id,)).fetchall()
+        job = json.loads(row[0])
+        job.update(owner=row[1], heartbeat_at=row[2],
+                   frames=[frame for (batch,) in batches for frame in json.loads(batch)])
+        return job
+
+    def update(self, job_id, **fields):
+        frames = fields.pop('frames', None)
+        with self._connect(immediate=True) as conn:
+            row = conn.execute('SELECT data FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return
+            job = json.loads(row[0])
+            job.update(fields)
+            job['updated_at'] = time.time()
+            conn.execute('UPDATE jobs SET status = ?, updated_at = ?, data = ? WHERE id = ?',
+                         (job['status'], job['updated_at'], json.dumps(job), job_id))
+            if frames is not None:
+                # Replaces the partial results rather than adding to them
+                conn.execute('DELETE FROM job_frames WHERE job_id = ?', (job_id,))
+                if frames:
+                    conn.execute('INSERT INTO job_frames (job_id, frames) VALUES (?, ?)', (job_id, json.dumps(frames)))
+
+    def append_frames(self, job_id, frames):
+        with self._connect() as conn:
+            conn.execute('INSERT INTO job_frames (job_id, frames) VALUES (?, ?)', (job_id, json.dumps(frames)))
+            conn.execute('UPDATE jobs SET updated_at = ? WHERE id = ?', (time.time(), job_id))
+
+    def stale(self, job):
+        return job['status'] in ('queued', 'running') and job['heartbeat_at'] < time.time() - JOB_STALE_SECONDS
+
+    def claim(self, job_id):
+        self._ensure_heartbeat()
+        now = time.time()
+        with self._connect() as conn:
+            claimed = conn.execute(
+                "UPDATE jobs SET owner = ?, heartbeat_at = ? "
+                "WHERE id = ? AND status IN ('queued', 'running') AND heartbeat_at < ?",
+                (self._owner(), now, job_id, now - JOB_STALE_SECONDS)
+            ).rowcount
+        return claimed == 1
+
+
+job_backend = SQLiteJobBackend()
+
+def cache_video_result(cache_key, frame_results, overall_result, overall_confidence, summary=None,
+                       fingerprint=None):
+    """Store a finished video analysis in the result cache (and its fingerprint in the near-duplicate index)"""
+    result_cache.set(cache_key, {
+        'result': overall_result,
+        'confidence': float(overall_confidence),
+        # Thumbnails are only kept for FRAME_STORE_TTL_SECONDS, so store where to find them rather than their URLs
+        'frames': [{'analysis_id': res['ref'].analysis_id if res.get('ref') else None,
+                    'index': int(res['ref'].index) if res.get('ref') else None,
+                    'result': res['result'], 'confidence': float(res['confidence'])}
+                   for res in frame_results],
+        'summary': summary or {}
+    })
+    remember_fingerprint('video', fingerprint, cache_key)
+
+def cached_frame_results(cached):
+    """Frame results of a cached video analysis, linking thumbnails only while they are still stored"""
+    results = []
+    for frame in cached['frames']:
+        frame_ref = FrameRef(frame['analysis_id'], frame['index']) if frame.get('analysis_id') else None
+        results.append({'path': frame_url(frame_ref) if frame_ref and frame_store.has(frame_ref) else '',
+                        'result': frame['result'], 'confidence': frame['confidence']})
+    return results
+
+def lookup_video_result(filepath, digest=None):
+    """
+    Look up a finished analysis of a saved video: by content digest, then
+    (with NEAR_DUPLICATE_DETECTION) by fingerprint. Returns (cache_key,
+    cached, fingerprint, similarity); cached is None on a miss.
+    """
+    cache_key = result_cache_key('video', digest or content_digest(path=filepath))
+    cached = result_cache.get(cache_key)
+    fingerprint = similarity = None
+    if cached is None and NEAR_DUPLICATE_DETECTION:
+        # Probing a handful of frames is far cheaper than analyzing a re-encoded copy again
+        fingerprint = video_fingerprint(filepath)
+        cached, similarity = near_duplicate_result('video', fingerprint)
+    return cache_key, cached, fingerprint, similarity
+
+def run_video_job(job_id, filepath, unique_filename, base_url, cache_key=None, fingerprint=None):
+    """Analyze a saved video upload for a background job, reporting progress as batches complete"""
+    # url_for needs a request context to build frame URLs outside the original request
+    with app.test_request_context(base_url=base_url):
+        try:
+            frames_expected = estimate_sampled_frame_count(filepath)
+            job_backend.update(job_id, status='running', frames_expected=frames_expected)
+
+            def on_batch(batch_results, frames_seen):
+                expected = max(frames_expected, frames_seen)
+                job_backend.append_frames(job_id, format_frame_results(batch_results))
+                job_backend.update(job_id, frames_processed=frames_seen,
+                                   progress=round(100.0 * frames_seen / expected, 1))
+
+            summary = {}
+            frame_results, overall_result, overall_confidence = analyze_video(filepath, on_batch=on_batch,
+                                                                              summary=summary, analysis_id=job_id)
+            if overall_result == "Error":
+                job_backend.update(job_id, status='error', error='Failed to extract frames from video')
+                return
+            if cache_key:
+                cache_video_result(cache_key, frame_results, overall_result, overall_confidence, summary,
+                                   fingerprint)
+            log_prediction(filepath if upload_store.keeps_uploads else None, overall_result, overall_confidence,
+                           "video")
+            job_backend.update(job_id, status='done', progress=100.0,
+                               result=video_response(frame_results, overall_result, overall_confidence,
+                                                     unique_filename, summary))
+        except Exception as e:
+            logger.error(f"Error processing video job {job_id}: {e}")
+            job_backend.update(job_id, status='error', error=f'Processing error: {str(e)}')
+        finally:
+            upload_store.analyzed(filepath)
+
+def sse_event(event, data):
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class VideoAnalysisCancelled(Exception):
+    """Raised from a batch callback to stop an analysis nobody is listening to any more"""
+
+def video_analysis_events(filepath, unique_filename, base_url, cache_key=None, fingerprint=None):
+    """
+    Stream the analysis of a saved video upload as server-sent events: a
+    'frames' event after every scored batch with its frame results, the
+    running verdict over all frames so far and the progress percentage, then
+    a 'result' event with the same payload /upload-video returns, or an
+    'error' event. The analysis runs in a thread and is stopped at the next
+    batch if the client disconnects.
+    """
+    events = queue.Queue()
+    cancelled = threading.Event()
+    done = object()
+
+    def analyze():
+        # url_for needs a request context to build frame URLs in this thread
+        with app.test_request_context(base_url=base_url):
+            try:
+                frames_expected = estimate_sampled_frame_count(filepath)
+                total_fake_score = 0.0
+
+                def on_batch(batch_results, frames_seen):
+                    nonlocal total_fake_score
+                    if cancelled.is_set():
+                        raise VideoAnalysisCancelled()
+                    total_fake_score += sum(res['fake_score'] for res in batch_results)
+                    running_result, running_confidence = summarize_video_scores(total_fake_score, frames_seen)
+                    events.put(('frames', {
+                        'frames': format_frame_results(batch_results),
+                        'frames_processed': frames_seen,
+                        'frames_expected': frames_expected,
+                        'progress': round(min(99.0, 100.0 * frames_seen / max(frames_expected, frames_seen)), 1),
+                        'result': running_result,
+                        'confidence': f"{running_confidence:.1f}%"
+                    }))
+
+                summary = {}
+                frame_results, overall_result, overall_confidence = analyze_video(filepath, on_batch=on_batch,
+                                                                                  summary=summary)
+                if overall_result == "Error":
+                    events.put(('error', {'error': 'Failed to extract frames from video'}))
+                    return
+                if cache_key:
+                    cache_video_result(cache_key, frame_results, overall_result, overall_confidence, summary,
+                                       fingerprint)
+                log_prediction(filepath if upload_store.keeps_uploads else None, overall_result, overall_confidence,
+                               "video")
+                events.put(('result', video_response(frame_results, overall_result, overall_confidence,
+                                                     unique_filename, summary)))
+            except VideoAnalysisCancelled:
+                logger.info(f"Client went away, stopped analyzing {filepath}")
+            except Exception as e:
+                logger.error(f"Error processing video upload: {e}")
+                events.put(('error', {'error': f'Processing error: {str(e)}'}))
+            finally:
+                upload_store.analyzed(filepath)
+                events.put(done)
+
+    threading.Thread(target=analyze, name='video-events', daemon=True).start()
+    try:
+        while True:
+            try:
+                item = events.get(timeout=15)
+            except queue.Empty:
+                # Comment line: keeps proxies from timing out the connection between batches
+                yield ": keep-alive\n\n"
+                continue
+            if item is done:
+                return
+            yield sse_event(*item)
+    finally:
+        cancelled.set()
+
+# Chunked video uploads
+
+def mp4_index_first(path, available):
+    """
+    Whether an MP4/MOV file, of which the first `available` bytes are on
+    disk, has its index (moov box) before the media data (mdat), which is
+    what decoding it from a prefix needs. None while the top-level boxes
+    read so far don't tell.
+    """
+    offset = 0
+    with open(path, 'rb') as f:
+        while offset + 8 <= available:
+            f.seek(offset)
+            header = f.read(16)
+            size, box_type = int.from_bytes(header[:4], 'big'), header[4:8]
+            if box_type == b'moov':
+                return True
+            if box_type == b'mdat':
+                return False
+            if size == 1:
+                # 64-bit box size
+                if offset + 16 > available:
+                    return None
+                size = int.from_bytes(header[8:16], 'big')
+            if size < 8:
+                # Box runs to the end of the file, or isn't an MP4 box at all
+                return False
+            offset += size
+    return None
+
+
+class PartialUpload:
+    """
+    A chunked video upload, kept on disk so that any worker process can take
+    its chunks: they are appended in order to <id>.part in
+    VIDEO_UPLOAD_PARTIAL_FOLDER, whose size is the committed offset, and
+    <id>.json next to it holds the rest of the state. Once all size bytes
+    are in, the file moves to the video upload folder.
+    """
+    # Stands in for the file lock where fcntl is missing (one worker process)
+    _thread_lock = threading.Lock()
+
+    def __init__(self, upload_id, file_ext, size, job_id=None, status='uploading'):
+        self.id = upload_id
+        self.file_ext = file_ext
+        self.unique_filename = f"{upload_id}.{file_ext}"
+        self.size = size
+        self.job_id = job_id
+        self.status = status
+        self.partial_path = os.path.join(VIDEO_UPLOAD_PARTIAL_FOLDER, f"{upload_id}.part")
+        self.metadata_path = os.path.join(VIDEO_UPLOAD_PARTIAL_FOLDER, f"{upload_id}.json")
+        self.filepath = os.path.join(app.config['VIDEO_UPLOAD_FOLDER'], self.unique_filename)
+        # Bytes copied into a streamed analysis, in the process running it
+        self.fed = 0
+
+    @classmethod
+    def load(cls, upload_id):
+        """The upload with this id as last saved by any worker, or None"""
+        if not upload_id or secure_filename(upload_id) != upload_id:
+            return None
+        try:
+            with open(os.path.join(VIDEO_UPLOAD_PARTIAL_FOLDER, f"{upload_id}.json")) as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls(upload_id, metadata['file_ext'], metadata['size'], metadata.get('job_id'), metadata['status'])
+
+    def save(self):
+        # Written aside and renamed, so other workers never read half a file
+        tmp_path = f"{self.metadata_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'file_ext': self.file_ext, 'size': self.size, 'job_id': self.job_id, 'status': self.status}, f)
+        os.replace(tmp_path, self.metadata_path)
+
+    def refresh(self):
+        """Re-read the status, which any worker may have changed; 'abandoned' once the upload is gone"""
+        current = PartialUpload.load(self.id)
+        if current is not None:
+            self.status = current.status
+        elif os.path.exists(self.filepath):
+            # Finished long enough ago that the sweep has forgotten it
+            self.status = 'complete'
+        else:
+            self.status = 'abandoned'
+        return self.status
+
+    @property
+    def received(self):
+        if self.status == 'complete':
+            return self.size
+        try:
+            return os.path.getsize(self.partial_path)
+        except FileNotFoundError:
+            return self.size if self.refresh() == 'complete' else 0
+
+    def state(self):
+        return {'upload_id': self.id, 'offset': self.received, 'size': self.size, 'status': self.status,
+                'job_id': self.job_id}
+
+    @contextmanager
+    def _locked(self, f):
+        """Hold the lock on the open partial file f, across worker processes where fcntl is available"""
+        if fcntl is None:
+            with PartialUpload._thread_lock:
+                yield
+            return
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+    def append(self, offset, data):
+        """Append a chunk written at offset; False if the upload isn't at that offset (the client resumes from state())"""
+        try:
+            f = open(self.partial_path, 'r+b')
+        except FileNotFoundError:
+            # Completed or abandoned meanwhile
+            self.refresh()
+            return False
+        with f, self._locked(f):
+            # Another worker may have finished the upload while this one waited for the lock
+            if self.refresh() != 'uploading' or f.seek(0, os.SEEK_END) != offset:
+                return False
+            f.write(data)
+            f.flush()
+            if offset + len(data) >= self.size:
+                os.replace(self.partial_path, self.filepath)
+                self.status = 'complete'
+                self.save()
+                logger.info(f"Chunked upload {self.id} complete, saved to {self.filepath}")
+        return True
+
+    def abandon(self):
+        """Delete what has arrived; the worker analyzing the upload notices on its next look"""
+        for path in (self.partial_path, self.metadata_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.refresh()
+
+    def streamable(self):
+        """
+        Whether the upload can be decoded from what has arrived so far while
+        the rest comes in: False if the container needs its end first, None
+        while that can't be told yet
+        """
+        received = self.received
+        if self.file_ext in ('mp4', 'mov'):
+            try:
+                # Nothing decodes before an index at the end has arrived
+                return mp4_index_first(self.partial_path, received)
+            except FileNotFoundError:
+                return None
+        return True if received >= VIDEO_UPLOAD_STREAM_MIN_BYTES else None
+
+    def wait_until_finished(self):
+        """Block until the upload is complete or abandoned (the sweep abandons it when idle); returns which"""
+        while self.refresh() == 'uploading':
+            time.sleep(VIDEO_UPLOAD_POLL_SECONDS)
+        return self.status
+
+    def release(self):
+        """Called when the analysis is done with the upload, so UPLOAD_RETENTION applies to it once complete"""
+        if upload_store.keeps_uploads:
+            return
+        if self.refresh() != 'uploading':
+            upload_store.analyzed(self.filepath)
+            return
+
+        def remove_when_finished():
+            # A streamed analysis stopped early, before the rest of the video arrived
+            self.wait_until_finished()
+            upload_store.analyzed(self.filepath)
+
+        threading.Thread(target=remove_when_finished, name='upload-release', daemon=True).start()
+
+    def feed(self, fifo_path, stop):
+        """Copy the upload into the FIFO at fifo_path as its bytes arrive; closing it at the end gives the reader EOF"""
+        fd = None
+        while fd is None:
+            try:
+                # Opening a FIFO for writing fails until a reader has it open
+                fd = os.open(fifo_path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError:
+                if stop.wait(0.05):
+                    return
+        os.set_blocking(fd, True)
+        source = None
+        # The partial file is renamed once complete; an open handle keeps following it
+        for path in (self.partial_path, self.filepath):
+            try:
+                source = open(path, 'rb')
+                break
+            except FileNotFoundError:
+                continue
+        if source is None:
+            # Abandoned and deleted already
+            os.close(fd)
+            return
+        try:
+            with source, os.fdopen(fd, 'wb') as sink:
+                while not stop.is_set() and self.fed < self.size:
+                    available = os.fstat(source.fileno()).st_size - self.fed
+                    if available <= 0:
+                        # Chunks may land in any worker, so look at the file rather than wait to be told
+                        if self.refresh() == 'abandoned':
+                            return
+                        stop.wait(VIDEO_UPLOAD_POLL_SECONDS)
+                        continue
+                    data = source.read(min(available, 1 << 20))
+                    if not data:
+                        return
+                    sink.write(data)
+                    self.fed += len(data)
+        except BrokenPipeError:
+            # The decoder stopped reading (e.g. the verdict settled early)
+            pass
+
+
+class PartialUploadStore:
+    """Creates chunked uploads, and sweeps idle ones from VIDEO_UPLOAD_PARTIAL_FOLDER from whichever worker runs it"""
+    def __init__(self, idle_seconds=None):
+        self.idle_seconds = idle_seconds or VIDEO_UPLOAD_IDLE_SECONDS
+        self.lock = threading.Lock()
+        self.last_sweep = 0.0
+
+    def create(self, filename, size):
+        upload = PartialUpload(uuid.uuid4().hex, filename.rsplit('.', 1)[1].lower(), size)
+        open(upload.partial_path, 'wb').close()
+        upload.save()
+        return upload
+
+    def get(self, upload_id):
+        return PartialUpload.load(upload_id)
+
+    def sweep(self, force=False):
+        """
+        Abandon uploads that have had no chunk for idle_seconds, forget finished
+        ones after as long, and delete leftover temp files (at most every
+        UPLOAD_SWEEP_INTERVAL_SECONDS)
+        """
+        now = time.time()
+        cutoff = now - self.idle_seconds
+        with self.lock:
+            if not force and now - self.last_sweep < UPLOAD_SWEEP_INTERVAL_SECONDS:
+                return
+            self.last_sweep = now
+        for entry in os.scandir(VIDEO_UPLOAD_PARTIAL_FOLDER):
+            try:
+                if entry.name.endswith('.json'):
+                    # Picks up uploads whose worker exited without a client polling them
+                    upload = PartialUpload.load(entry.name[:-len('.json')])
+                    job = job_backend.get(upload.job_id) if upload is not None and upload.job_id else None
+                    if job is not None:
+                        recover_job(job)
+                if entry.stat().st_mtime >= cutoff:
+                    continue
+                if entry.name.endswith('.part'):
+                    upload_id = entry.name[:-len('.part')]
+                    logger.info(f"Abandoning chunked upload {upload_id} after {self.idle_seconds}s without a chunk")
+                    os.remove(entry.path)
+                    os.remove(os.path.join(VIDEO_UPLOAD_PARTIAL_FOLDER, f"{upload_id}.json"))
+                elif entry.name.endswith('.json'):
+                    # Only an upload still in progress has a partial file, and its own age decides
+                    upload_id = entry.name[:-len('.json')]
+                    if not os.path.exists(os.path.join(VIDEO_UPLOAD_PARTIAL_FOLDER, f"{upload_id}.part")):
+                        os.remove(entry.path)
+                elif entry.name.endswith('.tmp'):
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+
+
+partial_uploads = PartialUploadStore()
+
+def analyze_partial_upload(upload, on_batch=None, summary=None, analysis_id=None):
+    """
+    Analyze an upload while it is still arriving: a feeder thread copies its
+    bytes into a FIFO as they come in, and the video pipeline decodes from
+    the FIFO, blocking whenever it catches up with the upload.
+    """
+    fifo_dir = tempfile.mkdtemp(prefix='truthshield-upload-')
+    # The extension tells the decoder which container to expect
+    fifo_path = os.path.join(fifo_dir, f"video.{upload.file_ext}")
+    os.mkfifo(fifo_path)
+    stop = threading.Event()
+    feeder = threading.Thread(target=upload.feed, args=(fifo_path, stop), name='upload-feeder', daemon=True)
+    feeder.start()
     try:
-        with open(log_file, 'w') as f:
-            json.dump(logs, f, indent=2)
-        logger.info(f"Logged prediction for {file_path}")
+        return analyze_video(fifo_path, on_batch=on_batch, summary=summary, analysis_id=analysis_id)
+    finally:
+        stop.set()
+        feeder.join(timeout=5)
+        os.remove(fifo_path)
+        os.rmdir(fifo_dir)
+
+def watch_upload(upload, base_url, can_stream=True):
+    """
+    Start the analysis of a chunked upload, in the worker that owns its job,
+    whichever workers receive the chunks: streamed as soon as enough of a
+    streamable container has arrived, otherwise once the upload is complete.
+    """
+    can_stream = can_stream and hasattr(os, 'mkfifo') and VIDEO_SAMPLING_POLICY in STREAMING_SAMPLING_POLICIES
+    try:
+        while True:
+            status = upload.refresh()
+            if status == 'abandoned':
+                job_backend.update(upload.job_id, status='error', error='Upload abandoned before it was complete')
+                return
+            if status == 'complete':
+                start_upload_analysis(upload, base_url)
+                return
+            if can_stream:
+                streamable = upload.streamable()
+                if streamable:
+                    job_backend.submit(upload.job_id, run_streaming_video_job, upload.job_id, upload, base_url)
+                    return
+                if streamable is False:
+                    can_stream = False
+            time.sleep(VIDEO_UPLOAD_POLL_SECONDS)
     except Exception as e:
-        logger.error(f"Error writing to log file: {e}")
+        logger.error(f"Error starting the analysis of chunked upload {upload.id}: {e}")
+        job_backend.update(upload.job_id, status='error', error=f'Processing error: {str(e)}')
+
+def start_watching_upload(upload, base_url, can_stream=True):
+    threading.Thread(target=watch_upload, args=(upload, base_url, can_stream), name='upload-watch',
+                     daemon=True).start()
+
+def start_upload_analysis(upload, base_url):
+    """Answer a complete chunked upload's job from the result cache, or queue its analysis on a job worker"""
+    cache_key, cached, fingerprint, similarity = lookup_video_result(upload.filepath)
+    if cached is None:
+        job_backend.submit(upload.job_id, run_video_job, upload.job_id, upload.filepath, upload.unique_filename,
+                           base_url, cache_key, fingerprint)
+        return
+    log_prediction(upload.filepath if upload_store.keeps_uploads else None, cached['result'], cached['confidence'],
+                   "video")
+    with app.test_request_context(base_url=base_url):
+        response = video_response(cached_frame_results(cached), cached['result'], cached['confidence'],
+                                  upload.unique_filename, cached.get('summary'))
+    response.update(cached=True, similarity=similarity)
+    job_backend.update(upload.job_id, status='done', progress=100.0, frames=response['frames'], result=response)
+    upload.release()
 
-# Grad-CAM utility function
+def run_streaming_video_job(job_id, upload, base_url):
+    """Analyze a chunked upload for its job while the rest of it is still arriving"""
+    with app.test_request_context(base_url=base_url):
+        streamed = False
+        try:
+            job_backend.update(job_id, status='running')
+
+            def on_batch(batch_results, frames_seen):
+                # The frame count isn't known up front, so progress follows the bytes decoded so far
+                job_backend.append_frames(job_id, format_frame_results(batch_results))
+                job_backend.update(job_id, frames_processed=frames_seen,
+                                   progress=round(min(99.0, 100.0 * upload.fed / upload.size), 1))
+
+            summary = {}
+            frame_results, overall_result, overall_confidence = analyze_partial_upload(upload, on_batch, summary,
+                                                                                       job_id)
+            status = upload.refresh()
+            if status == 'abandoned':
+                job_backend.update(job_id, status='error', error='Upload abandoned before it was complete')
+                return
+            if overall_result == "Error":
+                logger.warning(f"Could not decode chunked upload {upload.id} while it arrived, "
+                               f"analyzing it once complete")
+                job_backend.update(job_id, status='queued', progress=0.0, frames=[])
+                start_watching_upload(upload, base_url, can_stream=False)
+                return
+            streamed = True
+            if status == 'complete':
+                # Only a complete upload has a digest to cache the result under
+                fingerprint = video_fingerprint(upload.filepath) if NEAR_DUPLICATE_DETECTION else None
+                cache_video_result(result_cache_key('video', content_digest(path=upload.filepath)), frame_results,
+                                   overall_result, overall_confidence, summary, fingerprint)
+            log_prediction(upload.filepath if upload_store.keeps_uploads else None, overall_result,
+                           overall_confidence, "video")
+            job_backend.update(job_id, status='done', progress=100.0,
+                               result=video_response(frame_results, overall_result, overall_confidence,
+                                                     upload.unique_filename, summary))
+        except Exception as e:
+            logger.error(f"Error processing chunked upload {upload.id}: {e}")
+            job_backend.update(job_id, status='error', error=f'Processing error: {str(e)}')
+            streamed = True
+        finally:
+            if streamed:
+                upload.release()
+
+def recover_job(job):
+    """
+    Take over a background job whose worker exited, unless another worker
+    already has: a chunked upload starts over from its files, a saved video
+    from the video, and a job whose input is gone fails. True if the job
+    changed.
+    """
+    if not job_backend.stale(job) or not job_backend.claim(job['id']):
+        return False
+    job_id = job['id']
+    upload = PartialUpload.load(job['upload_id']) if job.get('upload_id') else None
+    if upload is not None:
+        resume = functools.partial(start_watching_upload, upload, job['base_url'])
+    elif job.get('filepath') and os.path.exists(job['filepath']):
+        resume = functools.partial(job_backend.submit, job_id, run_video_job, job_id, job['filepath'],
+                                   job['unique_filename'], job['base_url'], job.get('cache_key'),
+                                   job.get('fingerprint'))
+    else:
+        logger.warning(f"Job {job_id} was orphaned by worker {job['owner']} and its input is gone")
+        job_backend.update(job_id, status='error', error='The worker running this job exited')
+        return True
+    logger.warning(f"Resuming job {job_id}, orphaned by worker {job['owner']}")
+    job_backend.update(job_id, status='queued', progress=0.0, frames_processed=0, frames=[])
+    resume()
+    return True
+
+# Batch detection
+
+def read_limited(stream, name):
+    """Read an archive member, refusing anything over BATCH_DETECT_MAX_ITEM_BYTES whatever its header claims"""
+    data = stream.read(BATCH_DETECT_MAX_ITEM_BYTES + 1)
+    if len(data) > BATCH_DETECT_MAX_ITEM_BYTES:
+        return name, None, 'File too large'
+    return name, data, None
+
+def iter_archive_images(file):
+    """Yield (name, data, error) for the image members of an uploaded zip or tar archive"""
+    if file.filename.lower().endswith('.zip'):
+        with zipfile.ZipFile(file.stream) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not allowed_image_file(info.filename):
+                    continue
+                with archive.open(info) as member:
+                    yield read_limited(member, info.filename)
+    else:
+        with tarfile.open(fileobj=file.stream, mode='r|*') as archive:
+            for member in archive:
+                if not member.isfile() or not allowed_image_file(member.name):
+                    continue
+                yield read_limited(archive.extractfile(member), member.name)
+
+def iter_batch_uploads(files):
+    """
+    Yield (name, data, error) for every image in a /batch-detect request:
+    plain image uploads and the images inside zip/tar archives, up to
+    BATCH_DETECT_MAX_ITEMS. Unusable entries carry an error instead of data,
+    and count towards the limit like any other.
+    """
+    count = 0
+    for file in files:
+        if file.filename.lower().endswith(BATCH_ARCHIVE_SUFFIXES):
+            try:
+                items = iter_archive_images(file)
+                for item in items:
+                    if count >= BATCH_DETECT_MAX_ITEMS:
+                        break
+                    count += 1
+                    yield item
+            except (zipfile.BadZipFile, tarfile.TarError, OSError) as e:
+                if count < BATCH_DETECT_MAX_ITEMS:
+                    count += 1
+                    yield file.filename, None, f'Invalid archive: {str(e)}'
+        elif allowed_image_file(file.filename):
+            count += 1
+            yield read_limited(file.stream, file.filename)
+        else:
+            count += 1
+            yield file.filename, None, 'Invalid file format'
+        if count >= BATCH_DETECT_MAX_ITEMS:
+            logger.warning(f"Batch request truncated at {BATCH_DETECT_MAX_ITEMS} items")
+            return
+
+def prepare_batch_item(name, data, error):
+    """
+    Decode worker for /batch-detect: decode the image for inference unless
+    the result cache (or, with NEAR_DUPLICATE_DETECTION, a near-duplicate)
+    already has it. The bytes are kept for storing once the image is scored.
+    """
+    item = {'name': name}
+    if error:
+        item['error'] = error
+        return item
+    try:
+        item['cache_key'] = result_cache_key('image', content_digest(data))
+        item['cached'] = result_cache.get(item['cache_key'])
+        item['data'] = data
+        item['similarity'] = None
+        if item['cached'] is None:
+            with metrics.time('decode'):
+                item['image'] = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if item['image'] is None:
+                item['error'] = 'Failed to read image'
+            elif NEAR_DUPLICATE_DETECTION:
+                item['fingerprint'] = [image_fingerprint(item['image'])]
+                item['cached'], item['similarity'] = near_duplicate_result('image', item['fingerprint'])
+    except Exception as e:
+        logger.error(f"Error preparing batch item {name}: {e}")
+        item['error'] = f'Processing error: {str(e)}'
+    return item
+
+def score_batch_items(futures):
+    """Wait for decoded items, score the uncached ones in one model batch and yield an NDJSON line per item"""
+    items = [future.result() for future in futures]
+    to_predict = [item for item in items if item.get('image') is not None and item.get('cached') is None
+                  and 'error' not in item]
+    predictions = predict_images([item['image'] for item in to_predict]) if to_predict else []
+    for item, (result, confidence, message) in zip(to_predict, predictions):
+        if result == "Error":
+            item['error'] = f'Analysis error: {message}'
+            continue
+        item['cached'] = None
+        item['result'] = {'result': result, 'confidence': float(confidence), 'message': message}
+        result_cache.set(item['cache_key'], item['result'])
+        remember_fingerprint('image', item.get('fingerprint'), item['cache_key'])
+    for item in items:
+        if 'error' in item:
+            yield json.dumps({'name': item['name'], 'error': item['error']}) + '\n'
+            continue
+        outcome = item['cached'] or item['result']
+        # Stored only once it decoded and scored, as upload_image does
+        item['filename'] = f"{uuid.uuid4().hex}.{item['name'].rsplit('.', 1)[1].lower()}"
+        item['filepath'] = upload_store.save_async(app.config['IMAGE_UPLOAD_FOLDER'], item['filename'],
+                                                   item.pop('data'))
+        log_prediction(item['filepath'], outcome['result'], outcome['confidence'], "image")
+        yield json.dumps({
+            'name': item['name'],
+            'result': outcome['result'],
+            'confidence': f"{outcome['confidence']:.1f}%",
+            'image_url': url_for('static', filename=f"uploads/images/{item['filename']}") if item['filepath'] else None,
+            'message': outcome['message'],
+            'type': 'image',
+            'cached': item['cached'] is not None,
+            'similarity': item['similarity']
+        }) + '\n'
+
+def batch_detect_results(files):
+    """
+    Stream /batch-detect results. Images are decoded by a pool of worker
+    threads one batch ahead of inference, so decoding the next
+    BATCH_DETECT_BATCH_SIZE images overlaps with scoring the current ones.
+    """
+    try:
+        with ThreadPoolExecutor(max_workers=BATCH_DETECT_DECODE_WORKERS, thread_name_prefix='batch-decode') as pool:
+            pending = []
+            for chunk in iter_batches(iter_batch_uploads(files), BATCH_DETECT_BATCH_SIZE):
+                futures = [pool.submit(prepare_batch_item, *item) for item in chunk]
+                yield from score_batch_items(pending)
+                pending = futures
+            yield from score_batch_items(pending)
+    finally:
+        for file in files:
+            file.close()
+
+# Grad-CAM explanations
+
+class GradCam:
+    """
+    Grad-CAM for one loaded Keras model. The gradient model (inputs -> last
+    conv feature map and predictions) is built once and the gradient
+    computation is a compiled tf.function over a whole batch, so explaining N
+    images is a single forward/backward pass instead of N fresh models.
+    """
+    def __init__(self, model, last_conv_layer_name=None):
+        self.model = model
+        if last_conv_layer_name is None:
+            last_conv_layer_name = self.find_last_conv_layer(model)
+        last_conv_layer = model.get_layer(last_conv_layer_name)
+        self.grad_model = tf.keras.models.Model(model.inputs, [last_conv_layer.output, model.output])
+        self.input_size = tuple(model.input_shape[1:3])
+        self.compute = tf.function(self._compute, input_signature=[
+            tf.TensorSpec([None, self.input_size[0], self.input_size[1], 3], tf.float32),
+            tf.TensorSpec([], tf.int32)
+        ])
+
+    @staticmethod
+    def find_last_conv_layer(model):
+        """Name of the last conv layer, or of the last 4D layer (e.g. a nested base model) if none is named conv"""
+        fallback = None
+        for layer in reversed(model.layers):
+            try:
+                if len(layer.output.shape) != 4:
+                    continue
+            except (AttributeError, RuntimeError, TypeError, ValueError):
+                continue
+            if 'conv' in layer.name:
+                return layer.name
+            fallback = fallback or layer.name
+        if fallback is None:
+            raise ValueError("No convolutional layer found in model.")
+        return fallback
+
+    def _compute(self, batch, pred_index):
+        with tf.GradientTape() as tape:
+            conv_outputs, predictions = self.grad_model(batch, training=False)
+            predictions = tf.reshape(predictions, [tf.shape(predictions)[0], -1])
+            # pred_index < 0 explains each image's own top class
+            class_indices = tf.where(pred_index < 0,
+                                     tf.argmax(predictions, axis=1, output_type=tf.int32),
+                                     tf.fill([tf.shape(predictions)[0]], pred_index))
+            class_channel = tf.gather(predictions, class_indices, axis=1, batch_dims=1)
+        # Each image's score only depends on its own row, so one gradient call covers the batch
+        grads = tape.gradient(class_channel, conv_outputs)
+        pooled_grads = tf.reduce_mean(grads, axis=(1, 2))
+        heatmaps = tf.einsum('nhwc,nc->nhw', conv_outputs, pooled_grads)
+        heatmaps = tf.maximum(heatmaps, 0)
+        heatmaps = tf.math.divide_no_nan(heatmaps, tf.reduce_max(heatmaps, axis=(1, 2), keepdims=True))
+        return heatmaps, predictions
+
+    @metrics.timed('gradcam')
+    def heatmaps(self, image_batch, pred_index=None):
+        """(N, h, w) heatmaps in [0, 1] and the (N, classes) predictions for a preprocessed batch"""
+        heatmaps, predictions = self.compute(tf.convert_to_tensor(image_batch, dtype=tf.float32),
+                                             tf.constant(-1 if pred_index is None else int(pred_index), tf.int32))
+        return heatmaps.numpy(), predictions.numpy()
+
+
+gradcams = {}
+gradcam_lock = threading.Lock()
+
+def keras_model_for(kind):
+    """
+    The Keras model behind the 'image' or 'video' predictions. Converted
+    backends (TFLite, SavedModel) and the inference worker pool give no access
+    to gradients, so the Keras model is loaded separately for them.
+    """
+    ensure_model_loaded(kind)
+    model = image_model if kind == 'image' else video_model
+    if model is None or isinstance(model, tf.keras.Model):
+        return model
+    if kind == 'image':
+        return tf.keras.models.load_model(IMAGE_MODEL_PATH, compile=False)
+    return load_repaired_video_model() or tf.keras.models.load_model(
+        VIDEO_MODEL_PATH, compile=False, custom_objects={'LSTM': CustomLSTM, 'CustomLSTM': CustomLSTM})
+
+def get_gradcam(kind):
+    """The GradCam for the loaded 'image' or 'video' model (built on first use), or None without a model"""
+    with gradcam_lock:
+        if kind not in gradcams:
+            model = keras_model_for(kind)
+            if model is None:
+                return None
+            gradcams[kind] = GradCam(model)
+            logger.info(f"Built Grad-CAM model for the {kind} model")
+        return gradcams[kind]
 
 def generate_gradcam_heatmap(model, image_array, last_conv_layer_name=None, pred_index=None):
     """
@@ -536,53 +3654,76 @@ def generate_gradcam_heatmap(model, image_array, last_conv_layer_name=None, pred
     Returns:
         heatmap: 2D numpy array (h, w) normalized to [0, 1].
     """
-    import tensorflow as tf
-    # Find the last conv layer if not provided
-    if last_conv_layer_name is None:
-        for layer in reversed(model.layers):
-            if 'conv' in layer.name and len(layer.output_shape) == 4:
-                last_conv_layer_name = layer.name
-                break
-        else:
-            raise ValueError("No convolutional layer found in model.")
-    last_conv_layer = model.get_layer(last_conv_layer_name)
-    grad_model = tf.keras.models.Model(
-        [model.inputs], [last_conv_layer.output, model.output]
-    )
-    with tf.GradientTape() as tape:
-        conv_outputs, predictions = grad_model(image_array)
-        if pred_index is None:
-            pred_index = tf.argmax(predictions[0])
-        class_channel = predictions[:, pred_index]
-    grads = tape.gradient(class_channel, conv_outputs)
-    pooled_grads = tf.reduce_mean(grads, axis=(0, 1, 2))
-    conv_outputs = conv_outputs[0]
-    heatmap = conv_outputs @ pooled_grads[..., tf.newaxis]
-    heatmap = tf.squeeze(heatmap)
-    heatmap = tf.maximum(heatmap, 0) / tf.math.reduce_max(heatmap)
-    return heatmap.numpy()
+    gradcam = next((g for g in gradcams.values() if g.model is model and last_conv_layer_name is None), None)
+    gradcam = gradcam or GradCam(model, last_conv_layer_name)
+    return gradcam.heatmaps(image_array[:1], pred_index)[0][0]
 
 # Overlay heatmap on image
 
-def overlay_heatmap_on_image(original_img, heatmap, alpha=0.4, colormap=cm.jet):
+def overlay_heatmap_on_image(original_img, heatmap, alpha=0.4, colormap=cv2.COLORMAP_JET):
     """
     Overlay a heatmap onto an image.
     Args:
-        original_img: Original image (H, W, 3), uint8 or float32.
+        original_img: Original BGR image (H, W, 3), uint8 or float32.
         heatmap: 2D numpy array (H, W) normalized to [0, 1].
         alpha: Transparency factor.
-        colormap: Matplotlib colormap.
+        colormap: OpenCV colormap (cv2.COLORMAP_*).
     Returns:
-        overlayed_img: uint8 image with heatmap overlay.
-    """
-    import cv2
-    heatmap = cv2.resize(heatmap, (original_img.shape[1], original_img.shape[0]))
-    heatmap = np.uint8(255 * heatmap)
-    heatmap_color = colormap(heatmap)
-    heatmap_color = np.uint8(heatmap_color[:, :, :3] * 255)
-    overlayed_img = cv2.addWeighted(original_img, 1 - alpha, heatmap_color, alpha, 0)
+        overlayed_img: uint8 BGR image with heatmap overlay.
+    """
+    if original_img.dtype != np.uint8:
+        scale = 255.0 if original_img.max() <= 1.0 else 1.0
+        original_img = np.clip(original_img * scale, 0, 255).astype(np.uint8)
+    if original_img.ndim == 2:
+        original_img = cv2.cvtColor(original_img, cv2.COLOR_GRAY2BGR)
+    heatmap = cv2.resize(np.float32(heatmap), (original_img.shape[1], original_img.shape[0]))
+    heatmap_color = cv2.applyColorMap(np.uint8(255 * np.clip(heatmap, 0, 1)), colormap)
+    overlayed_img = cv2.addWeighted(original_img[:, :, :3], 1 - alpha, heatmap_color, alpha, 0)
     return overlayed_img
 
+explain_cache = ResultCache(max_entries=EXPLAIN_CACHE_MEMORY_ENTRIES, disk_dir=EXPLAIN_CACHE_DIR)
+
+def explain_images(kind, images, digests):
+    """
+    Grad-CAM overlays for a list of BGR images ('image' or 'video' model).
+    Overlays are cached by content digest, and all uncached images go through
+    the model as one batch. Returns one dict per image with the overlay as a
+    JPEG data URL, the fake probability and whether it came from the cache;
+    None entries mark images that could not be preprocessed.
+    """
+    keys = [result_cache_key(kind, digest) for digest in digests]
+    explanations = [explain_cache.get(key) for key in keys]
+    explanations = [dict(explanation, cached=True) if explanation is not None else None
+                     for explanation in explanations]
+    missing = [i for i, explanation in enumerate(explanations) if explanation is None]
+    if not missing:
+        return explanations
+    gradcam = get_gradcam(kind)
+    if gradcam is None:
+        raise RuntimeError(f"No {kind} model loaded, explanations are unavailable in demo mode")
+    size = (gradcam.input_size[1], gradcam.input_size[0])
+    batch, positions = get_batch_preprocessor(size).preprocess([images[i] for i in missing])
+    heatmaps, predictions = gradcam.heatmaps(batch)
+    fake_probability = image_fake_probability if kind == 'image' else video_fake_probability
+    for position, heatmap, prediction in zip(positions, heatmaps, predictions):
+        i = missing[position]
+        image = images[i]
+        scale = EXPLAIN_OVERLAY_MAX_SIDE / max(image.shape[:2])
+        if scale < 1.0:
+            image = cv2.resize(image, (max(1, int(image.shape[1] * scale)), max(1, int(image.shape[0] * scale))),
+                               interpolation=cv2.INTER_AREA)
+        overlay = overlay_heatmap_on_image(image, heatmap, alpha=EXPLAIN_OVERLAY_ALPHA)
+        success, encoded = cv2.imencode('.jpg', overlay, [cv2.IMWRITE_JPEG_QUALITY, FRAME_THUMBNAIL_JPEG_QUALITY])
+        if not success:
+            continue
+        explanation = {
+            'overlay': 'data:image/jpeg;base64,' + base64.b64encode(encoded.tobytes()).decode('ascii'),
+            'fake_score': fake_probability(prediction)
+        }
+        explain_cache.set(keys[i], explanation)
+        explanations[i] = dict(explanation, cached=False)
+    return explanations
+
 # Routes
 @app.route('/')
 def index():
@@ -607,23 +3748,36 @@ def upload_image():
         try:
             file_ext = file.filename.rsplit('.', 1)[1].lower()
             unique_filename = f"{uuid.uuid4().hex}.{file_ext}"
-            filepath = os.path.join(app.config['IMAGE_UPLOAD_FOLDER'], unique_filename)
-            os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            file.save(filepath)
-            logger.info(f"Saved uploaded image to {filepath}")
-            image = cv2.imread(filepath)
-            if image is None:
-                return jsonify({'error': 'Failed to read image'})
-            result, confidence, message = predict_image(image)
-            if result == "Error":
-                return jsonify({'error': f'Analysis error: {message}'})
+            # Decode straight from the request buffer; the original bytes are stored afterwards
+            data = file.read()
+            cache_key = result_cache_key('image', content_digest(data=data))
+            cached = result_cache.get(cache_key)
+            similarity = None
+            if cached is None:
+                with metrics.time('decode'):
+                    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+                if image is None:
+                    return jsonify({'error': 'Failed to read image'})
+                fingerprint = image_fingerprint(image) if NEAR_DUPLICATE_DETECTION else None
+                cached, similarity = near_duplicate_result('image', [fingerprint])
+            if cached is not None:
+                result, confidence, message = cached['result'], cached['confidence'], cached['message']
+            else:
+                result, confidence, message = predict_image(image)
+                if result == "Error":
+                    return jsonify({'error': f'Analysis error: {message}'})
+                result_cache.set(cache_key, {'result': result, 'confidence': float(confidence), 'message': message})
+                remember_fingerprint('image', [fingerprint], cache_key)
+            filepath = upload_store.save_async(app.config['IMAGE_UPLOAD_FOLDER'], unique_filename, data)
             log_prediction(filepath, result, confidence, "image")
             return jsonify({
                 'result': result,
                 'confidence': f"{confidence:.1f}%",
-                'image_url': url_for('static', filename=f'uploads/images/{unique_filename}'),
+                'image_url': url_for('static', filename=f'uploads/images/{unique_filename}') if filepath else None,
                 'message': message,
-                'type': 'image'
+                'type': 'image',
+                'cached': cached is not None,
+                'similarity': similarity
             })
         except Exception as e:
             logger.error(f"Error processing image upload: {e}")
@@ -638,6 +3792,8 @@ def upload_video():
     if not file or not file.filename:
         return jsonify({'error': 'No selected file'})
     if file and allowed_video_file(file.filename):
+        filepath = None
+        handed_off = False
         try:
             # Generate a unique filename
             file_ext = file.filename.rsplit('.', 1)[1].lower()
@@ -646,29 +3802,138 @@ def upload_video():
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(filepath), exist_ok=True)
             # Save the file
-            file.save(filepath)
+            with metrics.time('upload_save'):
+                file.save(filepath)
             logger.info(f"Saved uploaded video to {filepath}")
-            # Extract frames from video
-            frames, frame_paths = frame_capture(filepath)
-            if not frames:
+            upload_store.sweep()
+            cache_key, cached, fingerprint, similarity = lookup_video_result(filepath)
+            if cached is not None:
+                log_prediction(filepath if upload_store.keeps_uploads else None, cached['result'],
+                               cached['confidence'], "video")
+                response = video_response(cached_frame_results(cached), cached['result'], cached['confidence'],
+                                          unique_filename, cached.get('summary'))
+                response.update(cached=True, similarity=similarity)
+                if is_stream_request():
+                    return Response(sse_event('result', response), mimetype='text/event-stream')
+                return jsonify(response)
+            if is_stream_request():
+                # Push each batch of frame results to the client as soon as it is scored
+                handed_off = True
+                return Response(stream_with_context(video_analysis_events(filepath, unique_filename, request.url_root,
+                                                                          cache_key, fingerprint)),
+                                mimetype='text/event-stream', headers={'Cache-Control': 'no-cache',
+                                                                       'X-Accel-Buffering': 'no'})
+            if is_async_request():
+                # Hand the analysis to the job workers and return straight away
+                video_url = url_for('static', filename=f'uploads/videos/{unique_filename}') \
+                    if upload_store.keeps_uploads else None
+                # Where the video is, so another worker can start over if this one exits (see recover_job)
+                job_id = job_backend.create('video', video_url=video_url, filepath=filepath,
+                                            unique_filename=unique_filename, base_url=request.url_root,
+                                            cache_key=cache_key, fingerprint=fingerprint)
+                job_backend.submit(job_id, run_video_job, job_id, filepath, unique_filename, request.url_root,
+                                   cache_key, fingerprint)
+                handed_off = True
+                return jsonify({
+                    'job_id': job_id,
+                    'status': 'queued',
+                    'status_url': url_for('job_status', job_id=job_id),
+                    'type': 'video'
+                }), 202
+            # Extract and analyze frames as a streaming pipeline
+            summary = {}
+            frame_results, overall_result, overall_confidence = analyze_video(filepath, summary=summary)
+            if overall_result == "Error":
                 return jsonify({'error': 'Failed to extract frames from video'})
-            # Analyze frames
-            frame_results, overall_result, overall_confidence = evaluate_video_frames(frames, frame_paths)
+            cache_video_result(cache_key, frame_results, overall_result, overall_confidence, summary, fingerprint)
             # Log the prediction
-            log_prediction(filepath, overall_result, overall_confidence, "video")
-            return jsonify({
-                'result': overall_result,
-                'confidence': f"{overall_confidence:.1f}%",
-                'video_url': url_for('static', filename=f'uploads/videos/{unique_filename}'),
-                'frames': [{'path': res['path'], 'result': res['result'], 'confidence': f"{res['confidence']:.1f}%"} 
-                          for res in frame_results],
-                'type': 'video'
-            })
+            log_prediction(filepath if upload_store.keeps_uploads else None, overall_result, overall_confidence,
+                           "video")
+            return jsonify(video_response(frame_results, overall_result, overall_confidence, unique_filename,
+                                          summary))
         except Exception as e:
             logger.error(f"Error processing video upload: {e}")
             return jsonify({'error': f'Processing error: {str(e)}'})
+        finally:
+            if not handed_off:
+                # Background jobs and event streams remove the upload themselves once they're done with it
+                upload_store.analyzed(filepath)
     return jsonify({'error': 'Invalid file format'})
 
+def video_upload_state(upload):
+    state = upload.state()
+    state.update(upload_url=url_for('video_upload_chunk', upload_id=upload.id), chunk_size=VIDEO_UPLOAD_CHUNK_BYTES,
+                 status_url=url_for('job_status', job_id=upload.job_id))
+    return state
+
+@app.route('/uploads/video', methods=['POST'])
+def create_video_upload():
+    """
+    Start a chunked, resumable video upload from JSON {filename, size}. The
+    client PUTs the chunks to upload_url in order, each with its byte offset
+    in an Upload-Offset header, and can GET upload_url after a dropped
+    connection to find where to resume. The analysis is a background job
+    (status_url) that starts while the video is still arriving if its
+    container allows it.
+    """
+    data = request.get_json(silent=True) or {}
+    filename = str(data.get('filename') or '')
+    try:
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Missing or invalid size'}), 400
+    if not allowed_video_file(filename):
+        return jsonify({'error': 'Invalid file format'}), 400
+    if size <= 0:
+        return jsonify({'error': 'Missing or invalid size'}), 400
+    if size > VIDEO_UPLOAD_MAX_BYTES:
+        return jsonify({'error': f'File too large (limit {VIDEO_UPLOAD_MAX_BYTES // 2 ** 20} MB)'}), 413
+    partial_uploads.sweep()
+    upload = partial_uploads.create(filename, size)
+    video_url = url_for('static', filename=f'uploads/videos/{upload.unique_filename}') \
+        if upload_store.keeps_uploads else None
+    upload.job_id = job_backend.create('video', video_url=video_url, upload_id=upload.id, filepath=upload.filepath,
+                                       unique_filename=upload.unique_filename, base_url=request.url_root)
+    upload.save()
+    # This worker starts the analysis whichever worker the chunks reach; if it exits, recover_job takes over
+    start_watching_upload(upload, request.url_root)
+    logger.info(f"Started chunked upload {upload.id} of {filename} ({size} bytes)")
+    return jsonify(video_upload_state(upload)), 201
+
+@app.route('/uploads/video/<upload_id>', methods=['GET', 'PUT', 'DELETE'])
+def video_upload_chunk(upload_id):
+    """Report (GET), extend (PUT a chunk) or cancel (DELETE) a chunked video upload"""
+    upload = partial_uploads.get(upload_id)
+    if upload is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    if request.method != 'DELETE':
+        job = job_backend.get(upload.job_id)
+        if job is not None:
+            # The worker that created the upload may have exited while the client was resuming
+            recover_job(job)
+    if request.method == 'GET':
+        return jsonify(video_upload_state(upload))
+    if request.method == 'DELETE':
+        upload.abandon()
+        return jsonify(upload.state())
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return jsonify({'error': 'Missing or invalid Upload-Offset header'}), 400
+    # Read at most one chunk more than allowed, whatever Content-Length claims
+    data = request.stream.read(VIDEO_UPLOAD_CHUNK_BYTES + 1)
+    if not data:
+        return jsonify({'error': 'Empty chunk'}), 400
+    if len(data) > VIDEO_UPLOAD_CHUNK_BYTES or offset + len(data) > upload.size:
+        return jsonify({'error': 'Chunk too large'}), 413
+    if not upload.append(offset, data):
+        # Out of order or a retry of a chunk that already arrived: tell the client where to resume
+        response = video_upload_state(upload)
+        response['error'] = 'Upload is not at that offset'
+        return jsonify(response), 409
+    partial_uploads.sweep()
+    return jsonify(video_upload_state(upload))
+
 @app.route('/webcam', methods=['POST'])
 def webcam_upload():
     try:
@@ -677,29 +3942,44 @@ def webcam_upload():
             return jsonify({'error': 'No image data'})
         
         # Decode base64 image
-        img_data = base64.b64decode(data['image'].split(',')[1])
-        nparr = np.frombuffer(img_data, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        if image is None:
-            return jsonify({'error': 'Failed to decode image'})
+        header, encoded = data['image'].split(',', 1)
+        img_data = base64.b64decode(encoded)
+        cache_key = result_cache_key('image', content_digest(data=img_data))
+        cached = result_cache.get(cache_key)
         
-        # Generate a unique filename
-        unique_filename = f"{uuid.uuid4().hex}.jpg"
-        filepath = os.path.join(app.config['IMAGE_UPLOAD_FOLDER'], unique_filename)
+        # Generate a unique filename, keeping the format the browser sent (e.g. data:image/png;base64)
+        file_ext = header.split('/', 1)[-1].split(';', 1)[0].lower().replace('jpeg', 'jpg')
+        if file_ext not in ALLOWED_IMAGE_EXTENSIONS:
+            file_ext = 'jpg'
+        unique_filename = f"{uuid.uuid4().hex}.{file_ext}"
         
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        
-        # Save the image
-        cv2.imwrite(filepath, image)
-        logger.info(f"Saved webcam image to {filepath}")
+        similarity = None
+        if cached is None:
+            nparr = np.frombuffer(img_data, np.uint8)
+            with metrics.time('decode'):
+                image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            
+            if image is None:
+                return jsonify({'error': 'Failed to decode image'})
+            
+            # The same frame re-encoded or resized may already have been analyzed
+            fingerprint = image_fingerprint(image) if NEAR_DUPLICATE_DETECTION else None
+            cached, similarity = near_duplicate_result('image', [fingerprint])
         
-        # Predict
-        result, confidence, message = predict_image(image)
+        if cached is not None:
+            # Cache hit: no inference needed
+            result, confidence, message = cached['result'], cached['confidence'], cached['message']
+        else:
+            # Predict
+            result, confidence, message = predict_image(image)
+            
+            if result == "Error":
+                return jsonify({'error': f'Analysis error: {message}'})
+            result_cache.set(cache_key, {'result': result, 'confidence': float(confidence), 'message': message})
+            remember_fingerprint('image', [fingerprint], cache_key)
         
-        if result == "Error":
-            return jsonify({'error': f'Analysis error: {message}'})
+        # Store the original bytes (not a re-encoded copy) in the background
+        filepath = upload_store.save_async(app.config['IMAGE_UPLOAD_FOLDER'], unique_filename, img_data)
         
         # Log the prediction
         log_prediction(filepath, result, confidence, "webcam")
@@ -707,26 +3987,92 @@ def webcam_upload():
         return jsonify({
             'result': result,
             'confidence': f"{confidence:.1f}%",
-            'image_url': url_for('static', filename=f'uploads/images/{unique_filename}'),
+            'image_url': url_for('static', filename=f'uploads/images/{unique_filename}') if filepath else None,
             'message': message,
-            'type': 'image'
+            'type': 'image',
+            'cached': cached is not None,
+            'similarity': similarity
         })
     except Exception as e:
         logger.error(f"Error processing webcam image: {e}")
         return jsonify({'error': f'Processing error: {str(e)}'})
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Report the status, progress and partial per-frame results of a background job"""
+    job = job_backend.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if recover_job(job):
+        job = job_backend.get(job_id)
+    return jsonify({
+        'job_id': job['id'],
+        'type': job['kind'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'frames_processed': job['frames_processed'],
+        'frames_expected': job['frames_expected'],
+        'frames': job['frames'],
+        'video_url': job.get('video_url'),
+        'result': job['result'],
+        'error': job['error']
+    })
+
+@app.route('/predictions/recent', methods=['GET'])
+def recent_predictions():
+    """Return the most recent logged predictions (?limit=, ?type=image|video|webcam)"""
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), 1000))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    return jsonify({'predictions': prediction_log.recent(limit, request.args.get('type'))})
+
+@app.before_request
+def track_request_start():
+    metrics.inc('truthshield_requests_in_flight')
+
+@app.after_request
+def track_request_status(response):
+    metrics.inc('truthshield_http_requests_total', endpoint=request.endpoint or 'unknown',
+                status=response.status_code)
+    return response
+
+@app.teardown_request
+def track_request_end(exc):
+    metrics.inc('truthshield_requests_in_flight', -1)
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape endpoint (per worker process)"""
+    memory = process_memory_bytes()
+    if memory is not None:
+        metrics.set('truthshield_process_resident_memory_bytes', memory)
+    metrics.set('truthshield_frame_store_bytes', frame_store.stats()['bytes'])
+    metrics.set('truthshield_image_batcher_queue_depth', image_batcher.requests.qsize())
+    metrics.set('truthshield_model_ready', int(image_model_loaded), model='image')
+    metrics.set('truthshield_model_ready', int(video_model_loaded), model='video')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint for monitoring"""
     return jsonify({
         'status': 'ok',
+        'models_ready': models_ready(),
         'image_model_loaded': image_model_loaded,
         'video_model_loaded': video_model_loaded,
+        'image_model_status': model_status['image'],
+        'video_model_status': model_status['video'],
         'image_model_path': IMAGE_MODEL_PATH,
         'video_model_path': VIDEO_MODEL_PATH,
         'image_model_exists': os.path.exists(IMAGE_MODEL_PATH),
         'video_model_exists': os.path.exists(VIDEO_MODEL_PATH),
         'tensorflow_version': tf.__version__,
+        'inference_backend': INFERENCE_BACKEND,
+        'inference_workers': INFERENCE_WORKERS,
+        'result_cache': result_cache.stats(),
+        'near_duplicates': near_duplicate_index.stats(),
+        'image_batcher': image_batcher.stats(),
         'timestamp': datetime.now().isoformat()
     })
 
@@ -736,6 +4082,89 @@ def static_files(filename):
     """Serve static files"""
     return send_from_directory('static', filename)
 
+@app.route('/frames/<analysis_id>/<int:frame_index>.jpg')
+def frame_thumbnail(analysis_id, frame_index):
+    """Serve a sampled video frame from the frame store, encoding it on first request"""
+    data = frame_store.get_jpeg(analysis_id, frame_index)
+    if data is None:
+        return jsonify({'error': 'Frame not found'}), 404
+    response = Response(data, mimetype='image/jpeg')
+    response.headers['Cache-Control'] = 'private, max-age=3600'
+    return response
+
+@app.route('/batch-detect', methods=['POST'])
+def batch_detect():
+    """
+    Score many images in one request. Send them as multipart 'files' (images
+    and/or zip/tar archives of images); results stream back as NDJSON, one
+    line per image in upload order, each shaped like an /upload-image
+    response plus the item's 'name'.
+    """
+    files = [file for file in request.files.getlist('files') + request.files.getlist('file') if file and file.filename]
+    if not files:
+        return jsonify({'error': 'No files provided'})
+    # Flask closes the request's uploads when the view returns, before the response has streamed,
+    # so hand the generator its own copies
+    uploads = []
+    for file in files:
+        spool = tempfile.TemporaryFile()
+        file.save(spool)
+        spool.seek(0)
+        uploads.append(FileStorage(stream=spool, filename=file.filename))
+    return Response(stream_with_context(batch_detect_results(uploads)), mimetype='application/x-ndjson')
+
+@app.route('/explain', methods=['POST'])
+def explain():
+    """
+    Grad-CAM overlays showing which regions drove a prediction. Either upload
+    an image as 'file', or pass the 'analysis_id' of a video analysis with the
+    'frames' to explain (frame indices from its frame URLs, comma separated or
+    a JSON list).
+    """
+    try:
+        payload = request.get_json(silent=True) or request.form
+        if 'file' in request.files and request.files['file'].filename:
+            file = request.files['file']
+            if not allowed_image_file(file.filename):
+                return jsonify({'error': 'Invalid file format'})
+            data = file.read()
+            with metrics.time('decode'):
+                image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                return jsonify({'error': 'Failed to read image'})
+            explanation = explain_images('image', [image], [content_digest(data)])[0]
+            if explanation is None:
+                return jsonify({'error': 'Failed to preprocess image'})
+            # Same verdict and clamped confidence as /upload-image reports for the image
+            result, confidence, _ = image_verdict(explanation['fake_score'])
+            return jsonify({'type': 'image', 'result': result, 'confidence': f"{confidence:.1f}%", **explanation})
+        analysis_id = payload.get('analysis_id')
+        if not analysis_id:
+            return jsonify({'error': 'Provide an image file or an analysis_id with frames'})
+        frame_indices = payload.get('frames', '')
+        if isinstance(frame_indices, str):
+            frame_indices = [index for index in frame_indices.split(',') if index.strip()]
+        try:
+            frame_indices = [int(index) for index in frame_indices]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'frames must be a list of frame indices'})
+        if not frame_indices or len(frame_indices) > EXPLAIN_MAX_FRAMES:
+            return jsonify({'error': f'Select between 1 and {EXPLAIN_MAX_FRAMES} frames'})
+        frames = [frame_store.get_frame(analysis_id, index) for index in frame_indices]
+        if any(frame is None for frame in frames):
+            return jsonify({'error': 'Frame not found'}), 404
+        digests = [content_digest(frame.tobytes()) for frame in frames]
+        explanations = explain_images('video', frames, digests)
+        return jsonify({
+            'type': 'video',
+            'analysis_id': analysis_id,
+            'frames': [dict(explanation or {'error': 'Failed to preprocess frame'}, frame=index)
+                       for index, explanation in zip(frame_indices, explanations)]
+        })
+    except Exception as e:
+        logger.error(f"Error generating explanation: {e}")
+        return jsonify({'error': f'Explanation error: {str(e)}'})
+
 @app.route('/static/frames/<filename>')
 def serve_frame(filename):
     """Serve frame images"""
@@ -744,6 +4173,8 @@ def serve_frame(filename):
 @app.route('/static/uploads/images/<filename>')
 def serve_image(filename):
     """Serve uploaded images"""
+    # The upload may still be being written in the background
+    upload_store.wait(os.path.join(app.config['IMAGE_UPLOAD_FOLDER'], filename))
     return send_from_directory(app.config['IMAGE_UPLOAD_FOLDER'], filename)
 
 @app.route('/static/uploads/videos/<filename>')
@@ -758,4 +4189,8 @@ if __name__ == '__main__':
     logger.info(f"Video model path: {VIDEO_MODEL_PATH}")
     logger.info(f"Image model exists: {os.path.exists(IMAGE_MODEL_PATH)}")
     logger.info(f"Video model exists: {os.path.exists(VIDEO_MODEL_PATH)}")
+    if INFERENCE_WORKERS > 0 and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        # Start the workers once, in the reloader's parent, so code reloads don't restart them
+        inference_pool = InferencePool().start()
+        atexit.register(inference_pool.stop)
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,141 @@
+"""
+Compare adaptive (scene-change aware) frame sampling against fixed-rate sampling.
+
+Runs every video of a corpus through the video pipeline twice, once with the
+'fps' policy and once with 'adaptive', and reports per video how many frames
+each sent to the model, the analysis time, and the overall verdict and mean
+fake score of each. Without --corpus a synthetic corpus is generated: a
+near-static talking head, fast cuts, a continuous pan and a mostly static
+clip with occasional cuts.
+
+The models in model/ are used when they load; otherwise the app's demo mode
+scores the frames, which still shows how far the verdicts move but not how
+the real model would.
+
+Usage:
+    python benchmarks/bench_adaptive_sampling.py
+    python benchmarks/bench_adaptive_sampling.py --corpus path/to/videos --frame-budget 60
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MODEL_LOADING', 'lazy')
+
+import app  # noqa: E402
+
+
+def scene(rng, width, height):
+    scene_image = cv2.resize(rng.integers(0, 255, size=(9, 16, 3), dtype=np.uint8), (width, height),
+                             interpolation=cv2.INTER_CUBIC)
+    for _ in range(5):
+        color = tuple(int(c) for c in rng.integers(0, 255, size=3))
+        cv2.circle(scene_image, (int(rng.integers(0, width)), int(rng.integers(0, height))),
+                   int(rng.integers(20, 100)), color, -1)
+    return scene_image
+
+
+def write_video(path, frames, fps, size):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+
+
+def make_corpus(directory, duration, fps=30, width=640, height=360):
+    """Synthetic videos covering the content the adaptive policy is meant to handle"""
+    rng = np.random.default_rng(0)
+    total = int(duration * fps)
+    background = scene(rng, width, height)
+
+    def talking_head():
+        for i in range(total):
+            frame = background.copy()
+            cv2.ellipse(frame, (width // 2, height // 2), (60, 80), 0, 0, 360, (150, 170, 210), -1)
+            cv2.ellipse(frame, (width // 2, height // 2 + 40), (20, 3 + int(6 * abs(np.sin(i / 4)))), 0, 0, 360,
+                        (40, 40, 120), -1)
+            yield frame
+
+    def fast_cuts():
+        scenes = [scene(rng, width, height) for _ in range(8)]
+        for i in range(total):
+            yield scenes[(i // int(fps * 0.7)) % len(scenes)]
+
+    def pan():
+        wide = cv2.resize(scene(rng, width, height), (width * 3, height))
+        for i in range(total):
+            offset = int(i * (2 * width) / total)
+            yield wide[:, offset:offset + width]
+
+    def mostly_static():
+        scenes = [scene(rng, width, height) for _ in range(4)]
+        for i in range(total):
+            yield scenes[(i // int(fps * duration / 4)) % len(scenes)]
+
+    paths = []
+    for name, frames in [('talking_head', talking_head), ('fast_cuts', fast_cuts), ('pan', pan),
+                         ('mostly_static', mostly_static)]:
+        path = os.path.join(directory, f'{name}.mp4')
+        write_video(path, frames(), fps, (width, height))
+        paths.append(path)
+    return paths
+
+
+def analyze(path, policy):
+    summary = {}
+    start = time.perf_counter()
+    frame_items = app.iter_video_frames(path, policy=policy, analysis_id='bench')
+    frame_results, result, _ = app.evaluate_video_stream(frame_items, summary=summary)
+    elapsed = time.perf_counter() - start
+    app.frame_store.discard('bench')
+    scores = [res['fake_score'] for res in frame_results]
+    return {'frames': summary.get('frames_evaluated', 0), 'seconds': elapsed, 'result': result,
+            'fake_score': float(np.mean(scores)) if scores else 0.5}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help='Directory of videos (default: generate a synthetic corpus)')
+    parser.add_argument('--duration', type=float, default=30, help='Synthetic video length in seconds')
+    parser.add_argument('--frame-budget', type=int, default=app.VIDEO_FRAME_BUDGET)
+    args = parser.parse_args()
+    app.VIDEO_FRAME_BUDGET = args.frame_budget
+
+    models = 'real model' if app.ensure_model_loaded('video') else 'demo mode (no video model loaded)'
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            paths = sorted(os.path.join(args.corpus, name) for name in os.listdir(args.corpus)
+                           if app.allowed_video_file(name))
+        else:
+            paths = make_corpus(tmp, args.duration)
+        rows = []
+        # Frame results carry thumbnail URLs, which need a request context
+        with app.app.test_request_context():
+            for path in paths:
+                rows.append((os.path.basename(path), analyze(path, 'fps'), analyze(path, 'adaptive')))
+
+    print(f"Scoring: {models}; adaptive budget {args.frame_budget} frames")
+    print(f"\n{'video':<24}{'frames fps':>11}{'adaptive':>10}{'saved':>8}{'time fps':>10}{'adaptive':>10}"
+          f"{'verdict fps':>13}{'adaptive':>10}{'score diff':>12}")
+    total_fixed = total_adaptive = changed = 0
+    for name, fixed, adaptive in rows:
+        saved = 1 - adaptive['frames'] / fixed['frames'] if fixed['frames'] else 0.0
+        total_fixed += fixed['frames']
+        total_adaptive += adaptive['frames']
+        changed += fixed['result'] != adaptive['result']
+        print(f"{name[:23]:<24}{fixed['frames']:>11}{adaptive['frames']:>10}{saved:>8.0%}{fixed['seconds']:>9.2f}s"
+              f"{adaptive['seconds']:>9.2f}s{fixed['result']:>13}{adaptive['result']:>10}"
+              f"{adaptive['fake_score'] - fixed['fake_score']:>+12.3f}")
+    if total_fixed:
+        print(f"\nFrames sent to the model: {total_fixed} -> {total_adaptive} "
+              f"({1 - total_adaptive / total_fixed:.0%} fewer); verdict changed on {changed} of {len(rows)} videos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark video frame sampling: the original read-every-frame loop from
+frame_capture against the grab/seek based sampler in app.py.
+
+Usage:
+    python benchmarks/bench_frame_sampling.py
+    python benchmarks/bench_frame_sampling.py --video path/to/video.mp4 --policy budget
+
+Reports decode time per minute of video for each approach.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import sample_video_frames, video_sample_indices  # noqa: E402
+
+
+def make_synthetic_video(path, duration=60, fps=30, width=1280, height=720):
+    """Write a synthetic video with moving content so frames don't compress to nothing"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    for i in range(int(duration * fps)):
+        frame = np.roll(background, shift=i * 4, axis=1)
+        cv2.circle(frame, (i * 7 % width, height // 2), 60, (0, 0, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def legacy_loop(video_path):
+    """The original frame_capture loop: read() every frame, keep one per second"""
+    vid_obj = cv2.VideoCapture(video_path)
+    fps = vid_obj.get(cv2.CAP_PROP_FPS)
+    count = 0
+    sampled = 0
+    while True:
+        success, img = vid_obj.read()
+        if not success:
+            break
+        if int(count % fps) == 0:
+            sampled += 1
+        count += 1
+    vid_obj.release()
+    return sampled
+
+
+def sampler_loop(video_path, policy, sample_fps, frame_budget):
+    vid_obj = cv2.VideoCapture(video_path)
+    indices = video_sample_indices(vid_obj, video_path, policy, sample_fps, frame_budget)
+    sampled = sum(1 for _ in sample_video_frames(vid_obj, indices))
+    vid_obj.release()
+    return sampled
+
+
+def video_minutes(video_path):
+    vid_obj = cv2.VideoCapture(video_path)
+    fps = vid_obj.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_count = vid_obj.get(cv2.CAP_PROP_FRAME_COUNT)
+    vid_obj.release()
+    return frame_count / fps / 60.0
+
+
+def time_it(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--video', help='Existing video to benchmark (default: generate a synthetic one)')
+    parser.add_argument('--duration', type=float, default=60, help='Synthetic video length in seconds')
+    parser.add_argument('--fps', type=int, default=30, help='Synthetic video frame rate')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--policy', default='fps', choices=['fps', 'budget', 'keyframes'])
+    parser.add_argument('--sample-fps', type=float, default=1.0)
+    parser.add_argument('--frame-budget', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path = args.video
+        if not video_path:
+            video_path = os.path.join(tmp, 'synthetic.mp4')
+            make_synthetic_video(video_path, args.duration, args.fps, args.width, args.height)
+        minutes = video_minutes(video_path) or 1.0
+
+        legacy_time, legacy_frames = time_it(lambda: legacy_loop(video_path), args.repeat)
+        sampler_time, sampler_frames = time_it(
+            lambda: sampler_loop(video_path, args.policy, args.sample_fps, args.frame_budget), args.repeat)
+
+    print(f"Video length: {minutes * 60:.1f}s")
+    print(f"{'method':<22}{'frames':>8}{'seconds':>10}{'s / min video':>16}")
+    print(f"{'legacy read() loop':<22}{legacy_frames:>8}{legacy_time:>10.3f}{legacy_time / minutes:>16.3f}")
+    print(f"{'sampler (' + args.policy + ')':<22}{sampler_frames:>8}{sampler_time:>10.3f}{sampler_time / minutes:>16.3f}")
+    print(f"Speedup: {legacy_time / sampler_time:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Compare in-process inference with the inference worker pool.
+
+Scores the same synthetic batches with the models loaded in this process,
+then through a pool of --workers inference workers (inference_pool.py) from
+--threads client threads, and reports throughput, per-batch latency and
+this process's resident memory in each mode. Needs the models in model/.
+
+Usage:
+    python benchmarks/bench_inference_pool.py --workers 2 --threads 4
+    python benchmarks/bench_inference_pool.py --kind video --batch-size 32
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+INPUT_SIZES = {'image': (299, 299), 'video': (224, 224)}
+
+
+def run(args, predict):
+    """Score args.batches batches split over args.threads threads; returns (seconds, per-batch latencies)"""
+    size = INPUT_SIZES[args.kind]
+    batch = np.random.default_rng(0).random((args.batch_size, size[0], size[1], 3), dtype=np.float32)
+    predict(batch)  # warm-up
+    latencies = []
+    lock = threading.Lock()
+
+    def work(count):
+        for _ in range(count):
+            start = time.perf_counter()
+            predict(batch)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=work, args=(len(part),))
+               for part in np.array_split(np.arange(args.batches), args.threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+def measure(args):
+    """Run one mode in this process (called in a child per mode, so memory is measured separately)"""
+    os.environ['MODEL_LOADING'] = 'lazy'
+    import app
+    if not app.ensure_model_loaded(args.kind):
+        print(f"No {args.kind} model could be loaded", file=sys.stderr)
+        return 1
+    model = app.image_model if args.kind == 'image' else app.video_model
+    elapsed, latencies = run(args, model.predict_on_batch)
+    items = args.batches * args.batch_size
+    print(f"{args.mode:<14}{items / elapsed:>10.1f}{np.percentile(latencies, 50) * 1000:>10.1f}ms"
+          f"{np.percentile(latencies, 99) * 1000:>10.1f}ms{app.process_memory_bytes() / 2 ** 20:>12.0f} MiB")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--kind', choices=sorted(INPUT_SIZES), default='image')
+    parser.add_argument('--workers', type=int, default=2, help='Inference worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='Client threads issuing batches')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--batches', type=int, default=40)
+    parser.add_argument('--mode', choices=['in-process', 'pool'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.mode:
+        return measure(args)
+
+    from inference_pool import InferencePool, inference_authkey
+    inference_authkey()
+    print(f"{args.batches} {args.kind} batches of {args.batch_size} from {args.threads} threads")
+    print(f"{'mode':<14}{'items/s':>10}{'p50':>12}{'p99':>12}{'client RSS':>16}")
+    base = [sys.executable, os.path.abspath(__file__)] + sys.argv[1:]
+    subprocess.run(base + ['--mode', 'in-process'], env=dict(os.environ, INFERENCE_WORKERS='0'), check=False)
+    pool = InferencePool(args.workers).start()
+    try:
+        subprocess.run(base + ['--mode', 'pool'], env=dict(os.environ, INFERENCE_WORKERS=str(args.workers)),
+                       check=False)
+    finally:
+        pool.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
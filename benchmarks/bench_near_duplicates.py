@@ -0,0 +1,156 @@
+"""
+Benchmark the perceptual-hash near-duplicate index.
+
+Indexes a set of synthetic images, then queries it with perturbed copies of
+them (JPEG re-encoding, downscaling, screenshot-style crop and rescale,
+brightness shift, noise) and with unrelated images. Reports per perturbation
+how often the original is found and how similar it scores, the false-match
+rate on unrelated images, the lookup latency against a linear scan over all
+entries, and the size of the index in memory and on disk.
+
+Usage:
+    python benchmarks/bench_near_duplicates.py --images 5000 --queries 500
+    python benchmarks/bench_near_duplicates.py --max-distance 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# No model is needed; a background model load would compete with the lookups being timed
+os.environ['MODEL_LOADING'] = 'lazy'
+
+import app  # noqa: E402
+
+MODEL = 'bench'
+
+
+def make_image(rng, width=640, height=480):
+    """A smooth random scene: upscaled low-frequency noise with a few shapes on top, like a photo more than noise"""
+    image = cv2.resize(rng.integers(0, 255, size=(6, 8, 3), dtype=np.uint8), (width, height),
+                       interpolation=cv2.INTER_CUBIC)
+    for _ in range(rng.integers(3, 8)):
+        color = tuple(int(c) for c in rng.integers(0, 255, size=3))
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        if rng.random() < 0.5:
+            cv2.circle(image, center, int(rng.integers(20, 120)), color, -1)
+        else:
+            cv2.rectangle(image, center, (center[0] + int(rng.integers(30, 200)),
+                                          center[1] + int(rng.integers(30, 200))), color, -1)
+    return image
+
+
+def jpeg(image, quality=40):
+    return cv2.imdecode(cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1], cv2.IMREAD_COLOR)
+
+
+def screenshot(image):
+    # Crop a thin border, rescale to a different resolution and re-encode
+    height, width = image.shape[:2]
+    cropped = image[height // 40:height - height // 40, width // 40:width - width // 40]
+    return jpeg(cv2.resize(cropped, (int(width * 0.8), int(height * 0.8)), interpolation=cv2.INTER_AREA), 85)
+
+
+PERTURBATIONS = {
+    'jpeg_q40': jpeg,
+    'downscale_50%': lambda image: cv2.resize(image, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA),
+    'screenshot': screenshot,
+    'brightness_+20': lambda image: cv2.convertScaleAbs(image, alpha=1.0, beta=20),
+    'noise_sigma8': lambda image: np.clip(image + np.random.default_rng(1).normal(0, 8, image.shape), 0,
+                                          255).astype(np.uint8),
+}
+
+
+def linear_lookup(entries, fingerprint, max_distance):
+    best = None
+    for key, (phash, dhash) in entries:
+        p, d = app.hamming_distance(phash, fingerprint[0]), app.hamming_distance(dhash, fingerprint[1])
+        if p <= max_distance and d <= max_distance and (best is None or p + d < best[1]):
+            best = (key, p + d)
+    return best
+
+
+def percentiles(latencies):
+    latencies = np.asarray(latencies) * 1e6
+    return f"p50 {np.percentile(latencies, 50):8.1f}us  p99 {np.percentile(latencies, 99):8.1f}us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=2000, help='Images in the index')
+    parser.add_argument('--queries', type=int, default=200, help='Perturbed queries per perturbation')
+    parser.add_argument('--max-distance', type=int, default=app.NEAR_DUPLICATE_MAX_DISTANCE)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    originals = [make_image(rng) for _ in range(args.queries)]
+    fingerprints = [app.image_fingerprint(image) for image in originals]
+    # The rest of the index only needs fingerprints, so it gets cheaper small images
+    fingerprints += [app.image_fingerprint(make_image(rng, 160, 120)) for _ in range(args.images - args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = os.path.join(tmp, 'index.jsonl')
+        tracemalloc.start()
+        index = app.NearDuplicateIndex(path=index_path, max_distance=args.max_distance)
+        start = time.perf_counter()
+        for i, fingerprint in enumerate(fingerprints):
+            index.add('image', [fingerprint], f'key{i}', MODEL)
+        build_time = time.perf_counter() - start
+        index_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        disk_bytes = os.path.getsize(index_path)
+    entries = [(f'key{i}', fingerprint) for i, fingerprint in enumerate(fingerprints)]
+
+    print(f"Index: {len(fingerprints)} images, {index_bytes / 1024:.0f} KiB in memory, {disk_bytes / 1024:.0f} KiB "
+          f"on disk, built in {build_time * 1000:.0f} ms; max distance {args.max_distance} bits")
+    print(f"\n{'perturbation':<16}{'found':>8}{'wrong':>8}{'similarity':>12}   lookup latency")
+    hash_times = []
+    for name, perturb in PERTURBATIONS.items():
+        found = wrong = 0
+        similarities = []
+        latencies = []
+        for i, image in enumerate(originals):
+            query = perturb(image)
+            start = time.perf_counter()
+            fingerprint = app.image_fingerprint(query)
+            hash_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            match = index.lookup('image', [fingerprint], MODEL)
+            latencies.append(time.perf_counter() - start)
+            if match is None:
+                continue
+            if match[0] == f'key{i}':
+                found += 1
+                similarities.append(match[1])
+            else:
+                wrong += 1
+        mean_similarity = f"{np.mean(similarities):.3f}" if similarities else '-'
+        print(f"{name:<16}{found / len(originals):>8.1%}{wrong / len(originals):>8.1%}{mean_similarity:>12}   "
+              f"{percentiles(latencies)}")
+
+    unrelated = [make_image(rng) for _ in range(args.queries)]
+    false_matches = 0
+    latencies = []
+    linear_latencies = []
+    for image in unrelated:
+        fingerprint = app.image_fingerprint(image)
+        start = time.perf_counter()
+        false_matches += index.lookup('image', [fingerprint], MODEL) is not None
+        latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        linear_lookup(entries, fingerprint, args.max_distance)
+        linear_latencies.append(time.perf_counter() - start)
+    print(f"{'unrelated':<16}{'':>8}{false_matches / len(unrelated):>8.1%}{'':>12}   {percentiles(latencies)}")
+    print(f"\nLinear scan over {len(entries)} entries: {percentiles(linear_latencies)}")
+    print(f"Fingerprinting a 640x480 image: {percentiles(hash_times)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Measure predict_image latency percentiles at a steady request rate.
+
+A stub model with a fixed inference time stands in for the Xception model
+unless --real-model is given, so the numbers isolate the overhead of the
+prediction path itself (preprocessing, logging, sleeps). Run it on two
+commits to compare p50/p99.
+
+Usage:
+    python benchmarks/bench_predict_latency.py --requests 200 --concurrency 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Don't let a background load replace the stub model halfway through a run
+os.environ['MODEL_LOADING'] = 'lazy'
+
+import app  # noqa: E402
+
+
+class StubModel:
+    """Stands in for a Keras model: sleeps for a fixed inference time and returns a fake probability"""
+    def __init__(self, inference_ms):
+        self.inference_s = inference_ms / 1000.0
+
+    def predict(self, batch, verbose=0):
+        return self.predict_on_batch(batch)
+
+    def predict_on_batch(self, batch):
+        time.sleep(self.inference_s)
+        return np.full((len(batch), 1), 0.7, dtype=np.float32)
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=0, help='Target requests per second (0 = as fast as possible)')
+    parser.add_argument('--inference-ms', type=float, default=20, help='Stub model inference time')
+    parser.add_argument('--real-model', action='store_true', help='Use the loaded model instead of the stub')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    args = parser.parse_args()
+
+    if args.real_model:
+        app.ensure_model_loaded('image')
+    else:
+        app.image_model = StubModel(args.inference_ms)
+        app.image_model_loaded = True
+    image = np.random.default_rng(0).integers(0, 255, size=(args.height, args.width, 3), dtype=np.uint8)
+
+    def one_request(i):
+        if args.rate:
+            # Hold a steady arrival rate instead of firing everything at once
+            delay = start + i / args.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        t0 = time.perf_counter()
+        app.predict_image(image)
+        return time.perf_counter() - t0
+
+    app.predict_image(image)  # warm-up
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(one_request, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    print(f"requests={args.requests} concurrency={args.concurrency} log_level={app.LOG_LEVEL}")
+    print(f"p50={percentile(latencies, 50):.1f}ms p90={percentile(latencies, 90):.1f}ms "
+          f"p99={percentile(latencies, 99):.1f}ms throughput={args.requests / elapsed:.1f} req/s")
+
+
+if __name__ == '__main__':
+    main()
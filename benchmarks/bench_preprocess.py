@@ -0,0 +1,83 @@
+"""
+Compare per-image preprocessing against the batched, preallocated path.
+
+Generates a mixed-size set of synthetic BGR frames (and a few grayscale and
+BGRA ones) and preprocesses them in batches, once with
+preprocess_image_for_model + np.concatenate (the old video path) and once
+with BatchPreprocessor. Reports time per frame and the peak memory
+allocated by each path (tracemalloc), and checks both give the same batch.
+
+Usage:
+    python benchmarks/bench_preprocess.py --frames 256 --batch-size 32
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Only preprocessing is measured; a background model load would compete with it
+os.environ['MODEL_LOADING'] = 'lazy'
+
+import app  # noqa: E402
+
+SIZES = [(480, 640), (720, 1280), (1080, 1920), (360, 480)]
+
+
+def make_frames(count):
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(count):
+        height, width = SIZES[i % len(SIZES)]
+        if i % 16 == 7:
+            frames.append(rng.integers(0, 255, size=(height, width), dtype=np.uint8))
+        elif i % 16 == 15:
+            frames.append(rng.integers(0, 255, size=(height, width, 4), dtype=np.uint8))
+        else:
+            frames.append(rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8))
+    return frames
+
+
+def per_image(batch, target_size):
+    return np.concatenate([app.preprocess_image_for_model(frame, target_size=target_size) for frame in batch], axis=0)
+
+
+def batched(batch, target_size):
+    return app.get_batch_preprocessor(target_size).preprocess(batch)[0]
+
+
+def measure(fn, frames, batch_size, target_size):
+    fn(frames[:batch_size], target_size)  # warm-up (and buffer allocation for the batched path)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(0, len(frames), batch_size):
+        fn(frames[i:i + batch_size], target_size)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=256)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--size', type=int, default=224, help='Model input side length')
+    args = parser.parse_args()
+
+    frames = make_frames(args.frames)
+    target_size = (args.size, args.size)
+    batch = frames[:args.batch_size]
+    max_diff = float(np.abs(per_image(batch, target_size) - batched(batch, target_size)).max())
+
+    print(f"frames={args.frames} batch_size={args.batch_size} target={args.size}x{args.size} max_abs_diff={max_diff:.2e}")
+    for name, fn in (('per-image', per_image), ('batched', batched)):
+        elapsed, peak = measure(fn, frames, args.batch_size, target_size)
+        print(f"{name:>10}: {elapsed / args.frames * 1000:.3f} ms/frame, peak allocated {peak / 2**20:.1f} MiB")
+
+
+if __name__ == '__main__':
+    main()
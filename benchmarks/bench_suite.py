@@ -0,0 +1,227 @@
+"""
+Benchmark suite for the image and video detection paths.
+
+Generates synthetic images and a synthetic video locally, then measures
+latency percentiles and throughput for:
+
+    preprocess_image_for_model, predict_image        (per image size)
+    frame_capture, evaluate_video_frames             (synthetic video)
+    POST /upload-image, POST /upload-video           (Flask test client)
+
+Stub models with a fixed inference time stand in for the real ones unless
+--real-models is given, so runs on different machines and commits measure
+the app's own overhead. The result cache is bypassed and uploads, frames and
+the prediction log go to a temporary directory. Results are written as JSON;
+pass --compare with an earlier file to print the p50 change per benchmark.
+
+Usage:
+    python benchmarks/bench_suite.py --output bench.json
+    python benchmarks/bench_suite.py --image-sizes 640x480,1920x1080 --video-duration 20 --compare bench.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Don't let a background load replace the stub models halfway through a run
+os.environ['MODEL_LOADING'] = 'lazy'
+
+import app  # noqa: E402
+from bench_frame_sampling import make_synthetic_video  # noqa: E402
+from bench_predict_latency import StubModel  # noqa: E402
+
+
+class NullCache:
+    """Result cache that never hits, so every request takes the full path"""
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def stats(self):
+        return {}
+
+
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def summarize(latencies, items_per_call=1):
+    latencies = np.asarray(latencies)
+    return {
+        'count': int(len(latencies)),
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000.0, 3),
+        'p90_ms': round(float(np.percentile(latencies, 90)) * 1000.0, 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)) * 1000.0, 3),
+        'mean_ms': round(float(latencies.mean()) * 1000.0, 3),
+        'min_ms': round(float(latencies.min()) * 1000.0, 3),
+        'max_ms': round(float(latencies.max()) * 1000.0, 3),
+        'items_per_second': round(items_per_call * len(latencies) / float(latencies.sum()), 2)
+    }
+
+
+def measure(fn, iterations, warmup=1):
+    """Call fn() warmup + iterations times; returns the timed latencies (seconds) and the last result"""
+    result = None
+    for _ in range(warmup):
+        result = fn()
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies, result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def setup_app(args, tmp):
+    """Point the app at stub (or real) models and keep everything it writes inside tmp"""
+    if args.real_models:
+        app.load_models(wait=True)
+    else:
+        app.image_model = StubModel(args.inference_ms)
+        app.video_model = StubModel(args.inference_ms)
+        app.image_model_loaded = app.video_model_loaded = True
+        app.model_status.update(image='ready', video='ready')
+    app.result_cache = NullCache()
+    app.prediction_log = app.PredictionLog(db_path=os.path.join(tmp, 'predictions.db'))
+    for key in ('IMAGE_UPLOAD_FOLDER', 'VIDEO_UPLOAD_FOLDER'):
+        app.app.config[key] = os.path.join(tmp, key.lower())
+        os.makedirs(app.app.config[key], exist_ok=True)
+
+
+def image_benchmarks(args, results):
+    client = app.app.test_client()
+    rng = np.random.default_rng(args.seed)
+    for width, height in args.image_sizes:
+        label = f"{width}x{height}"
+        image = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+        latencies, _ = measure(lambda: app.preprocess_image_for_model(image), args.iterations)
+        results[f'preprocess_image_for_model[{label}]'] = summarize(latencies)
+        latencies, _ = measure(lambda: app.predict_image(image), args.iterations)
+        results[f'predict_image[{label}]'] = summarize(latencies)
+        encoded = cv2.imencode('.jpg', image)[1].tobytes()
+
+        def upload():
+            response = client.post('/upload-image', data={'file': (io.BytesIO(encoded), 'bench.jpg')})
+            if 'error' in response.get_json():
+                raise RuntimeError(response.get_json()['error'])
+        latencies, _ = measure(upload, args.iterations)
+        results[f'route:/upload-image[{label}]'] = summarize(latencies)
+
+
+def video_benchmarks(args, results, tmp):
+    width, height = args.video_size
+    label = f"{width}x{height}@{args.video_fps}fps,{args.video_duration:g}s"
+    video_path = os.path.join(tmp, 'bench.mp4')
+    make_synthetic_video(video_path, args.video_duration, args.video_fps, width, height)
+    iterations = max(1, args.iterations // 10)
+
+    def capture():
+        app.frame_store.discard('bench')
+        return app.frame_capture(video_path, analysis_id='bench')
+    latencies, (frames, frame_refs) = measure(capture, iterations)
+    results[f'frame_capture[{label}]'] = dict(summarize(latencies, len(frames)), frames=len(frames))
+    # Frame results carry thumbnail URLs, which need a request context
+    with app.app.test_request_context():
+        latencies, _ = measure(lambda: app.evaluate_video_frames(frames, frame_refs), iterations)
+    results[f'evaluate_video_frames[{label}]'] = dict(summarize(latencies, len(frames)), frames=len(frames))
+    app.frame_store.discard('bench')
+
+    client = app.app.test_client()
+
+    def upload():
+        with open(video_path, 'rb') as f:
+            response = client.post('/upload-video', data={'file': (f, 'bench.mp4')})
+        if 'error' in response.get_json():
+            raise RuntimeError(response.get_json()['error'])
+    latencies, _ = measure(upload, iterations)
+    results[f'route:/upload-video[{label}]'] = dict(summarize(latencies), frames=len(frames))
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    print(f"\n{'benchmark':<58}{'p50 before':>12}{'p50 after':>12}{'change':>9}")
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['p50_ms'], stats['p50_ms']
+        change = (after - before) / before * 100.0 if before else 0.0
+        print(f"{name:<58}{before:>10.2f}ms{after:>10.2f}ms{change:>+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default='bench_results.json', help='JSON file to write the results to')
+    parser.add_argument('--compare', help='Earlier results JSON to compare against')
+    parser.add_argument('--iterations', type=int, default=50, help='Timed calls per image benchmark '
+                        '(video benchmarks run a tenth as many)')
+    parser.add_argument('--image-sizes', type=lambda text: [parse_size(s) for s in text.split(',')],
+                        default=[(640, 480), (1280, 720), (1920, 1080)])
+    parser.add_argument('--video-size', type=parse_size, default=(1280, 720))
+    parser.add_argument('--video-fps', type=int, default=30)
+    parser.add_argument('--video-duration', type=float, default=10, help='Synthetic video length in seconds')
+    parser.add_argument('--inference-ms', type=float, default=20, help='Stub model inference time per call')
+    parser.add_argument('--real-models', action='store_true', help='Use the models in model/ instead of stubs')
+    parser.add_argument('--skip-video', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_app(args, tmp)
+        image_benchmarks(args, results)
+        if not args.skip_video:
+            video_benchmarks(args, results, tmp)
+        app.prediction_log.flush()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'tensorflow': app.tf.__version__,
+            'models': 'real' if args.real_models else f'stub ({args.inference_ms:g} ms)',
+            'inference_backend': app.INFERENCE_BACKEND,
+            'args': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'benchmark':<58}{'p50':>10}{'p90':>10}{'p99':>10}{'items/s':>10}")
+    for name, stats in results.items():
+        print(f"{name:<58}{stats['p50_ms']:>8.2f}ms{stats['p90_ms']:>8.2f}ms{stats['p99_ms']:>8.2f}ms"
+              f"{stats['items_per_second']:>10.1f}")
+    print(f"Wrote {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
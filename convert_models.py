@@ -0,0 +1,133 @@
+"""
+Convert the Keras .h5 models to optimized inference formats and check that
+the converted models agree with the originals.
+
+Usage:
+    python convert_models.py --backend tflite-fp16
+    python convert_models.py --backend tflite-int8 --model image
+    python convert_models.py --backend savedmodel --samples static/uploads/images
+
+Formats:
+    tflite-fp16  TFLite with float16 weights
+    tflite-int8  TFLite with dynamic-range int8 weight quantization
+    savedmodel   SavedModel with a tf.function-compiled serving signature
+
+The converted files are written next to the .h5 files, where app.py picks
+them up when started with INFERENCE_BACKEND set to the same format.
+"""
+import argparse
+import glob
+import os
+import sys
+
+# Convert with the Keras backend regardless of the environment the app runs with
+os.environ['INFERENCE_BACKEND'] = 'keras'
+os.environ['INFERENCE_WORKERS'] = '0'
+# Load only the models being converted, when main() asks for them
+os.environ['MODEL_LOADING'] = 'lazy'
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+import tensorflow as tf  # noqa: E402
+
+import app  # noqa: E402
+
+MODELS = {
+    'image': (app.IMAGE_MODEL_PATH, (299, 299), lambda: app.image_model),
+    'video': (app.VIDEO_MODEL_PATH, (224, 224), lambda: app.video_model),
+}
+
+
+def convert_tflite(model, output_path, backend):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if backend == 'tflite-fp16':
+        converter.target_spec.supported_types = [tf.float16]
+    # Fall back to TF kernels for ops without a builtin TFLite kernel (e.g. some LSTM variants)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+
+
+def convert_savedmodel(model, output_path, input_size):
+    serve = tf.function(
+        lambda images: model(images, training=False),
+        input_signature=[tf.TensorSpec([None, input_size[0], input_size[1], 3], tf.float32, name='images')],
+        jit_compile=False
+    )
+    module = tf.Module()
+    # Attach the model so the module tracks its variables; serve only closes over it
+    module.model = model
+    module.serve = serve
+    tf.saved_model.save(module, output_path, signatures={'serving_default': serve})
+
+
+def load_samples(samples_dir, input_size, count):
+    """Preprocessed sample inputs: real images from samples_dir if given, else random noise"""
+    batches = []
+    if samples_dir:
+        paths = sorted(glob.glob(os.path.join(samples_dir, '*')))[:count]
+        for path in paths:
+            image = cv2.imread(path)
+            if image is not None:
+                batches.append(app.preprocess_image_for_model(image, target_size=input_size))
+    if not batches:
+        rng = np.random.default_rng(0)
+        batches = [rng.random((1, input_size[0], input_size[1], 3), dtype=np.float32) for _ in range(count)]
+    return np.concatenate(batches, axis=0)
+
+
+def fake_probabilities(outputs):
+    outputs = np.asarray(outputs).reshape(len(outputs), -1)
+    return outputs[:, 1] if outputs.shape[1] == 2 else outputs[:, -1]
+
+
+def check_parity(keras_model, converted_model, inputs, tolerance):
+    """Compare Keras and converted outputs; returns True if verdicts agree and outputs are within tolerance"""
+    reference = np.concatenate([keras_model.predict(x[np.newaxis], verbose=0) for x in inputs])
+    converted = np.concatenate([converted_model.predict_on_batch(x[np.newaxis]) for x in inputs])
+    difference = np.abs(reference - converted)
+    agreement = np.mean((fake_probabilities(reference) > 0.5) == (fake_probabilities(converted) > 0.5))
+    print(f"  samples={len(inputs)} max_abs_diff={difference.max():.5f} mean_abs_diff={difference.mean():.5f} "
+          f"verdict_agreement={agreement:.1%}")
+    return difference.max() <= tolerance and agreement == 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', required=True, choices=[b for b in app.INFERENCE_BACKENDS if b != 'keras'])
+    parser.add_argument('--model', choices=['image', 'video', 'all'], default='all')
+    parser.add_argument('--samples', help='Directory of images to use for the parity check')
+    parser.add_argument('--num-samples', type=int, default=16)
+    parser.add_argument('--tolerance', type=float, default=0.05, help='Maximum allowed absolute output difference')
+    parser.add_argument('--skip-parity', action='store_true')
+    args = parser.parse_args()
+
+    ok = True
+    for name in (['image', 'video'] if args.model == 'all' else [args.model]):
+        keras_path, input_size, get_model = MODELS[name]
+        keras_model = get_model() if app.ensure_model_loaded(name) else None
+        if keras_model is None:
+            print(f"{name}: Keras model not loaded from {keras_path}, skipping")
+            ok = False
+            continue
+        output_path = app.converted_model_path(keras_path, args.backend)
+        print(f"{name}: converting {keras_path} -> {output_path}")
+        if args.backend == 'savedmodel':
+            convert_savedmodel(keras_model, output_path, input_size)
+            converted_model = app.SavedModelRunner(output_path)
+        else:
+            convert_tflite(keras_model, output_path, args.backend)
+            converted_model = app.TFLiteModel(output_path)
+        if not args.skip_parity:
+            inputs = load_samples(args.samples, input_size, args.num_samples)
+            if check_parity(keras_model, converted_model, inputs, args.tolerance):
+                print(f"{name}: parity check passed")
+            else:
+                print(f"{name}: parity check FAILED (tolerance {args.tolerance})")
+                ok = False
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,32 @@
+# Gunicorn settings for Truth Shield: gunicorn -c gunicorn.conf.py app:app
+#
+# With PRELOAD_MODELS=1 the app and both models are loaded once in the master
+# process before the workers are forked, so the workers share the model weights
+# (copy-on-write) instead of each loading its own copy on boot. TensorFlow's
+# runtime is not fully fork-safe, so this works best with a TFLite
+# INFERENCE_BACKEND; with the Keras backend prefer the default background loading.
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '2'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+
+# With INFERENCE_WORKERS=N the models live in N inference worker processes started by the
+# master (see inference_pool.py), and the web workers only send them batches
+inference_workers = int(os.environ.get('INFERENCE_WORKERS', '0'))
+
+preload_app = os.environ.get('PRELOAD_MODELS', '0') == '1'
+if preload_app and inference_workers == 0:
+    # Finish loading in the master so every worker inherits ready models
+    os.environ.setdefault('MODEL_LOADING', 'eager')
+
+if inference_workers > 0:
+    from inference_pool import InferencePool
+
+    def on_starting(server):
+        # Web workers forked from here inherit the pool's INFERENCE_AUTHKEY
+        server.inference_pool = InferencePool(inference_workers).start()
+
+    def on_exit(server):
+        server.inference_pool.stop()
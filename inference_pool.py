@@ -0,0 +1,222 @@
+"""
+Inference worker pool: the image and video models in a few dedicated
+processes instead of in every web worker.
+
+Usage:
+    python inference_pool.py --workers 2
+    INFERENCE_WORKERS=2 gunicorn -c gunicorn.conf.py app:app
+
+Each worker process is pinned to its own share of the CPU cores, sizes
+TensorFlow's intra-op thread pool to match, loads both models once and
+serves predictions on a local socket. Web processes started with
+INFERENCE_WORKERS=N load no models: app.RemoteModel copies each batch into
+a shared-memory segment and sends the worker only its name, shape and
+dtype. Model memory then grows with the number of inference workers, not
+web workers, and inference no longer competes with request handling for
+the web workers' GIL.
+
+gunicorn.conf.py starts the pool in the gunicorn master, and python app.py
+starts it next to the development server. To run the pool separately, start
+this script with the same INFERENCE_AUTHKEY and INFERENCE_SOCKET_PREFIX as
+the web processes.
+"""
+import argparse
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Listener
+
+import numpy as np
+
+# Number of inference worker processes; 0 keeps the models inside each web process
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', '0'))
+INFERENCE_SOCKET_PREFIX = os.environ.get('INFERENCE_SOCKET_PREFIX',
+                                         os.path.join(tempfile.gettempdir(), 'truthshield-inference'))
+# Independent ops run side by side per worker; each op is split over the worker's cores
+INFERENCE_INTER_OP_THREADS = int(os.environ.get('INFERENCE_INTER_OP_THREADS', '1'))
+
+
+def inference_address(index):
+    """Socket address of inference worker index"""
+    if sys.platform == 'win32':
+        return rf'\\.\pipe\{os.path.basename(INFERENCE_SOCKET_PREFIX)}-{index}'
+    return f"{INFERENCE_SOCKET_PREFIX}-{index}.sock"
+
+
+def inference_authkey():
+    """Shared secret for worker connections, generated (and exported to child processes) on first use"""
+    if not os.environ.get('INFERENCE_AUTHKEY'):
+        os.environ['INFERENCE_AUTHKEY'] = secrets.token_hex(16)
+    return os.environ['INFERENCE_AUTHKEY'].encode()
+
+
+def core_sets(workers):
+    """Split the cores this process may run on into workers contiguous, near-equal groups"""
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+    if workers >= len(cores):
+        return [[cores[i % len(cores)]] for i in range(workers)]
+    bounds = np.linspace(0, len(cores), workers + 1).round().astype(int)
+    return [cores[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+class InferencePool:
+    """
+    Starts and stops the inference worker processes. Workers are plain
+    subprocesses running this script, so each sets its core affinity and
+    thread counts before TensorFlow is imported.
+    """
+    def __init__(self, workers=None):
+        self.workers = workers or INFERENCE_WORKERS
+        self.processes = []
+
+    def start(self):
+        authkey = inference_authkey()
+        for index, cores in enumerate(core_sets(self.workers)):
+            env = dict(os.environ, INFERENCE_AUTHKEY=authkey.decode(), INFERENCE_WORKERS='0', MODEL_LOADING='lazy',
+                       TF_NUM_INTRAOP_THREADS=str(len(cores)),
+                       TF_NUM_INTEROP_THREADS=str(INFERENCE_INTER_OP_THREADS), OMP_NUM_THREADS=str(len(cores)))
+            command = [sys.executable, os.path.abspath(__file__), 'worker', '--index', str(index),
+                       '--cores', ','.join(map(str, cores))]
+            self.processes.append(subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__))))
+        return self
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.processes = []
+
+    def wait(self):
+        """Block until a worker exits; returns its exit code"""
+        while True:
+            for process in self.processes:
+                if process.poll() is not None:
+                    return process.returncode
+            time.sleep(1)
+
+
+def attach_segment(name):
+    """Map a client's shared-memory segment without taking ownership of it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the segment too, and this process's resource
+        # tracker would unlink it on exit; the client owns it and unlinks it itself
+        segment = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix':
+            resource_tracker.unregister(segment._name, 'shared_memory')
+        return segment
+
+
+def run_model(app, kind, batch, model_lock):
+    model = app.image_model if kind == 'image' else app.video_model
+    if model is None:
+        raise RuntimeError(f"No {kind} model loaded")
+    # One model call at a time, so each call gets all of this worker's cores
+    with model_lock:
+        return np.array(model.predict_on_batch(batch))
+
+
+def serve_connection(conn, app, ready, model_lock):
+    """
+    Answer one web thread's requests: ('predict', kind, segment, shape, dtype)
+    runs the model on the array in the named shared-memory segment, and
+    ('status',) reports the model status. Replies are ('ok', value) or
+    ('error', message).
+    """
+    segment = None
+    try:
+        while True:
+            try:
+                request = conn.recv()
+            except (EOFError, OSError):
+                return
+            ready.wait()
+            try:
+                if request[0] == 'status':
+                    conn.send(('ok', dict(app.model_status)))
+                    continue
+                _, kind, name, shape, dtype = request
+                if segment is None or segment.name != name:
+                    # The client replaced its segment with a bigger one; the old one is its to unlink
+                    if segment is not None:
+                        segment.close()
+                    segment = attach_segment(name)
+                conn.send(('ok', run_model(app, kind, np.ndarray(shape, dtype=dtype, buffer=segment.buf),
+                                           model_lock)))
+            except Exception as e:
+                conn.send(('error', str(e)))
+    finally:
+        if segment is not None:
+            segment.close()
+        conn.close()
+
+
+def run_worker(index, cores):
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+    import app
+    import tensorflow as tf
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(int(os.environ['TF_NUM_INTRAOP_THREADS']))
+        tf.config.threading.set_inter_op_parallelism_threads(int(os.environ['TF_NUM_INTEROP_THREADS']))
+    except (RuntimeError, KeyError, ValueError) as e:
+        app.logger.warning(f"Inference worker {index}: could not set TensorFlow thread counts: {e}")
+    address = inference_address(index)
+    if sys.platform != 'win32' and os.path.exists(address):
+        os.remove(address)
+    listener = Listener(address, authkey=inference_authkey())
+    ready = threading.Event()
+    model_lock = threading.Lock()
+
+    def accept():
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                app.logger.warning(f"Inference worker {index}: rejected a connection: {e}")
+                continue
+            threading.Thread(target=serve_connection, args=(conn, app, ready, model_lock), daemon=True).start()
+
+    # Accept connections while the models load; requests wait for them
+    threading.Thread(target=accept, name='inference-accept', daemon=True).start()
+    app.logger.info(f"Inference worker {index} listening on {address}, cores {cores or 'all'}")
+    app.load_models(wait=True)
+    ready.set()
+    threading.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command')
+    worker_parser = commands.add_parser('worker', help='Run a single inference worker (started by the pool)')
+    worker_parser.add_argument('--index', type=int, required=True)
+    worker_parser.add_argument('--cores', default='', help='Comma-separated CPU cores to pin to')
+    parser.add_argument('--workers', type=int, default=INFERENCE_WORKERS or 1, help='Inference worker processes')
+    args = parser.parse_args()
+    if args.command == 'worker':
+        run_worker(args.index, [int(core) for core in args.cores.split(',') if core])
+        return 0
+    if not os.environ.get('INFERENCE_AUTHKEY'):
+        parser.error('set INFERENCE_AUTHKEY to a shared secret; the web processes need the same one')
+    pool = InferencePool(args.workers).start()
+    print(f"Started {args.workers} inference workers at {inference_address('N')}")
+    try:
+        return pool.wait()
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        pool.stop()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -344,21 +344,25 @@ function uploadAndAnalyzeVideo(file) {
     const formData = new FormData();
     formData.append("file", file);
     formData.append("user", USER_DATA.username);
+    // Ask for server-sent events, so frame results show up batch by batch
+    formData.append("stream", "1");
 
+    const partial = { frames: [], finished: false };
     fetch("/upload-video", {
         method: "POST",
         body: formData,
     })
-        .then((response) => response.json())
-        .then((data) => {
-            showLoading(false);
-
-            if (data.error) {
-                showToast(data.error, "error");
-            } else {
-                displayVideoResults(data, file);
-                logAnalysis(file.name, data.result, data.confidence);
+        .then((response) => {
+            const contentType = response.headers.get("Content-Type") || "";
+            if (!contentType.includes("text/event-stream")) {
+                // Upload errors come back as plain JSON
+                return response.json().then((data) => handleVideoEvent("result", data, file, partial));
             }
+            return readEventStream(response, (event, data) => handleVideoEvent(event, data, file, partial))
+                .then(() => {
+                    // The connection closed before a result or error event (server restart, proxy timeout)
+                    if (!partial.finished) handleStreamInterrupted(partial);
+                });
         })
         .catch((error) => {
             showLoading(false);
@@ -367,6 +371,98 @@ function uploadAndAnalyzeVideo(file) {
         });
 }
 
+// Read a server-sent event stream from a fetch response, calling onEvent(event, data) for each event
+function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    function pump() {
+        return reader.read().then(({ done, value }) => {
+            buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+            let boundary;
+            while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+                const block = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let event = "message";
+                let data = "";
+                block.split("\n").forEach((line) => {
+                    if (line.startsWith("event: ")) event = line.slice(7);
+                    else if (line.startsWith("data: ")) data += line.slice(6);
+                });
+                // Lines starting with ":" are keep-alive comments
+                if (data) onEvent(event, JSON.parse(data));
+            }
+            if (!done) return pump();
+        });
+    }
+    return pump();
+}
+
+function handleVideoEvent(event, data, file, partial) {
+    if (event === "frames") {
+        // First results are in: swap the loading overlay for the results as they grow
+        showLoading(false);
+        displayPartialVideoResults(data, partial);
+    } else if (event === "error" || data.error) {
+        partial.finished = true;
+        showLoading(false);
+        showToast(data.error, "error");
+    } else if (event === "result") {
+        partial.finished = true;
+        showLoading(false);
+        displayVideoResults(data, file);
+        logAnalysis(file.name, data.result, data.confidence);
+    }
+}
+
+function handleStreamInterrupted(partial) {
+    showLoading(false);
+    const explanation = document.getElementById("video-result-explanation");
+    if (explanation && partial.frames.length > 0) {
+        // Keep the frames already scored, but don't present their running verdict as final
+        explanation.innerHTML = `
+            <div class="explanation-content">
+                <p>The analysis stopped after ${partial.frames.length} frames before it finished.
+                The verdict above is incomplete; please try again.</p>
+            </div>
+        `;
+    }
+    showToast("Video analysis was interrupted before it finished", "error");
+}
+
+function displayPartialVideoResults(data, partial) {
+    if (partial.frames.length === 0 && framesContainer) {
+        framesContainer.innerHTML = "";
+        const framesGrid = document.createElement("div");
+        framesGrid.className = "frames-grid";
+        framesContainer.appendChild(framesGrid);
+    }
+    const framesGrid = framesContainer ? framesContainer.querySelector(".frames-grid") : null;
+    data.frames.forEach((frame) => {
+        if (framesGrid) framesGrid.appendChild(createFrameItem(frame, partial.frames.length));
+        partial.frames.push(frame);
+    });
+
+    displayVideoVerdict(data.result, data.confidence, data.progress);
+
+    const explanation = document.getElementById("video-result-explanation");
+    if (explanation) {
+        const expected = data.frames_expected ? ` of about ${data.frames_expected}` : "";
+        explanation.innerHTML = `
+            <div class="explanation-content">
+                <p>Analysis in progress: ${data.frames_processed}${expected} frames analyzed so far.
+                The verdict above is based on these frames and may still change.</p>
+            </div>
+        `;
+    }
+
+    if (videoResultsContainer && videoResultsContainer.style.display !== "block") {
+        videoResultsContainer.style.display = "block";
+        videoResultsContainer.scrollIntoView({ behavior: "smooth", block: "start" });
+    }
+}
+
 function trackAnalysisProgress() {
     // Simulate progress for better UX
     let progress = 0;
@@ -431,47 +527,7 @@ function displayVideoResults(data, file) {
         videoPreview.load();
     }
 
-    // Display verdict
-    const resultVerdict = document.getElementById("video-result-verdict");
-    let verdictClass = "";
-    let verdictText = "";
-
-    if (data.result === "Real") {
-        verdictClass = "verdict-real";
-        verdictText = `<i class="fas fa-check-circle"></i> This video appears to be Real`;
-    } else {
-        verdictClass = "verdict-fake";
-        verdictText = `<i class="fas fa-exclamation-triangle"></i> This video appears to be Fake`;
-    }
-
-    if (resultVerdict) {
-        resultVerdict.className = "result-verdict " + verdictClass;
-        resultVerdict.innerHTML = verdictText;
-    }
-
-    // Display confidence meter
-    const confidenceMeter = document.getElementById("video-confidence-meter");
-    const confidenceValueEl = document.getElementById("video-confidence-value");
-
-    if (confidenceMeter && confidenceValueEl) {
-        confidenceMeter.style.width = "0%";
-        confidenceMeter.className = "meter-fill";
-
-        if (data.result === "Real") {
-            confidenceMeter.classList.add("real");
-        } else {
-            confidenceMeter.classList.add("fake");
-        }
-
-        // Extract numeric value from percentage string
-        const confidenceValue = parseFloat(data.confidence);
-        confidenceValueEl.textContent = `${confidenceValue.toFixed(1)}%`;
-
-        // Animate confidence meter
-        setTimeout(() => {
-            confidenceMeter.style.width = `${confidenceValue}%`;
-        }, 100);
-    }
+    displayVideoVerdict(data.result, data.confidence);
 
     // Display frames with confidence scores - WITHOUT POPUP FUNCTIONALITY
     if (framesContainer) {
@@ -484,52 +540,7 @@ function displayVideoResults(data, file) {
             framesContainer.appendChild(framesGrid);
 
             data.frames.forEach((frame, index) => {
-                const frameItem = document.createElement("div");
-                frameItem.className = `frame-item ${frame.result.toLowerCase()}`;
-
-                // Extract confidence value from percentage string
-                const confidenceValue = parseFloat(frame.confidence);
-
-                // Create image element with proper error handling
-                const frameImage = document.createElement("img");
-                frameImage.className = "frame-image";
-                frameImage.alt = `Frame ${index + 1}`;
-                frameImage.src = frame.path;
-                frameImage.loading = "lazy"; // Lazy load images
-
-                // Add error handling for broken images
-                frameImage.onerror = function () {
-                    this.style.display = "none";
-                    const placeholder = document.createElement("div");
-                    placeholder.className = "frame-placeholder";
-                    placeholder.innerHTML = `<i class="fas fa-image"></i><span>Frame ${index + 1}</span>`;
-                    this.parentNode.insertBefore(placeholder, this);
-                };
-
-                frameItem.innerHTML = `
-                    <div class="frame-image-container"></div>
-                    <div class="frame-info">
-                        <div class="frame-header">
-                            <span class="frame-number">Frame ${index + 1}</span>
-                            <span class="frame-result ${frame.result.toLowerCase()}">${frame.result}</span>
-                        </div>
-                        <div class="frame-confidence">
-                            <div class="mini-meter-container">
-                                <div class="mini-meter-bar">
-                                    <div class="mini-meter-fill ${frame.result.toLowerCase()}" style="width: ${confidenceValue}%;"></div>
-                                </div>
-                                <span class="mini-meter-value">${frame.confidence}</span>
-                            </div>
-                        </div>
-                    </div>
-                `;
-
-                // Insert the image into the container
-                frameItem.querySelector(".frame-image-container").appendChild(frameImage);
-                
-                // NO CLICK EVENT - We deliberately don't add any click event to avoid popup
-                
-                framesGrid.appendChild(frameItem);
+                framesGrid.appendChild(createFrameItem(frame, index));
             });
         } else {
             framesContainer.innerHTML = `
@@ -596,6 +607,109 @@ function displayVideoResults(data, file) {
     }
 }
 
+// Show the overall verdict and confidence; with progress, as a running verdict of an analysis in progress
+function displayVideoVerdict(result, confidence, progress) {
+    const resultVerdict = document.getElementById("video-result-verdict");
+    let verdictClass = "";
+    let verdictText = "";
+
+    if (result === "Real") {
+        verdictClass = "verdict-real";
+        verdictText = `<i class="fas fa-check-circle"></i> This video appears to be Real`;
+    } else {
+        verdictClass = "verdict-fake";
+        verdictText = `<i class="fas fa-exclamation-triangle"></i> This video appears to be Fake`;
+    }
+    if (progress !== undefined) {
+        verdictText = `<i class="fas fa-spinner fa-spin"></i> Analyzing (${Math.round(progress)}%): so far ${result}`;
+    }
+
+    if (resultVerdict) {
+        resultVerdict.className = "result-verdict " + verdictClass;
+        resultVerdict.innerHTML = verdictText;
+    }
+
+    // Display confidence meter
+    const confidenceMeter = document.getElementById("video-confidence-meter");
+    const confidenceValueEl = document.getElementById("video-confidence-value");
+
+    if (confidenceMeter && confidenceValueEl) {
+        // Extract numeric value from percentage string
+        const confidenceValue = parseFloat(confidence);
+        confidenceValueEl.textContent = `${confidenceValue.toFixed(1)}%`;
+
+        if (progress !== undefined) {
+            // Running updates move the meter directly
+            confidenceMeter.className = `meter-fill ${result === "Real" ? "real" : "fake"}`;
+            confidenceMeter.style.width = `${confidenceValue}%`;
+            return;
+        }
+        confidenceMeter.style.width = "0%";
+        confidenceMeter.className = "meter-fill";
+
+        if (result === "Real") {
+            confidenceMeter.classList.add("real");
+        } else {
+            confidenceMeter.classList.add("fake");
+        }
+
+        // Animate confidence meter
+        setTimeout(() => {
+            confidenceMeter.style.width = `${confidenceValue}%`;
+        }, 100);
+    }
+}
+
+// Build the card for one analyzed frame
+function createFrameItem(frame, index) {
+    const frameItem = document.createElement("div");
+    frameItem.className = `frame-item ${frame.result.toLowerCase()}`;
+
+    // Extract confidence value from percentage string
+    const confidenceValue = parseFloat(frame.confidence);
+
+    // Create image element with proper error handling
+    const frameImage = document.createElement("img");
+    frameImage.className = "frame-image";
+    frameImage.alt = `Frame ${index + 1}`;
+    frameImage.src = frame.path;
+    frameImage.loading = "lazy"; // Lazy load images
+
+    // Add error handling for broken images
+    frameImage.onerror = function () {
+        this.style.display = "none";
+        const placeholder = document.createElement("div");
+        placeholder.className = "frame-placeholder";
+        placeholder.innerHTML = `<i class="fas fa-image"></i><span>Frame ${index + 1}</span>`;
+        this.parentNode.insertBefore(placeholder, this);
+    };
+
+    frameItem.innerHTML = `
+        <div class="frame-image-container"></div>
+        <div class="frame-info">
+            <div class="frame-header">
+                <span class="frame-number">Frame ${index + 1}</span>
+                <span class="frame-result ${frame.result.toLowerCase()}">${frame.result}</span>
+            </div>
+            <div class="frame-confidence">
+                <div class="mini-meter-container">
+                    <div class="mini-meter-bar">
+                        <div class="mini-meter-fill ${frame.result.toLowerCase()}" style="width: ${confidenceValue}%;"></div>
+                    </div>
+                    <span class="mini-meter-value">${frame.confidence}</span>
+                </div>
+            </div>
+        </div>
+    `;
+
+    // Insert the image into the container
+    frameItem.querySelector(".frame-image-container").appendChild(frameImage);
+
+    // NO CLICK EVENT - We deliberately don't add any click event to avoid popup
+
+    return frameItem;
+}
+
 // History Management
 function saveVideoToHistory() {
     if (!currentVideoResult) {
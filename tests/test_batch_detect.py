@@ -0,0 +1,102 @@
+import io
+import json
+import os
+import tarfile
+import zipfile
+
+import cv2
+import numpy as np
+import pytest
+
+import app
+
+PNG = cv2.imencode('.png', np.full((16, 16, 3), 127, np.uint8))[1].tobytes()
+
+
+def zip_of(names):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name in names:
+            archive.writestr(name, PNG)
+    return buffer.getvalue()
+
+
+def tar_of(names):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        for name in names:
+            info = tarfile.TarInfo(name)
+            info.size = len(PNG)
+            archive.addfile(info, io.BytesIO(PNG))
+    return buffer.getvalue()
+
+
+def test_yields_images_from_uploads_and_archives(make_file):
+    files = [make_file('a.png', PNG), make_file('set.zip', zip_of(['b.jpg', 'readme.txt', 'c.png'])),
+             make_file('set.tar.gz', tar_of(['d.png']))]
+    items = list(app.iter_batch_uploads(files))
+    assert [name for name, _, _ in items] == ['a.png', 'b.jpg', 'c.png', 'd.png']
+    assert all(data == PNG and error is None for _, data, error in items)
+
+
+def test_unusable_entries_carry_an_error(make_file, monkeypatch):
+    monkeypatch.setattr(app, 'BATCH_DETECT_MAX_ITEM_BYTES', len(PNG) - 1)
+    files = [make_file('notes.txt', b'hello'), make_file('broken.zip', b'not a zip'), make_file('big.png', PNG)]
+    items = list(app.iter_batch_uploads(files))
+    assert [(name, error) for name, _, error in items] == [
+        ('notes.txt', 'Invalid file format'),
+        ('broken.zip', items[1][2]),
+        ('big.png', 'File too large'),
+    ]
+    assert items[1][2].startswith('Invalid archive')
+    assert all(data is None for _, data, _ in items)
+
+
+@pytest.mark.parametrize('limit', [1, 3, 5])
+def test_invalid_entries_count_towards_the_cap(make_file, monkeypatch, limit):
+    monkeypatch.setattr(app, 'BATCH_DETECT_MAX_ITEMS', limit)
+    files = [make_file(f'notes{i}.txt', b'hello') for i in range(10)] + [make_file('a.png', PNG)]
+    items = list(app.iter_batch_uploads(files))
+    assert len(items) == limit
+    assert all(error == 'Invalid file format' for _, _, error in items)
+
+
+def test_cap_applies_inside_archives(make_file, monkeypatch):
+    monkeypatch.setattr(app, 'BATCH_DETECT_MAX_ITEMS', 4)
+    files = [make_file('a.png', PNG), make_file('set.zip', zip_of([f'{i}.png' for i in range(10)])),
+             make_file('b.png', PNG)]
+    items = list(app.iter_batch_uploads(files))
+    assert [name for name, _, _ in items] == ['a.png', '0.png', '1.png', '2.png']
+
+
+def test_bad_archive_past_the_cap_is_not_reported(make_file, monkeypatch):
+    monkeypatch.setattr(app, 'BATCH_DETECT_MAX_ITEMS', 2)
+    files = [make_file('a.png', PNG), make_file('set.zip', zip_of(['b.png'])), make_file('broken.zip', b'junk')]
+    assert [name for name, _, _ in app.iter_batch_uploads(files)] == ['a.png', 'b.png']
+
+
+def stored_images():
+    for path in list(app.upload_store.pending):
+        app.upload_store.wait(path)
+    return set(os.listdir(app.IMAGE_UPLOAD_FOLDER))
+
+
+def test_endpoint_streams_a_line_per_item_and_stores_only_scored_images(client):
+    before = stored_images()
+    response = client.post('/batch-detect', content_type='multipart/form-data', data={'files': [
+        (io.BytesIO(PNG), 'good.png'),
+        (io.BytesIO(b'not an image'), 'broken.png'),
+        (io.BytesIO(b'hello'), 'notes.txt'),
+    ]})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['name'] for line in lines] == ['good.png', 'broken.png', 'notes.txt']
+    assert lines[0]['result'] in ('Real', 'Fake')
+    assert lines[1]['error'] == 'Failed to read image'
+    assert lines[2]['error'] == 'Invalid file format'
+    assert len(stored_images() - before) == 1
+
+
+def test_endpoint_without_files_is_an_error(client):
+    assert 'error' in client.post('/batch-detect', data={}).get_json()
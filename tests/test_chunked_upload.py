@@ -0,0 +1,144 @@
+import threading
+
+import pytest
+
+import app
+
+VIDEO = bytes(range(256)) * 4
+
+
+def start_upload(client, size=len(VIDEO), filename='clip.avi'):
+    response = client.post('/uploads/video', json={'filename': filename, 'size': size})
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def put_chunk(client, upload, offset, data):
+    return client.put(upload['upload_url'], data=data, headers={'Upload-Offset': str(offset)})
+
+
+@pytest.mark.parametrize('payload, status', [
+    ({'filename': 'clip.avi'}, 400),
+    ({'filename': 'clip.avi', 'size': 'lots'}, 400),
+    ({'filename': 'clip.avi', 'size': 0}, 400),
+    ({'filename': 'notes.txt', 'size': 10}, 400),
+    ({'filename': 'clip.avi', 'size': app.VIDEO_UPLOAD_MAX_BYTES + 1}, 413),
+])
+def test_create_rejects_bad_requests(client, payload, status):
+    response = client.post('/uploads/video', json=payload)
+    assert response.status_code == status
+    assert 'error' in response.get_json()
+
+
+def test_chunks_advance_the_offset(client):
+    upload = start_upload(client)
+    assert upload['offset'] == 0
+    assert upload['status'] == 'uploading'
+    assert upload['job_id']
+
+    response = put_chunk(client, upload, 0, VIDEO[:300])
+    assert response.status_code == 200
+    assert response.get_json()['offset'] == 300
+
+    response = put_chunk(client, upload, 300, VIDEO[300:])
+    assert response.status_code == 200
+    state = response.get_json()
+    assert state['offset'] == len(VIDEO)
+    assert state['status'] == 'complete'
+    with open(app.PartialUpload.load(upload['upload_id']).filepath, 'rb') as f:
+        assert f.read() == VIDEO
+
+
+def test_retried_or_skipped_chunk_conflicts_with_resume_offset(client):
+    upload = start_upload(client)
+    assert put_chunk(client, upload, 0, VIDEO[:100]).status_code == 200
+
+    # The same chunk again, e.g. after a dropped response
+    response = put_chunk(client, upload, 0, VIDEO[:100])
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 100
+
+    # A chunk past what has arrived
+    response = put_chunk(client, upload, 200, VIDEO[200:300])
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 100
+
+    # Nothing was written by the rejected chunks
+    assert client.get(upload['upload_url']).get_json()['offset'] == 100
+
+
+def test_chunk_after_completion_conflicts(client):
+    upload = start_upload(client)
+    assert put_chunk(client, upload, 0, VIDEO).status_code == 200
+    # The last chunk retried once the upload has been moved into place
+    response = put_chunk(client, upload, 0, VIDEO)
+    assert response.status_code == 409
+    assert response.get_json()['status'] == 'complete'
+    assert response.get_json()['offset'] == len(VIDEO)
+
+
+def test_oversized_chunks_are_rejected(client, monkeypatch):
+    upload = start_upload(client)
+    # Past the declared size
+    response = put_chunk(client, upload, 0, VIDEO + b'extra')
+    assert response.status_code == 413
+
+    monkeypatch.setattr(app, 'VIDEO_UPLOAD_CHUNK_BYTES', 64)
+    response = put_chunk(client, upload, 0, VIDEO[:65])
+    assert response.status_code == 413
+    assert client.get(upload['upload_url']).get_json()['offset'] == 0
+
+
+def test_missing_offset_or_empty_chunk_is_a_bad_request(client):
+    upload = start_upload(client)
+    assert client.put(upload['upload_url'], data=VIDEO[:10]).status_code == 400
+    assert client.put(upload['upload_url'], data=VIDEO[:10], headers={'Upload-Offset': 'start'}).status_code == 400
+    assert put_chunk(client, upload, 0, b'').status_code == 400
+
+
+@pytest.mark.parametrize('method', ['get', 'put', 'delete'])
+@pytest.mark.parametrize('upload_id', ['0' * 32, '..', 'not-an-upload'])
+def test_unknown_upload_is_not_found(client, method, upload_id):
+    response = getattr(client, method)(f'/uploads/video/{upload_id}', headers={'Upload-Offset': '0'}, data=b'x')
+    assert response.status_code == 404
+
+
+def test_resume_state_comes_from_disk(client):
+    upload = start_upload(client)
+    put_chunk(client, upload, 0, VIDEO[:512])
+    # What any other worker would see
+    loaded = app.PartialUpload.load(upload['upload_id'])
+    assert loaded.received == 512
+    assert loaded.status == 'uploading'
+    assert loaded.job_id == upload['job_id']
+    state = client.get(upload['upload_url']).get_json()
+    assert state['offset'] == 512
+    assert state['status_url'] == upload['status_url']
+
+
+def test_delete_abandons_upload(client):
+    upload = start_upload(client)
+    put_chunk(client, upload, 0, VIDEO[:100])
+    response = client.delete(upload['upload_url'])
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'abandoned'
+    assert client.get(upload['upload_url']).status_code == 404
+    assert put_chunk(client, upload, 100, VIDEO[100:200]).status_code == 404
+
+
+def test_concurrent_chunks_at_one_offset_append_once():
+    upload = app.partial_uploads.create('clip.avi', len(VIDEO))
+    barrier = threading.Barrier(4)
+    accepted = []
+
+    def send():
+        barrier.wait()
+        accepted.append(app.PartialUpload.load(upload.id).append(0, VIDEO[:100]))
+
+    threads = [threading.Thread(target=send) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert accepted.count(True) == 1
+    assert upload.received == 100
@@ -0,0 +1,100 @@
+import os
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+import app
+
+
+@pytest.fixture
+def store(tmp_path):
+    return app.FrameStore(directory=str(tmp_path))
+
+
+def frame(height=64, width=48, value=90):
+    return np.full((height, width, 3), value, np.uint8)
+
+
+def files(store, analysis_id):
+    return sorted(os.listdir(os.path.join(store.directory, analysis_id)))
+
+
+def test_frames_are_stored_raw_until_first_requested(store):
+    ref = store.put('analysis', 3, frame())
+    assert ref == app.FrameRef('analysis', 3)
+    assert store.has(ref)
+    assert files(store, 'analysis') == ['3.npy']
+
+    data = store.get_jpeg('analysis', 3)
+    decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    assert decoded.shape == (64, 48, 3)
+    assert files(store, 'analysis') == ['3.jpg']
+    assert store.has(ref)
+    assert store.get_jpeg('analysis', 3) == data
+
+
+def test_large_frames_are_downscaled(store):
+    store.put('analysis', 0, frame(height=1080, width=1920))
+    height, width = store.get_frame('analysis', 0).shape[:2]
+    assert max(height, width) == app.FRAME_THUMBNAIL_MAX_SIDE
+
+
+def test_get_frame_returns_exact_pixels_before_encoding(store):
+    original = np.random.RandomState(0).randint(0, 256, (32, 32, 3), dtype=np.uint8)
+    store.put('analysis', 0, original)
+    assert np.array_equal(store.get_frame('analysis', 0), original)
+    store.get_jpeg('analysis', 0)
+    assert store.get_frame('analysis', 0).shape == original.shape
+
+
+@pytest.mark.parametrize('analysis_id', ['', '..', '../etc', 'a/b'])
+def test_invalid_analysis_ids_are_refused(store, analysis_id):
+    assert store.get_jpeg(analysis_id, 0) is None
+    assert store.get_frame(analysis_id, 0) is None
+    with pytest.raises(ValueError):
+        store.put(analysis_id, 0, frame())
+
+
+def test_missing_frames_are_none(store):
+    store.put('analysis', 0, frame())
+    assert store.get_jpeg('analysis', 1) is None
+    assert store.get_frame('other', 0) is None
+    assert not store.has(app.FrameRef('analysis', 1))
+
+
+def test_discard_removes_an_analysis(store):
+    store.put('analysis', 0, frame())
+    store.discard('analysis')
+    assert store.get_frame('analysis', 0) is None
+
+
+def test_sweep_drops_least_recently_used_analyses_but_keeps_the_current_one(tmp_path):
+    store = app.FrameStore(directory=str(tmp_path), max_bytes=5 * frame().nbytes)
+    for i, analysis_id in enumerate(['oldest', 'older', 'current']):
+        store.put(analysis_id, 0, frame())
+        store.put(analysis_id, 1, frame())
+        touched = time.time() - 100 + i
+        os.utime(os.path.join(store.directory, analysis_id), (touched, touched))
+    store.sweep(keep='oldest', force=True)
+    assert sorted(os.listdir(store.directory)) == ['current', 'oldest']
+    assert store.stats()['analyses'] == 2
+
+
+def test_sweep_drops_expired_analyses(tmp_path):
+    store = app.FrameStore(directory=str(tmp_path), ttl=60)
+    store.put('expired', 0, frame())
+    store.put('recent', 0, frame())
+    expired = time.time() - 120
+    os.utime(os.path.join(store.directory, 'expired'), (expired, expired))
+    store.sweep(force=True)
+    assert os.listdir(store.directory) == ['recent']
+
+
+def test_thumbnail_route_serves_stored_frames(client):
+    app.frame_store.put('route-test', 0, frame())
+    response = client.get('/frames/route-test/0.jpg')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert client.get('/frames/route-test/1.jpg').status_code == 404
@@ -0,0 +1,120 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return app.SQLiteJobBackend(db_path=str(tmp_path / 'jobs.db'))
+
+
+def orphan(backend, job_id):
+    """Age a job's heartbeat as if the worker running it had exited"""
+    with sqlite3.connect(backend.db_path) as conn:
+        conn.execute('UPDATE jobs SET heartbeat_at = ? WHERE id = ?', (time.time() - app.JOB_STALE_SECONDS - 1, job_id))
+
+
+def test_backends_must_implement_every_operation():
+    with pytest.raises(TypeError):
+        app.JobBackend()
+
+    class Partial(app.JobBackend):
+        def create(self, kind, **fields):
+            return 'job'
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_job_round_trips(backend):
+    job_id = backend.create('video', video_url='/v.mp4', upload_id='abc')
+    job = backend.get(job_id)
+    assert job['id'] == job_id
+    assert job['status'] == 'queued'
+    assert job['video_url'] == '/v.mp4'
+    assert job['upload_id'] == 'abc'
+    assert job['frames'] == []
+    assert backend.get('missing') is None
+
+
+def test_frames_append_in_order_and_update_replaces_them(backend):
+    job_id = backend.create('video')
+    backend.append_frames(job_id, [{'frame': 'frame0'}, {'frame': 'frame1'}])
+    backend.append_frames(job_id, [{'frame': 'frame2'}])
+    assert [frame['frame'] for frame in backend.get(job_id)['frames']] == ['frame0', 'frame1', 'frame2']
+    backend.update(job_id, status='done', progress=100.0, frames=[{'frame': 'final'}])
+    job = backend.get(job_id)
+    assert job['status'] == 'done'
+    assert job['progress'] == 100.0
+    assert job['frames'] == [{'frame': 'final'}]
+
+
+def test_other_workers_see_the_same_jobs(backend):
+    job_id = backend.create('video')
+    other = app.SQLiteJobBackend(db_path=backend.db_path)
+    other.update(job_id, status='running', progress=40.0)
+    assert backend.get(job_id)['progress'] == 40.0
+
+
+def test_only_orphaned_unfinished_jobs_are_stale(backend):
+    job_id = backend.create('video')
+    assert not backend.stale(backend.get(job_id))
+    orphan(backend, job_id)
+    assert backend.stale(backend.get(job_id))
+    backend.update(job_id, status='done')
+    assert not backend.stale(backend.get(job_id))
+
+
+def test_an_orphaned_job_is_claimed_once(backend):
+    job_id = backend.create('video')
+    orphan(backend, job_id)
+    workers = [app.SQLiteJobBackend(db_path=backend.db_path) for _ in range(4)]
+    barrier = threading.Barrier(len(workers))
+    claims = []
+
+    def claim(worker):
+        barrier.wait()
+        claims.append(worker.claim(job_id))
+
+    threads = [threading.Thread(target=claim, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert claims.count(True) == 1
+    assert not backend.stale(backend.get(job_id))
+
+
+def test_a_live_job_is_not_claimed(backend):
+    job_id = backend.create('video')
+    assert not app.SQLiteJobBackend(db_path=backend.db_path).claim(job_id)
+
+
+def test_unknown_job_is_not_found(client):
+    assert client.get('/jobs/missing').status_code == 404
+
+
+def test_orphaned_job_without_input_fails_on_poll(client):
+    job_id = app.job_backend.create('video', filepath='gone.mp4')
+    orphan(app.job_backend, job_id)
+    status = client.get(f'/jobs/{job_id}').get_json()
+    assert status['status'] == 'error'
+    assert status['error'] == 'The worker running this job exited'
+
+
+def test_orphaned_job_restarts_from_its_video_on_poll(client, tmp_path, monkeypatch):
+    video = tmp_path / 'clip.mp4'
+    video.write_bytes(b'video')
+    restarted = threading.Event()
+    monkeypatch.setattr(app, 'run_video_job', lambda job_id, filepath, *args: restarted.set())
+    job_id = app.job_backend.create('video', filepath=str(video), unique_filename='clip.mp4', base_url='http://localhost/')
+    app.job_backend.update(job_id, status='running', progress=50.0, frames=[{'frame': 'frame0'}])
+    orphan(app.job_backend, job_id)
+    status = client.get(f'/jobs/{job_id}').get_json()
+    assert status['status'] == 'queued'
+    assert status['progress'] == 0.0
+    assert status['frames'] == []
+    assert restarted.wait(5)
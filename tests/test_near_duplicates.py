@@ -0,0 +1,105 @@
+import json
+import random
+
+import cv2
+import numpy as np
+import pytest
+
+import app
+
+
+def random_fingerprint(rng, probes=1):
+    return [(rng.getrandbits(64), rng.getrandbits(64)) for _ in range(probes)]
+
+
+def flip_bits(fingerprint, bits):
+    flipped = 0
+    for bit in range(bits):
+        flipped |= 1 << (bit * 7)
+    return [(phash ^ flipped, dhash ^ flipped) for phash, dhash in fingerprint]
+
+
+@pytest.fixture
+def rng():
+    return random.Random(0)
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / 'near_duplicates.jsonl')
+
+
+def test_close_fingerprint_matches(rng):
+    index = app.NearDuplicateIndex(path='', max_distance=6)
+    fingerprint = random_fingerprint(rng)
+    index.add('image', fingerprint, 'key', 'model')
+    key, similarity = index.lookup('image', flip_bits(fingerprint, 3), 'model')
+    assert key == 'key'
+    assert similarity == pytest.approx(1.0 - 6 / 128.0)
+
+
+def test_exact_fingerprint_matches_fully(rng):
+    index = app.NearDuplicateIndex(path='', max_distance=6)
+    fingerprint = random_fingerprint(rng, probes=3)
+    index.add('video', fingerprint, 'key', 'model')
+    assert index.lookup('video', fingerprint, 'model') == ('key', 1.0)
+
+
+@pytest.mark.parametrize('kind, flipped_bits, model', [
+    ('image', 10, 'model'),
+    ('video', 0, 'model'),
+    ('image', 0, 'other model'),
+])
+def test_distant_fingerprint_other_kind_or_model_misses(rng, kind, flipped_bits, model):
+    index = app.NearDuplicateIndex(path='', max_distance=6)
+    fingerprint = random_fingerprint(rng)
+    index.add('image', fingerprint, 'key', 'model')
+    assert index.lookup(kind, flip_bits(fingerprint, flipped_bits), model) is None
+
+
+def test_video_needs_every_probe_close(rng):
+    index = app.NearDuplicateIndex(path='', max_distance=6)
+    fingerprint = random_fingerprint(rng, probes=3)
+    index.add('video', fingerprint, 'key', 'model')
+    query = fingerprint[:2] + flip_bits(fingerprint[2:], 10)
+    assert index.lookup('video', query, 'model') is None
+    assert index.lookup('video', fingerprint[:2], 'model') is None
+
+
+def test_workers_see_each_others_entries(rng, index_path):
+    first = app.NearDuplicateIndex(path=index_path, max_distance=6)
+    second = app.NearDuplicateIndex(path=index_path, max_distance=6)
+    fingerprint = random_fingerprint(rng)
+    first.add('image', fingerprint, 'from-first', 'model')
+    assert second.lookup('image', fingerprint, 'model') == ('from-first', 1.0)
+    # And an index started later loads the file
+    assert app.NearDuplicateIndex(path=index_path).lookup('image', fingerprint, 'model')[0] == 'from-first'
+
+
+def test_trimming_keeps_other_workers_newest_entries(rng, index_path):
+    workers = [app.NearDuplicateIndex(path=index_path, max_entries=10, max_distance=6) for _ in range(2)]
+    added = []
+    for i in range(25):
+        fingerprint = random_fingerprint(rng)
+        workers[i % 2].add('image', fingerprint, f'key{i}', 'model')
+        added.append(fingerprint)
+    with open(index_path) as f:
+        keys = [json.loads(line)['key'] for line in f]
+    assert len(keys) <= 10
+    assert keys == sorted(keys, key=lambda key: int(key[3:]))
+    assert keys[-1] == 'key24'
+    # Both workers still find the newest entries, whichever of them added each
+    for worker in workers:
+        for i in (22, 23, 24):
+            assert worker.lookup('image', added[i], 'model') == (f'key{i}', 1.0)
+        assert worker.lookup('image', added[0], 'model') is None
+
+
+def test_image_fingerprint_survives_resizing_and_reencoding():
+    rng = np.random.RandomState(0)
+    image = cv2.resize(rng.randint(0, 256, (12, 16, 3), dtype=np.uint8), (320, 240), interpolation=cv2.INTER_CUBIC)
+    copy = cv2.imdecode(cv2.imencode('.jpg', cv2.resize(image, (200, 150)), [cv2.IMWRITE_JPEG_QUALITY, 70])[1],
+                        cv2.IMREAD_COLOR)
+    (phash, dhash), (copy_phash, copy_dhash) = app.image_fingerprint(image), app.image_fingerprint(copy)
+    assert app.hamming_distance(phash, copy_phash) <= app.NEAR_DUPLICATE_MAX_DISTANCE
+    assert app.hamming_distance(dhash, copy_dhash) <= app.NEAR_DUPLICATE_MAX_DISTANCE
@@ -0,0 +1,137 @@
+import os
+import time
+
+import pytest
+
+import app
+
+DIGEST = 'ab' * 32
+
+
+@pytest.fixture
+def demo_models(monkeypatch):
+    """Both models settled as failed loads, so results are produced in demo mode"""
+    monkeypatch.setattr(app, 'model_versions', {})
+    monkeypatch.setitem(app.model_status, 'image', 'failed')
+    monkeypatch.setitem(app.model_status, 'video', 'failed')
+
+
+def test_key_is_stable_and_per_kind(demo_models):
+    assert app.result_cache_key('image', DIGEST) == app.result_cache_key('image', DIGEST)
+    assert app.result_cache_key('image', DIGEST) != app.result_cache_key('video', DIGEST)
+    assert app.result_cache_key('image', DIGEST) != app.result_cache_key('image', 'cd' * 32)
+
+
+@pytest.mark.parametrize('kind', ['image', 'video'])
+@pytest.mark.parametrize('setting, value', [
+    ('FACE_DETECTION', not app.FACE_DETECTION),
+    ('FACE_CROP_MARGIN', app.FACE_CROP_MARGIN + 0.1),
+    ('FACE_MAX_FACES', app.FACE_MAX_FACES + 1),
+])
+def test_face_settings_change_the_key(demo_models, monkeypatch, kind, setting, value):
+    before = app.result_cache_key(kind, DIGEST)
+    monkeypatch.setattr(app, setting, value)
+    assert app.result_cache_key(kind, DIGEST) != before
+
+
+@pytest.mark.parametrize('setting, value', [
+    ('VIDEO_SAMPLING_POLICY', 'keyframes' if app.VIDEO_SAMPLING_POLICY != 'keyframes' else 'fps'),
+    ('VIDEO_SAMPLE_FPS', app.VIDEO_SAMPLE_FPS + 1),
+    ('VIDEO_FRAME_BUDGET', app.VIDEO_FRAME_BUDGET + 1),
+    ('VIDEO_EARLY_EXIT', not app.VIDEO_EARLY_EXIT),
+])
+def test_video_settings_change_only_the_video_key(demo_models, monkeypatch, setting, value):
+    image_before = app.result_cache_key('image', DIGEST)
+    video_before = app.result_cache_key('video', DIGEST)
+    monkeypatch.setattr(app, setting, value)
+    assert app.result_cache_key('video', DIGEST) != video_before
+    assert app.result_cache_key('image', DIGEST) == image_before
+
+
+def test_early_exit_parameters_matter_only_when_enabled(demo_models, monkeypatch):
+    monkeypatch.setattr(app, 'VIDEO_EARLY_EXIT', False)
+    before = app.result_cache_key('video', DIGEST)
+    monkeypatch.setattr(app, 'VIDEO_EARLY_EXIT_MIN_FRAMES', app.VIDEO_EARLY_EXIT_MIN_FRAMES + 1)
+    assert app.result_cache_key('video', DIGEST) == before
+    monkeypatch.setattr(app, 'VIDEO_EARLY_EXIT', True)
+    enabled = app.result_cache_key('video', DIGEST)
+    monkeypatch.setattr(app, 'VIDEO_SPRT_ALPHA', app.VIDEO_SPRT_ALPHA / 2)
+    assert app.result_cache_key('video', DIGEST) != enabled
+
+
+def test_adaptive_parameters_matter_only_for_the_adaptive_policy(demo_models, monkeypatch):
+    monkeypatch.setattr(app, 'VIDEO_SAMPLING_POLICY', 'fps')
+    before = app.result_cache_key('video', DIGEST)
+    monkeypatch.setattr(app, 'VIDEO_SCENE_CUT_THRESHOLD', app.VIDEO_SCENE_CUT_THRESHOLD + 1)
+    assert app.result_cache_key('video', DIGEST) == before
+    monkeypatch.setattr(app, 'VIDEO_SAMPLING_POLICY', 'adaptive')
+    adaptive = app.result_cache_key('video', DIGEST)
+    monkeypatch.setattr(app, 'VIDEO_MOTION_THRESHOLD', app.VIDEO_MOTION_THRESHOLD + 1)
+    assert app.result_cache_key('video', DIGEST) != adaptive
+
+
+def test_failed_model_load_is_not_retried_per_lookup(demo_models, monkeypatch):
+    calls = []
+    monkeypatch.setattr(app, 'ensure_model_loaded', lambda kind: calls.append(kind))
+    for _ in range(5):
+        assert app.model_version('image') == 'demo'
+        app.result_cache_key('image', DIGEST)
+    assert calls == []
+
+
+def test_model_version_is_worked_out_once(monkeypatch):
+    monkeypatch.setattr(app, 'model_versions', {})
+    monkeypatch.setitem(app.model_status, 'video', 'not_loaded')
+    calls = []
+    monkeypatch.setattr(app, 'ensure_model_loaded', lambda kind: calls.append(kind))
+    for _ in range(3):
+        app.model_version('video')
+    assert calls == ['video']
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return app.ResultCache(max_entries=2, disk_dir=str(tmp_path), ttl=60)
+
+
+def test_get_returns_what_was_set(cache):
+    assert cache.get('missing') is None
+    cache.set('key', {'result': 'Fake', 'confidence': 91.0})
+    assert cache.get('key') == {'result': 'Fake', 'confidence': 91.0}
+    assert cache.stats()['memory_hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_memory_evictions_fall_back_to_disk(cache):
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key)
+    assert 'a' not in cache.memory
+    assert cache.get('a') == 'a'
+    assert cache.stats()['disk_hits'] == 1
+
+
+def test_disk_tier_is_shared_between_instances(cache, tmp_path):
+    cache.set('key', [1, 2, 3])
+    assert app.ResultCache(disk_dir=str(tmp_path)).get('key') == [1, 2, 3]
+
+
+def test_expired_entries_are_dropped(cache):
+    cache.set('key', 'value')
+    _, value = cache.memory['key']
+    cache.memory['key'] = (time.time() - 1, value)
+    path = cache._disk_path('key')
+    os.utime(path, (time.time() - 120, time.time() - 120))
+    assert cache.get('key') is None
+    assert not os.path.exists(path)
+
+
+def test_disk_tier_stays_under_its_size_cap(tmp_path):
+    cache = app.ResultCache(disk_dir=str(tmp_path), max_disk_bytes=1000)
+    for i in range(20):
+        cache.set(f'key{i}', 'x' * 100)
+        # Distinct mtimes, so the oldest entries are the ones evicted
+        os.utime(cache._disk_path(f'key{i}'), (1000 + i, time.time() - 60 + i))
+    sizes = [entry.stat().st_size for entry in os.scandir(tmp_path)]
+    assert sum(sizes) <= 1000
+    assert os.path.exists(cache._disk_path('key19'))
+    assert not os.path.exists(cache._disk_path('key0'))
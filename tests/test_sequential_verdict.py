@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+import app
+
+
+def frames_seen_at_stop(verdict, scores):
+    for seen, score in enumerate(scores, start=1):
+        verdict.update([score])
+        if verdict.should_stop(seen):
+            return seen
+    return None
+
+
+@pytest.mark.parametrize('score', [0.95, 0.05])
+def test_clear_stream_settles_once_min_frames_seen(score):
+    verdict = app.SequentialVerdict(min_frames=8, max_frames=300)
+    assert frames_seen_at_stop(verdict, [score] * 300) == 8
+
+
+@pytest.mark.parametrize('score, outcome', [(0.8, 'upper'), (0.2, 'lower')])
+def test_settles_past_the_bound_it_crossed(score, outcome):
+    verdict = app.SequentialVerdict(min_frames=1, max_frames=300)
+    seen = frames_seen_at_stop(verdict, [score] * 300)
+    assert 1 < seen < 300
+    if outcome == 'upper':
+        assert verdict.llr >= verdict.upper
+    else:
+        assert verdict.llr <= verdict.lower
+
+
+def test_ambiguous_stream_runs_to_max_frames():
+    verdict = app.SequentialVerdict(min_frames=8, max_frames=50)
+    assert frames_seen_at_stop(verdict, [0.5, 0.52, 0.48] * 100) == 50
+
+
+def test_mixed_evidence_cancels_out():
+    verdict = app.SequentialVerdict(min_frames=1, max_frames=300)
+    assert frames_seen_at_stop(verdict, [0.9, 0.1] * 100) is None
+
+
+def test_stricter_error_rates_need_more_frames():
+    loose = app.SequentialVerdict(min_frames=1, max_frames=300, alpha=0.1, beta=0.1)
+    strict = app.SequentialVerdict(min_frames=1, max_frames=300, alpha=0.001, beta=0.001)
+    assert frames_seen_at_stop(loose, [0.8] * 300) < frames_seen_at_stop(strict, [0.8] * 300)
+
+
+class FrameSource:
+    """A decoder stand-in that records how far it was read and whether it was closed"""
+    def __init__(self, count):
+        self.count = count
+        self.produced = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed or self.produced >= self.count:
+            raise StopIteration
+        self.produced += 1
+        return np.zeros((8, 8, 3), np.uint8), f'frame{self.produced}'
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fixed_scores(monkeypatch):
+    """Score every frame in demo mode with the given fake score"""
+    def use(score):
+        def simulate(frames, frame_paths, start_index=0):
+            results = [{'frame': f'frame{start_index + i}', 'fake_score': score} for i in range(len(frames))]
+            return results, score * len(results)
+        monkeypatch.setattr(app, 'simulate_video_batch', simulate)
+    return use
+
+
+def test_video_stream_stops_early_and_closes_the_decoder(fixed_scores):
+    fixed_scores(0.95)
+    source = FrameSource(200)
+    summary = {}
+    results, result, _ = app.evaluate_video_stream(source, batch_size=32, early_exit=True, summary=summary)
+    assert result == 'Fake'
+    assert summary == {'frames_evaluated': app.VIDEO_EARLY_EXIT_MIN_FRAMES, 'stopped_early': True}
+    assert len(results) == app.VIDEO_EARLY_EXIT_MIN_FRAMES
+    assert source.closed
+    assert source.produced < 200
+
+
+def test_video_stream_without_early_exit_scores_every_frame(fixed_scores):
+    fixed_scores(0.95)
+    summary = {}
+    results, _, _ = app.evaluate_video_stream(FrameSource(40), batch_size=16, early_exit=False, summary=summary)
+    assert summary == {'frames_evaluated': 40, 'stopped_early': False}
+    assert len(results) == 40
+
+
+def test_settling_on_the_last_frame_is_not_an_early_stop(fixed_scores):
+    fixed_scores(0.95)
+    count = app.VIDEO_EARLY_EXIT_MIN_FRAMES
+    summary = {}
+    app.evaluate_video_stream(FrameSource(count), batch_size=count, early_exit=True, summary=summary)
+    assert summary == {'frames_evaluated': count, 'stopped_early': False}
@@ -0,0 +1,300 @@
+"""
+Truth Shield command line tools.
+
+    scan   Score every image and video under a directory (or listed in a
+           manifest) without the web app, and write the verdicts to CSV or
+           Parquet.
+
+Usage:
+    python truthshield.py scan media/ --output results.csv
+    python truthshield.py scan --manifest paths.txt --output results.parquet --workers 8
+
+Decoding (and face localization, when FACE_DETECTION is on) runs in a pool
+of worker processes; the main process scores the decoded images and video
+frames in full model batches. Every finished item is appended to a
+checkpoint file next to the output, so an interrupted scan picks up where it
+stopped when run again with the same output. Writing Parquet needs pyarrow.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Workers only decode, and the main process loads the models itself once the pool is up
+os.environ['MODEL_LOADING'] = 'lazy'
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+import app  # noqa: E402
+
+INPUT_SIZES = {'image': (299, 299), 'video': (224, 224)}
+FIELDS = ['path', 'type', 'result', 'confidence', 'fake_score', 'frames', 'faces', 'error']
+
+
+def media_kind(path):
+    if app.allowed_image_file(path):
+        return 'image'
+    if app.allowed_video_file(path):
+        return 'video'
+    return None
+
+
+def collect_paths(directory=None, manifest=None):
+    """Media paths to scan: every image/video under directory, or the paths listed in a manifest (one per line)"""
+    if manifest:
+        with open(manifest) as f:
+            paths = [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+        return [path for path in paths if media_kind(path)]
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        paths.extend(os.path.join(root, name) for name in sorted(files) if media_kind(name))
+    return paths
+
+
+def model_regions(image, faces, size):
+    """The image's classification regions, already resized to the model input size"""
+    return [cv2.resize(region, size) for region in app.classification_regions(image, faces)]
+
+
+def decode_item(path):
+    """
+    Process-pool worker: decode one file into model-sized uint8 regions.
+    Returns (path, kind, frames, faces, error), where frames holds one list of
+    regions per image or sampled video frame.
+    """
+    kind = media_kind(path)
+    size = INPUT_SIZES[kind]
+    detector = app.get_face_detector()
+    try:
+        if kind == 'image':
+            image = cv2.imread(path)
+            if image is None:
+                return path, kind, None, 0, 'Failed to read image'
+            faces = detector.detect(image) if detector is not None else []
+            return path, kind, [model_regions(image, faces, size)], len(faces), None
+        frames = []
+        tracker = app.FaceTracker(detector) if detector is not None else None
+        faces_seen = 0
+        vid_obj = cv2.VideoCapture(path)
+        try:
+            if not vid_obj.isOpened():
+                return path, kind, None, 0, 'Could not open video file'
+            for _, img in app.select_video_frames(vid_obj, path):
+                faces = tracker.faces(img) if tracker is not None else []
+                faces_seen = max(faces_seen, len(faces))
+                frames.append(model_regions(img, faces, size))
+        finally:
+            vid_obj.release()
+        if not frames:
+            return path, kind, None, 0, 'Failed to extract frames from video'
+        return path, kind, frames, faces_seen, None
+    except Exception as e:
+        return path, kind, None, 0, str(e)
+
+
+class BatchScorer:
+    """
+    Collects decoded regions of one model's items and runs the model on them
+    batch_size at a time. Items are returned from add()/flush() once every
+    one of their regions has been scored.
+    """
+    def __init__(self, kind, batch_size):
+        self.kind = kind
+        self.batch_size = batch_size
+        self.pending = []
+
+    def add(self, item):
+        item['fake_scores'] = [None] * len(item['frames'])
+        item['remaining'] = sum(len(regions) for regions in item['frames'])
+        for frame_index, regions in enumerate(item.pop('frames')):
+            self.pending.extend((item, frame_index, region) for region in regions)
+        finished = []
+        while len(self.pending) >= self.batch_size:
+            finished.extend(self._run(self.pending[:self.batch_size]))
+            self.pending = self.pending[self.batch_size:]
+        return finished
+
+    def flush(self):
+        finished = self._run(self.pending) if self.pending else []
+        self.pending = []
+        return finished
+
+    def _run(self, entries):
+        batch, positions = app.get_batch_preprocessor(INPUT_SIZES[self.kind]).preprocess(
+            [region for _, _, region in entries])
+        if self.kind == 'image':
+            raw_predictions = np.asarray(app.image_model.predict_on_batch(batch)) if positions else []
+            fake_probability = app.image_fake_probability
+        else:
+            raw_predictions = app.predict_video_batch(batch) if positions else []
+            fake_probability = app.video_fake_probability
+        scores = {}
+        for position, raw_prediction in zip(positions, raw_predictions):
+            if not isinstance(raw_prediction, Exception):
+                scores[position] = fake_probability(raw_prediction)
+        finished = []
+        for position, (item, frame_index, _) in enumerate(entries):
+            if position in scores:
+                # Each image or frame is as fake as its most fake-looking face
+                previous = item['fake_scores'][frame_index]
+                item['fake_scores'][frame_index] = max(previous or 0.0, scores[position])
+            item['remaining'] -= 1
+            if item['remaining'] == 0:
+                finished.append(item)
+        return finished
+
+
+def result_row(item):
+    """The output row for a finished (or failed) item"""
+    row = {'path': item['path'], 'type': item['kind'], 'result': 'Error', 'confidence': 0.0, 'fake_score': None,
+           'frames': 0, 'faces': item.get('faces', 0), 'error': item.get('error')}
+    scores = item.get('fake_scores')
+    if row['error'] or not scores:
+        return row
+    if item['kind'] == 'image':
+        if scores[0] is None:
+            row['error'] = 'Failed to preprocess image'
+            return row
+        fake_score = scores[0]
+        result, confidence, _ = app.image_verdict(fake_score, row['faces'])
+    else:
+        # Frames that could not be scored count as neutral, as in the web app
+        frame_scores = [0.5 if score is None else score for score in scores]
+        fake_score = sum(frame_scores) / len(frame_scores)
+        result, confidence = app.summarize_video_scores(sum(frame_scores), len(frame_scores))
+    row.update(result=result, confidence=round(float(confidence), 1), fake_score=round(float(fake_score), 4),
+               frames=len(scores))
+    return row
+
+
+def load_checkpoint(path):
+    """Rows already written to a checkpoint file, keyed by media path"""
+    rows = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interrupted run
+                rows[row['path']] = row
+    return rows
+
+
+def write_output(rows, output_path):
+    if output_path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.Table.from_pylist(rows), output_path)
+        return
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def scan(args):
+    if args.output.endswith('.parquet'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("Writing Parquet needs pyarrow (pip install pyarrow), or use a .csv output", file=sys.stderr)
+            return 2
+    paths = collect_paths(args.directory, args.manifest)
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint.jsonl"
+    done = {} if args.restart else load_checkpoint(checkpoint_path)
+    todo = [path for path in paths if path not in done]
+    print(f"{len(paths)} media files, {len(paths) - len(todo)} already in {checkpoint_path}, {len(todo)} to scan")
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as pool, \
+            open(checkpoint_path, 'w' if args.restart else 'a') as checkpoint:
+        todo_iter = iter(todo)
+        in_flight = set()
+
+        def refill():
+            # Keep a bounded number of decoded items waiting, so memory stays flat on big scans
+            for path in todo_iter:
+                in_flight.add(pool.submit(decode_item, path))
+                if len(in_flight) >= args.workers * 2:
+                    break
+
+        refill()
+        for kind in sorted({media_kind(path) for path in todo}):
+            if not app.ensure_model_loaded(kind):
+                print(f"The {kind} model could not be loaded; scan needs the real models", file=sys.stderr)
+                return 1
+        scorers = {kind: BatchScorer(kind, args.batch_size) for kind in INPUT_SIZES}
+        start = time.perf_counter()
+        last_report = start
+        # Spawned workers take a while to import their libraries; measure steady throughput from the first result
+        first_decoded = None
+        scanned = errors = 0
+
+        def record(items):
+            nonlocal scanned, errors
+            for item in items:
+                row = result_row(item)
+                done[row['path']] = row
+                checkpoint.write(json.dumps(row) + '\n')
+                scanned += 1
+                errors += row['error'] is not None
+            checkpoint.flush()
+
+        while in_flight:
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            first_decoded = first_decoded or time.perf_counter()
+            for future in finished:
+                path, kind, frames, faces, error = future.result()
+                item = {'path': path, 'kind': kind, 'faces': faces, 'error': error, 'frames': frames}
+                record([item] if error else scorers[kind].add(item))
+            refill()
+            if not in_flight:
+                for scorer in scorers.values():
+                    record(scorer.flush())
+            now = time.perf_counter()
+            if now - last_report >= args.report_every:
+                last_report = now
+                print(f"  {scanned}/{len(todo)} scanned, {scanned / (now - first_decoded):.1f} items/s")
+        end = time.perf_counter()
+        elapsed = end - start
+        steady = end - (first_decoded or start)
+
+    rows = [done[path] for path in paths if path in done]
+    write_output(rows, args.output)
+    if not args.keep_checkpoint:
+        os.remove(checkpoint_path)
+    rate = scanned / elapsed if elapsed > 0 else 0.0
+    steady_rate = scanned / steady if steady > 0 else 0.0
+    print(f"Scanned {scanned} items in {elapsed:.1f}s: {rate:.1f} items/s overall, {steady_rate:.1f} items/s "
+          f"once the workers were up ({errors} errors); wrote {len(rows)} rows to {args.output}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    scan_parser = commands.add_parser('scan', help='Score a directory or manifest of images and videos')
+    scan_parser.add_argument('directory', nargs='?', help='Directory to walk for images and videos')
+    scan_parser.add_argument('--manifest', help='File listing media paths, one per line (instead of a directory)')
+    scan_parser.add_argument('--output', required=True, help='Results file (.csv or .parquet)')
+    scan_parser.add_argument('--checkpoint', help='Checkpoint file (default: <output>.checkpoint.jsonl)')
+    scan_parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint and rescan')
+    scan_parser.add_argument('--keep-checkpoint', action='store_true', help='Keep the checkpoint after finishing')
+    scan_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Decode processes')
+    scan_parser.add_argument('--batch-size', type=int, default=32, help='Images or frames per model call')
+    scan_parser.add_argument('--report-every', type=float, default=10.0, help='Seconds between progress lines')
+    args = parser.parse_args()
+    if bool(args.directory) == bool(args.manifest):
+        parser.error('scan needs either a directory or --manifest')
+    return scan(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())